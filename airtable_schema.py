@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Cached Airtable base schema for Outlaw Spice.
+Keeps a local copy of the meta API response so syncs don't have to hit
+/meta/bases/{base_id}/tables every run, and lets the page generators check
+offline that the fields they rely on still exist.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+SCHEMA_CACHE = os.path.join(AIRTABLE_EXPORTS, "schema_cache.json")
+
+# Refresh the cached schema after this long (overridable via schema_ttl_hours)
+DEFAULT_TTL_HOURS = 24
+
+# Fields the CSV exporter and the page generators read, per table (by config key)
+REQUIRED_FIELDS = {
+    'products_table': [
+        'Product Handle', 'Product Name', 'Product Description', 'Product Ingredients',
+        'Product Categories', 'Main Variant Image', 'Transparent Product Image',
+        'Main Product Image', 'More Images 1', 'More Images 2', 'More Images 3',
+        'Variant Price', 'Variant Compare-at Price',
+    ],
+    'recipes_table': [
+        'Name', 'Slug', 'Thumbnail Image', 'Main Image', 'Ingredients', 'Instructions',
+    ],
+}
+
+def schema_hash(tables):
+    """Hash of the parts of the schema we depend on (table and field ids/names/types)"""
+    shape = [
+        [t.get('id'), t.get('name'), [[f.get('id'), f.get('name'), f.get('type')] for f in t.get('fields', [])]]
+        for t in tables
+    ]
+    return hashlib.sha256(json.dumps(shape, sort_keys=True).encode('utf-8')).hexdigest()
+
+def build_field_maps(tables):
+    """Map field id -> field name for each table name"""
+    return {
+        t.get('name'): {f.get('id'): f.get('name') for f in t.get('fields', [])}
+        for t in tables
+    }
+
+def load_cache(path=SCHEMA_CACHE):
+    """Return the cached schema dict, or None if there is no usable cache"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('hash') != schema_hash(cache.get('tables', [])):
+        # Edited or truncated by hand; don't trust it
+        return None
+    return cache
+
+def save_cache(base_id, tables, path=SCHEMA_CACHE):
+    """Write a freshly fetched schema to the cache and return the cache dict"""
+    digest = schema_hash(tables)
+    previous = load_cache(path)
+    if previous and previous.get('hash') == digest and previous.get('base_id') == base_id:
+        # Same schema version: keep the field maps, just bump the fetch time
+        field_maps = previous['field_maps']
+    else:
+        field_maps = build_field_maps(tables)
+    cache = {
+        'base_id': base_id,
+        'fetched_at': time.time(),
+        'hash': digest,
+        'tables': tables,
+        'field_maps': field_maps,
+    }
+    write_cache(cache, path)
+    return cache
+
+def write_cache(cache, path=SCHEMA_CACHE):
+    """Write the cache atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, path)
+
+def mark_stale(path=SCHEMA_CACHE):
+    """Force the next sync to refetch the schema (e.g. an unknown field id showed up)"""
+    cache = load_cache(path)
+    if cache:
+        cache['fetched_at'] = 0
+        write_cache(cache, path)
+
+def is_fresh(cache, base_id, ttl_hours=DEFAULT_TTL_HOURS):
+    """True if the cache belongs to this base and is younger than the TTL"""
+    if not cache or cache.get('base_id') != base_id:
+        return False
+    return time.time() - cache.get('fetched_at', 0) < ttl_hours * 3600
+
+def field_map(cache, table_name):
+    """Field id -> name map for one table, or None if the table isn't cached"""
+    if not cache:
+        return None
+    return cache.get('field_maps', {}).get(table_name)
+
+def remap_fields(fields, id_map):
+    """Rename a record's field-id keys to field names.
+
+    Returns (fields, unknown_ids); unknown ids mean the cached schema is behind.
+    """
+    named = {}
+    unknown = []
+    for key, value in fields.items():
+        name = id_map.get(key)
+        if name is None:
+            unknown.append(key)
+            named[key] = value
+        else:
+            named[name] = value
+    return named, unknown
+
+def check_drift(cache, table_names, required=REQUIRED_FIELDS):
+    """Compare required fields against the cached schema.
+
+    `table_names` maps config keys (products_table, ...) to actual table names.
+    Returns {table_name: [missing fields]} for tables with problems.
+    """
+    tables = {t.get('name'): t for t in cache.get('tables', [])}
+    drift = {}
+    for key, fields in required.items():
+        table_name = table_names.get(key)
+        if not table_name:
+            continue
+        table = tables.get(table_name)
+        if table is None:
+            drift[table_name] = ['(table missing)']
+            continue
+        present = {f.get('name') for f in table.get('fields', [])}
+        missing = [name for name in fields if name not in present]
+        if missing:
+            drift[table_name] = missing
+    return drift
+
+def configured_table_names():
+    """Table names from airtable_config.json, falling back to the defaults"""
+    names = {'products_table': 'Products', 'recipes_table': 'Recipes'}
+    config_file = os.path.join(BASE_DIR, "airtable_config.json")
+    if os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+        for key in names:
+            names[key] = config.get(key, names[key])
+    return names
+
+def verify_cached_schema():
+    """Offline pre-build check used by the page generators.
+
+    Returns False if the cached schema shows a required field has gone
+    missing. With no cache (never synced via airtable_sync.py) it passes.
+    """
+    if '--skip-schema-check' in sys.argv:
+        return True
+    cache = load_cache()
+    if not cache:
+        return True
+    drift = check_drift(cache, configured_table_names())
+    if not drift:
+        return True
+    print("❌ Airtable schema drift detected (from cached schema):")
+    for table_name, missing in drift.items():
+        print(f"   - {table_name}: missing {', '.join(missing)}")
+    print("   Fix the fields in Airtable or re-run with --skip-schema-check")
+    return False
+
+def main():
+    """Print the cached schema and run the drift check"""
+    cache = load_cache()
+    if not cache:
+        print("⚠️  No cached schema. Run airtable_sync.py to fetch one.")
+        return
+    age_hours = (time.time() - cache['fetched_at']) / 3600
+    print(f"📐 Cached schema for {cache['base_id']} ({age_hours:.1f}h old, hash {cache['hash'][:12]})")
+    for table in cache['tables']:
+        print(f"   - {table.get('name')} (ID: {table.get('id')}, {len(table.get('fields', []))} fields)")
+    if verify_cached_schema():
+        print("✅ All required fields present")
+    else:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
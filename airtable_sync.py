@@ -5,10 +5,20 @@ Syncs products and recipes from Airtable to generate static pages
 """
 
 import requests
+import csv
 import json
 import os
+import re
+import sys
+import time
 from collections import defaultdict
 
+import airtable_schema
+import catalog_db
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+
 # Load configuration from file
 def load_config():
     """Load Airtable configuration from airtable_config.json"""
@@ -29,53 +39,297 @@ if not config:
     AIRTABLE_BASE_ID = ""
     PRODUCTS_TABLE = "Products"
     RECIPES_TABLE = "Recipes"
+    INGREDIENTS_TABLE = "Ingredients"
 else:
     AIRTABLE_TOKEN = config.get('airtable_token', '')
     AIRTABLE_BASE_ID = config.get('base_id', '')
     PRODUCTS_TABLE = config.get('products_table', 'Products')
     RECIPES_TABLE = config.get('recipes_table', 'Recipes')
+    INGREDIENTS_TABLE = config.get('ingredients_table', 'Ingredients')
+
+SCHEMA_TTL_HOURS = (config or {}).get('schema_ttl_hours', airtable_schema.DEFAULT_TTL_HOURS)
+
+# API endpoint (point at mock_airtable.py for offline testing) and retry policy
+AIRTABLE_API_URL = (config or {}).get('api_url', 'https://api.airtable.com/v0').rstrip('/')
+MAX_RETRIES = (config or {}).get('max_retries', 3)
+RETRY_DELAY = (config or {}).get('retry_delay', 1.0)
+
+# Resumable pagination spool
+SPOOL_DIR = os.path.join(AIRTABLE_EXPORTS, ".spool")
+# Checkpoints older than this are discarded instead of resumed
+SPOOL_MAX_AGE_HOURS = (config or {}).get('spool_max_age_hours', 24)
+EXPIRED_OFFSET_ERRORS = ('LIST_RECORDS_ITERATOR_NOT_AVAILABLE', 'INVALID_OFFSET_VALUE')
+
+def _spool_paths(table_name):
+    """Spool (records so far) and checkpoint (pagination state) files for a table"""
+    safe_name = re.sub(r'[^\w-]', '_', table_name)
+    return (os.path.join(SPOOL_DIR, f"{safe_name}.jsonl"),
+            os.path.join(SPOOL_DIR, f"{safe_name}.checkpoint.json"))
+
+def load_checkpoint(table_name, mode, schema_hash=None):
+    """Records spooled by an earlier interrupted run, plus its checkpoint
+    
+    A checkpoint written in a different field mode (names vs ids), under a
+    different schema, or last written more than SPOOL_MAX_AGE_HOURS ago is
+    discarded, so an old spool is never merged with fresh pages.
+    """
+    spool_path, checkpoint_path = _spool_paths(table_name)
+    if not os.path.exists(checkpoint_path):
+        return [], None
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    age_hours = (time.time() - checkpoint.get('updated_at', 0)) / 3600
+    if age_hours > SPOOL_MAX_AGE_HOURS:
+        print(f"   🗑️  Discarding {table_name} spool from {age_hours:.1f}h ago")
+        clear_spool(table_name)
+        return [], None
+    if checkpoint.get('mode') != mode or checkpoint.get('schema_hash') != schema_hash:
+        clear_spool(table_name)
+        return [], None
+    records = []
+    with open(spool_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break  # torn write from a crash mid-page; the checkpoint predates it
+    # Only trust what the checkpoint says was fully written
+    return records[:checkpoint['records']], checkpoint
 
-def get_airtable_data(base_id, table_name):
-    """Fetch data from Airtable"""
-    url = f"https://api.airtable.com/v0/{base_id}/{table_name}"
+def save_page(table_name, records, checkpoint):
+    """Append one page to the spool, then move the checkpoint past it"""
+    spool_path, checkpoint_path = _spool_paths(table_name)
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    if checkpoint['records'] == 0:
+        open(spool_path, 'wb').close()
+    with open(spool_path, 'r+b') as f:
+        # Drop any partial page written after the last checkpoint, then append
+        f.truncate(checkpoint.get('spool_bytes', 0))
+        f.seek(0, os.SEEK_END)
+        for record in records:
+            f.write(json.dumps(record).encode('utf-8') + b'\n')
+        f.flush()
+        os.fsync(f.fileno())
+        checkpoint['spool_bytes'] = f.tell()
+    checkpoint['records'] += len(records)
+    checkpoint['pages'] += 1
+    checkpoint['updated_at'] = time.time()
+    if records:
+        checkpoint['last_record_id'] = records[-1].get('id')
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def clear_spool(table_name):
+    """Remove spool files once a table has been fetched completely"""
+    for path in _spool_paths(table_name):
+        if os.path.exists(path):
+            os.remove(path)
+
+def fetch_page(url, headers, params):
+    """GET one page, retrying rate limits and server errors with backoff
+    
+    Returns (status_code, json_or_None, text).
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = requests.get(url, headers=headers, params=params, timeout=30)
+        except requests.RequestException as e:
+            status, data, text = None, None, str(e)
+        else:
+            status, text = response.status_code, response.text
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            if status < 500 and status != 429:
+                return status, data, text
+        if attempt < MAX_RETRIES:
+            delay = RETRY_DELAY * (2 ** attempt)
+            print(f"   ⏳ Airtable returned {status}, retrying in {delay:g}s...")
+            time.sleep(delay)
+    return status, data, text
+
+def get_airtable_data(base_id, table_name, schema=None):
+    """Fetch data from Airtable
+    
+    With a cached schema, fields are requested by id and renamed through the
+    field map built once per schema version (ids survive field renames).
+    
+    Every page is spooled to airtable_exports/.spool/ with a checkpoint of the
+    pagination offset, so a failed or interrupted sync resumes from the last
+    good page. If Airtable has expired that offset, the listing restarts and
+    skips record ids that are already spooled. Returns None on failure (the
+    spool is kept for the next run).
+    """
+    url = f"{AIRTABLE_API_URL}/{base_id}/{table_name}"
     headers = {
         "Authorization": f"Bearer {AIRTABLE_TOKEN}",
         "Content-Type": "application/json"
     }
     
-    all_records = []
-    offset = None
+    id_map = airtable_schema.field_map(schema, table_name)
+    mode = 'ids' if id_map else 'names'
+    schema_hash = schema.get('hash') if schema else None
+    all_records, checkpoint = load_checkpoint(table_name, mode, schema_hash)
+    if checkpoint:
+        print(f"   ↩️  Resuming {table_name} after page {checkpoint['pages']} "
+              f"({checkpoint['records']} records spooled)")
+    else:
+        checkpoint = {'mode': mode, 'schema_hash': schema_hash, 'offset': None, 'pages': 0,
+                      'records': 0, 'spool_bytes': 0, 'last_record_id': None}
+    offset = checkpoint['offset']
+    seen_ids = None  # set when re-walking after an expired offset
     
     while True:
+        if checkpoint['records'] and not offset and seen_ids is None:
+            break  # checkpoint says the last page was already fetched
         params = {"offset": offset} if offset else {}
-        response = requests.get(url, headers=headers, params=params)
+        if id_map:
+            params["returnFieldsByFieldId"] = "true"
+        status, data, text = fetch_page(url, headers, params)
         
-        if response.status_code != 200:
-            print(f"❌ Error fetching from Airtable: {response.status_code}")
-            print(f"   Response: {response.text}")
-            return []
+        if status == 422 and offset and (data or {}).get('error', {}).get('type') in EXPIRED_OFFSET_ERRORS:
+            # Offsets only live a few minutes; walk the table again in record
+            # order and keep only records past what's already spooled
+            if seen_ids is not None and len(seen_ids) == len(all_records):
+                print(f"❌ Pagination offset for {table_name} expired again before any new records arrived")
+                print(f"   {checkpoint['records']} records are spooled; re-run to resume")
+                return None
+            print(f"   ⚠️  Pagination offset expired, re-walking {table_name} from the start")
+            seen_ids = {r.get('id') for r in all_records}
+            offset = None
+            continue
         
-        data = response.json()
-        all_records.extend(data.get('records', []))
+        if status != 200:
+            print(f"❌ Error fetching from Airtable: {status}")
+            print(f"   Response: {text}")
+            if checkpoint['records']:
+                print(f"   {checkpoint['records']} records from {checkpoint['pages']} pages are spooled; "
+                      f"re-run to resume")
+            return None
         
+        records = data.get('records', [])
+        if seen_ids is not None:
+            records = [r for r in records if r.get('id') not in seen_ids]
         offset = data.get('offset')
+        checkpoint['offset'] = offset
+        save_page(table_name, records, checkpoint)
+        all_records.extend(records)
+        
         if not offset:
             break
     
+    clear_spool(table_name)
+    
+    unknown_fields = set()
+    if id_map:
+        for record in all_records:
+            record['fields'], unknown = airtable_schema.remap_fields(record.get('fields', {}), id_map)
+            unknown_fields.update(unknown)
+    
+    if unknown_fields:
+        # A field was added since the schema was cached; refetch it next sync
+        print(f"   ⚠️  {len(unknown_fields)} field(s) not in cached schema; will refresh it next sync")
+        airtable_schema.mark_stale()
+    
     return all_records
 
-def sync_products(base_id):
-    """Sync products from Airtable"""
+def get_records_by_id(base_id, table_name, record_ids, schema=None):
+    """Fetch specific records (e.g. the ones a webhook reported as changed)
+    
+    Returns None on failure.
+    """
+    url = f"{AIRTABLE_API_URL}/{base_id}/{table_name}"
+    headers = {
+        "Authorization": f"Bearer {AIRTABLE_TOKEN}",
+        "Content-Type": "application/json"
+    }
+    id_map = airtable_schema.field_map(schema, table_name)
+    record_ids = sorted(record_ids)
+    records = []
+    # Keep the formula (and URL) short: a few dozen ids per request
+    for start in range(0, len(record_ids), 40):
+        chunk = record_ids[start:start + 40]
+        formula = "OR(" + ",".join(f"RECORD_ID()='{rid}'" for rid in chunk) + ")"
+        offset = None
+        while True:
+            params = {"filterByFormula": formula}
+            if offset:
+                params["offset"] = offset
+            if id_map:
+                params["returnFieldsByFieldId"] = "true"
+            status, data, text = fetch_page(url, headers, params)
+            if status != 200:
+                print(f"❌ Error fetching changed records from Airtable: {status}")
+                print(f"   Response: {text}")
+                return None
+            records.extend(data.get('records', []))
+            offset = data.get('offset')
+            if not offset:
+                break
+    if id_map:
+        for record in records:
+            record['fields'], _ = airtable_schema.remap_fields(record.get('fields', {}), id_map)
+    return records
+
+def fetch_webhook_payloads(base_id, webhook_id, cursor):
+    """Pull webhook payloads after `cursor`
+    
+    Returns (payloads, next_cursor), or (None, cursor) on failure.
+    """
+    url = f"{AIRTABLE_API_URL}/bases/{base_id}/webhooks/{webhook_id}/payloads"
+    headers = {
+        "Authorization": f"Bearer {AIRTABLE_TOKEN}",
+        "Content-Type": "application/json"
+    }
+    payloads = []
+    while True:
+        status, data, text = fetch_page(url, headers, {"cursor": cursor})
+        if status != 200:
+            print(f"❌ Error fetching webhook payloads: {status}")
+            print(f"   Response: {text}")
+            return None, cursor
+        payloads.extend(data.get('payloads', []))
+        cursor = data.get('cursor', cursor)
+        if not data.get('mightHaveMore'):
+            break
+    return payloads, cursor
+
+def export_csv(records, columns, filename):
+    """Write records to airtable_exports/ as CSV (kept for the CSV-based scripts)"""
+    os.makedirs(AIRTABLE_EXPORTS, exist_ok=True)
+    path = os.path.join(AIRTABLE_EXPORTS, filename)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        for record in records:
+            fields = record.get('fields', {})
+            writer.writerow({col: catalog_db.csv_value(fields.get(col, '')) for col in columns})
+    print(f"   ✓ Exported {len(records)} records to airtable_exports/{filename}")
+
+def sync_products(base_id, conn=None, schema=None):
+    """Sync products from Airtable; returns None if the fetch failed"""
     print(f"\n📦 Syncing products from Airtable...")
     
-    records = get_airtable_data(base_id, PRODUCTS_TABLE)
+    records = get_airtable_data(base_id, PRODUCTS_TABLE, schema)
     
+    if records is None:
+        print("   ❌ Fetching products failed")
+        return None
     if not records:
-        print("   No products found or error occurred")
-        return
+        print("   No products found")
+        return {}
     
     print(f"   Found {len(records)} product records")
     
+    # Store straight into the local catalog, no CSV round-trip
+    if conn is not None:
+        changed = catalog_db.store_products(conn, [(r.get('id'), r.get('fields', {})) for r in records])
+        print(f"   Catalog updated: {len(changed)} products changed")
+    export_csv(records, catalog_db.PRODUCT_COLUMNS, 'products.csv')
+    
     # Group by product (in case there are variants)
     products = defaultdict(list)
     for record in records:
@@ -97,18 +351,26 @@ def sync_products(base_id):
     
     return products
 
-def sync_recipes(base_id):
-    """Sync recipes from Airtable"""
+def sync_recipes(base_id, conn=None, schema=None):
+    """Sync recipes from Airtable; returns None if the fetch failed"""
     print(f"\n🍽️  Syncing recipes from Airtable...")
     
-    records = get_airtable_data(base_id, RECIPES_TABLE)
+    records = get_airtable_data(base_id, RECIPES_TABLE, schema)
     
+    if records is None:
+        print("   ❌ Fetching recipes failed")
+        return None
     if not records:
-        print("   No recipes found or error occurred")
-        return
+        print("   No recipes found")
+        return []
     
     print(f"   Found {len(records)} recipe records")
     
+    if conn is not None:
+        changed = catalog_db.store_recipes(conn, [(r.get('id'), r.get('fields', {})) for r in records])
+        print(f"   Catalog updated: {len(changed)} recipes changed")
+    export_csv(records, catalog_db.RECIPE_COLUMNS, 'recipes.csv')
+    
     recipes = []
     for record in records:
         fields = record.get('fields', {})
@@ -125,30 +387,71 @@ def sync_recipes(base_id):
     
     return recipes
 
-def test_connection(base_id):
-    """Test Airtable connection"""
-    print("🔗 Testing Airtable connection...")
+def sync_ingredients(base_id, conn, schema=None):
+    """Sync ingredients from Airtable into the local catalog; returns None if the fetch failed"""
+    print(f"\n🌶️  Syncing ingredients from Airtable...")
+    
+    records = get_airtable_data(base_id, INGREDIENTS_TABLE, schema)
+    
+    if records is None:
+        print("   ❌ Fetching ingredients failed")
+        return None
+    if not records:
+        print("   No ingredients found")
+        return []
     
-    url = f"https://api.airtable.com/v0/meta/bases/{base_id}/tables"
+    changed = catalog_db.store_ingredients(conn, [(r.get('id'), r.get('fields', {})) for r in records])
+    print(f"   Found {len(records)} ingredient records ({len(changed)} changed)")
+    return records
+
+def fetch_schema(base_id):
+    """Fetch the base schema from the Airtable meta API (one round trip)"""
+    url = f"{AIRTABLE_API_URL}/meta/bases/{base_id}/tables"
     headers = {
         "Authorization": f"Bearer {AIRTABLE_TOKEN}",
         "Content-Type": "application/json"
     }
     
-    response = requests.get(url, headers=headers)
+    # Same timeout and retries as the record listing, so a stalled request can't hang the sync
+    status, data, text = fetch_page(url, headers, None)
     
-    if response.status_code == 200:
-        data = response.json()
-        tables = data.get('tables', [])
-        print(f"✅ Connection successful!")
-        print(f"   Found {len(tables)} tables:")
-        for table in tables:
-            print(f"   - {table.get('name')} (ID: {table.get('id')})")
-        return True
+    if status != 200 or data is None:
+        print(f"❌ Connection failed: {status}")
+        print(f"   Response: {text}")
+        return None
+    return data.get('tables', [])
+
+def get_schema(base_id, refresh=False):
+    """Return the base schema, from the local cache unless stale or refresh=True"""
+    cache = airtable_schema.load_cache()
+    if not refresh and airtable_schema.is_fresh(cache, base_id, SCHEMA_TTL_HOURS):
+        return cache, True
+    tables = fetch_schema(base_id)
+    if tables is None:
+        return None, False
+    return airtable_schema.save_cache(base_id, tables), False
+
+def test_connection(base_id, refresh=False):
+    """Test Airtable connection (uses the cached schema when fresh)
+    
+    Returns the schema cache dict, or None on failure.
+    """
+    print("🔗 Testing Airtable connection...")
+    
+    schema, cached = get_schema(base_id, refresh)
+    if schema is None:
+        return None
+    
+    tables = schema.get('tables', [])
+    if cached:
+        age_hours = (time.time() - schema['fetched_at']) / 3600
+        print(f"✅ Using cached schema ({age_hours:.1f}h old, --refresh-schema to refetch)")
     else:
-        print(f"❌ Connection failed: {response.status_code}")
-        print(f"   Response: {response.text}")
-        return False
+        print(f"✅ Connection successful!")
+    print(f"   Found {len(tables)} tables:")
+    for table in tables:
+        print(f"   - {table.get('name')} (ID: {table.get('id')})")
+    return schema
 
 def main():
     """Main sync function"""
@@ -167,20 +470,45 @@ def main():
         return
     
     # Test connection
-    if not test_connection(AIRTABLE_BASE_ID):
+    schema = test_connection(AIRTABLE_BASE_ID, refresh='--refresh-schema' in sys.argv)
+    if not schema:
         return
     
-    # Sync data
-    products = sync_products(AIRTABLE_BASE_ID)
-    recipes = sync_recipes(AIRTABLE_BASE_ID)
+    # Make sure the fields the exporter and generators use still exist
+    drift = airtable_schema.check_drift(schema, {
+        'products_table': PRODUCTS_TABLE,
+        'recipes_table': RECIPES_TABLE,
+    })
+    if drift:
+        print("\n❌ Airtable schema drift detected:")
+        for table_name, missing in drift.items():
+            print(f"   - {table_name}: missing {', '.join(missing)}")
+        return
+    
+    # Sync data into the local catalog (and CSV exports)
+    conn = catalog_db.connect()
+    products = sync_products(AIRTABLE_BASE_ID, conn, schema)
+    recipes = sync_recipes(AIRTABLE_BASE_ID, conn, schema)
+    ingredients = sync_ingredients(AIRTABLE_BASE_ID, conn, schema)
+    conn.close()
+    
+    failed = [name for name, result in (('products', products), ('recipes', recipes),
+                                        ('ingredients', ingredients)) if result is None]
+    if failed:
+        print("\n" + "=" * 60)
+        print(f"❌ SYNC FAILED: {', '.join(failed)} could not be fetched")
+        print("=" * 60)
+        print("   Downloaded pages are spooled; re-run to resume")
+        sys.exit(1)
     
     print("\n" + "=" * 60)
     print("SYNC COMPLETE")
     print("=" * 60)
+    print(f"\n🗄️  Local catalog: {catalog_db.CATALOG_DB}")
     print("\n💡 Next steps:")
     print("   1. Review the data above")
-    print("   2. Integrate with generate_cms_pages.py")
-    print("   3. Regenerate all pages")
+    print("   2. Run generate_cms_pages.py (add --changed to rebuild only changed products)")
+    print("   3. Run fix_slider_single_product.py to refresh the homepage slider")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Content-addressed build cache shared between machines.
+
+Rendered product/recipe pages, LQIP placeholders and precompressed .gz/.br
+siblings are stored under the hash of everything that goes into them, so a
+result one machine built is reused by any other build with the same inputs:
+
+    <root>/<kind>/<key[:2]>/<key>
+
+Each entry holds the seconds it took to produce on its first line, then the
+bytes, so hits can report the time they saved. Entries are written to a
+temporary name and renamed into place, which keeps concurrent writers on a
+shared filesystem (an NFS mount, say) from ever exposing half an entry.
+
+The root is OUTLAW_BUILD_CACHE if set, else "build_cache" in
+airtable_config.json, else airtable_exports/build_cache/. Point CI runners
+and laptops at the same directory to share results; "off" disables the cache.
+
+Keys include CACHE_VERSION and the source of the code that produces the
+entry, so changing a renderer never serves stale output.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BASE_DIR, 'airtable_config.json')
+DEFAULT_ROOT = os.path.join(BASE_DIR, 'airtable_exports', 'build_cache')
+ENV_VAR = 'OUTLAW_BUILD_CACHE'
+
+# Bump to invalidate every entry (e.g. when the entry format changes)
+CACHE_VERSION = 1
+
+# Per-process state: the configured root (None until first use) and stats per kind
+_root = None
+_stats = {}
+_sources = {}
+
+def root():
+    """The cache directory, or '' when the cache is off"""
+    global _root
+    if _root is None:
+        configured = os.environ.get(ENV_VAR)
+        if configured is None and os.path.exists(CONFIG_FILE):
+            try:
+                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                    configured = json.load(f).get('build_cache')
+            except (OSError, ValueError):
+                configured = None
+        if configured is False or str(configured).lower() in ('off', 'false', '0', ''):
+            _root = ''
+        else:
+            # Relative paths are relative to the repository
+            _root = os.path.join(BASE_DIR, os.path.expanduser(configured)) if configured else DEFAULT_ROOT
+    return _root
+
+def key(*parts):
+    """Hash of the inputs an entry is built from"""
+    data = json.dumps([CACHE_VERSION] + list(parts), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+def source_hash(*modules):
+    """Hash of the source files of the modules that produce an entry"""
+    names = tuple(module.__name__ for module in modules)
+    if names not in _sources:
+        digest = hashlib.sha256()
+        for module in modules:
+            with open(module.__file__, 'rb') as f:
+                digest.update(f.read())
+        _sources[names] = digest.hexdigest()
+    return _sources[names]
+
+def entry_path(kind, digest):
+    return os.path.join(root(), kind, digest[:2], digest)
+
+def stats_for(kind):
+    return _stats.setdefault(kind, {'hits': 0, 'misses': 0, 'saved': 0.0, 'stored': 0})
+
+def get(kind, digest):
+    """Cached bytes for a key, or None"""
+    if not root():
+        return None
+    started = time.perf_counter()
+    path = entry_path(kind, digest)
+    try:
+        with open(path, 'rb') as f:
+            header = f.readline()
+            data = f.read()
+        seconds = float(header)
+    except (OSError, ValueError):
+        stats_for(kind)['misses'] += 1
+        return None
+    try:
+        # Marks the entry as used for --prune (atime is often not kept)
+        os.utime(path)
+    except OSError:
+        pass
+    stats = stats_for(kind)
+    stats['hits'] += 1
+    stats['saved'] += max(seconds - (time.perf_counter() - started), 0.0)
+    return data
+
+def put(kind, digest, data, seconds):
+    """Store bytes under a key, recording how long they took to produce"""
+    if not root():
+        return
+    path = entry_path(kind, digest)
+    tmp_path = f'{path}.{os.getpid()}.{time.monotonic_ns()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(f'{seconds:.6f}\n'.encode('ascii'))
+            f.write(data)
+        os.replace(tmp_path, path)
+        stats_for(kind)['stored'] += 1
+    except OSError as e:
+        # A read-only or full shared cache must never fail the build
+        print(f"⚠️  Build cache write failed ({e})")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def tracked(func, *args):
+    """Run func in a pool worker; returns (result, cache stats of that call)"""
+    _stats.clear()
+    result = func(*args)
+    stats = {kind: dict(values) for kind, values in _stats.items()}
+    _stats.clear()
+    return result, stats
+
+def merge(stats):
+    """Add stats returned by tracked() to this process's"""
+    for kind, values in stats.items():
+        totals = stats_for(kind)
+        for name, value in values.items():
+            totals[name] += value
+
+def report():
+    """Print hit rates and time saved for everything looked up in this process"""
+    if not root() or not _stats:
+        return
+    print(f"📦 Build cache ({root()}):")
+    for kind, stats in sorted(_stats.items()):
+        lookups = stats['hits'] + stats['misses']
+        rate = f"{100 * stats['hits'] / lookups:.0f}%" if lookups else 'n/a'
+        print(f"   {kind:<12} {stats['hits']:>6} of {lookups} hit ({rate}), {stats['stored']} stored, "
+              f"{stats['saved']:.2f}s saved")
+
+def main():
+    """Show or prune the cache
+
+    Usage: build_cache.py [--prune DAYS]
+    --prune removes entries no build has used for DAYS days.
+    """
+    if not root():
+        print(f"ℹ️  Build cache is off ({ENV_VAR} or \"build_cache\" in airtable_config.json)")
+        return
+    cutoff = None
+    if '--prune' in sys.argv:
+        cutoff = time.time() - float(sys.argv[sys.argv.index('--prune') + 1]) * 86400
+    print(f"📦 Build cache: {root()}")
+    if not os.path.isdir(root()):
+        print("   (empty)")
+        return
+    for kind in sorted(os.listdir(root())):
+        entries = 0
+        size = 0
+        removed = 0
+        for folder, _, names in os.walk(os.path.join(root(), kind)):
+            for name in names:
+                path = os.path.join(folder, name)
+                stat = os.stat(path)
+                if cutoff is not None and stat.st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+                    continue
+                entries += 1
+                size += stat.st_size
+        pruned = f", {removed} pruned" if cutoff is not None else ''
+        print(f"   {kind:<12} {entries:>7} entries, {size / 1e6:.1f} MB{pruned}")
+
+if __name__ == '__main__':
+    main()
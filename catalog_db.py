@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Local SQLite catalog for Outlaw Spice.
+Holds products, variants, recipes and ingredients synced from Airtable so the
+page generators can run indexed queries instead of re-scanning CSV exports.
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+CATALOG_DB = os.path.join(AIRTABLE_EXPORTS, "catalog.db")
+
+# CSV columns (matching the existing CSV structure + new image fields)
+PRODUCT_COLUMNS = [
+    'Products Collection ID', 'Product ID', 'Variants Collection ID', 'Variant ID',
+    'Product Handle', 'Product Name', 'Product Type', 'Product Description',
+    'Product Ingredients', 'Product Categories',
+    'Main Variant Image', 'Transparent Product Image', 'Main Product Image',
+    'More Images 1', 'More Images 2', 'More Images 3',
+    'More Variant Images',
+    'Variant Price', 'Variant Compare-at Price', 'Product Tax Class',
+    'Variant Sku', 'Variant Inventory', 'Requires Shipping', 'Variant Weight',
+    'Variant Width', 'Variant Height', 'Variant Length', 'Variant Download Name',
+    'Variant Download URL', 'Option1 Name', 'Option1 Value', 'Option2 Name',
+    'Option2 Value', 'Option3 Name', 'Option3 Value', 'Created On',
+    'Updated On', 'Published On'
+]
+
+RECIPE_COLUMNS = [
+    'Name', 'Slug', 'Collection ID', 'Locale ID', 'Item ID',
+    'Created On', 'Updated On', 'Published On', 'Archived', 'Draft',
+    'Description', 'Thumbnail Image', 'Main Image', 'Prep Time', 'Cook Time',
+    'Servings', 'Difficulty', 'Ingredients', 'Instructions', 'Tags'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    handle TEXT PRIMARY KEY,
+    name TEXT,
+    position INTEGER,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS variants (
+    record_id TEXT PRIMARY KEY,
+    handle TEXT NOT NULL,
+    position INTEGER,
+    fields TEXT,
+    content_hash TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS recipes (
+    slug TEXT PRIMARY KEY,
+    record_id TEXT,
+    name TEXT,
+    locale TEXT,
+    position INTEGER,
+    fields TEXT,
+    content_hash TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS ingredients (
+    name TEXT PRIMARY KEY,
+    record_id TEXT,
+    fields TEXT,
+    content_hash TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS builds (
+    name TEXT PRIMARY KEY,
+    built_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_products_position ON products(position);
+CREATE INDEX IF NOT EXISTS idx_products_updated ON products(updated_at);
+CREATE INDEX IF NOT EXISTS idx_variants_handle ON variants(handle, position);
+CREATE INDEX IF NOT EXISTS idx_variants_updated ON variants(updated_at);
+CREATE INDEX IF NOT EXISTS idx_recipes_position ON recipes(position);
+CREATE INDEX IF NOT EXISTS idx_recipes_updated ON recipes(updated_at);
+CREATE INDEX IF NOT EXISTS idx_ingredients_updated ON ingredients(updated_at);
+"""
+
+def slugify(text):
+    """Convert text to URL-friendly slug"""
+    text = text.lower().strip()
+    text = re.sub(r'[^\w\s-]', '', text)
+    text = re.sub(r'[-\s]+', '-', text)
+    return text
+
+def connect(path=CATALOG_DB):
+    """Open the catalog in WAL mode and make sure the schema exists"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def catalog_exists(path=CATALOG_DB):
+    """True if a populated catalog is available"""
+    if not os.path.exists(path):
+        return False
+    conn = connect(path)
+    try:
+        return conn.execute("SELECT 1 FROM variants LIMIT 1").fetchone() is not None
+    finally:
+        conn.close()
+
+def csv_value(value):
+    """Flatten an Airtable field value the same way the CSV export does"""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        # Attachments come back as dicts with a url, lookups as plain values
+        parts = [item.get('url', '') if isinstance(item, dict) else str(item) for item in value]
+        return '; '.join(p for p in parts if p)
+    return value if isinstance(value, str) else str(value)
+
+def normalize_fields(fields, columns):
+    """Return a CSV-shaped row: every known column present, all values strings"""
+    row = dict.fromkeys(columns, '')
+    for key, value in fields.items():
+        row[key] = value if isinstance(value, str) else csv_value(value)
+    return row
+
+def serialize(row):
+    """Serialize a row to canonical JSON plus its content hash.
+
+    The hash decides whether updated_at should move on a re-sync.
+    """
+    data = json.dumps(row, sort_keys=True, ensure_ascii=False)
+    return data, hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def _replace_table(conn, table, key, rows, now):
+    """Upsert rows keyed by `key`, delete rows that disappeared.
+
+    Only rows whose content hash changed get a new updated_at, so
+    "changed since last build" queries stay precise across full syncs.
+    Returns the set of keys that were inserted, changed or removed.
+    """
+    has_position = rows and 'position' in rows[0][2]
+    position_col = 'position' if has_position else 'NULL'
+    existing = {
+        r[0]: (r[1], r[2])
+        for r in conn.execute(f"SELECT {key}, content_hash, {position_col} FROM {table}")
+    }
+    upserts = []
+    moves = []
+    seen = set()
+    for row_key, row, values in rows:
+        seen.add(row_key)
+        data, digest = serialize(row)
+        old = existing.get(row_key)
+        if old and old[0] == digest:
+            # Content unchanged, but order may have moved
+            if has_position and old[1] != values['position']:
+                moves.append((values['position'], row_key))
+            continue
+        upserts.append((row_key, data, digest, now) + tuple(values.values()))
+
+    if upserts:
+        cols = [key, 'fields', 'content_hash', 'updated_at'] + list(rows[0][2])
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            upserts
+        )
+    if moves:
+        conn.executemany(f"UPDATE {table} SET position = ? WHERE {key} = ?", moves)
+    removed = set(existing) - seen
+    conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(k,) for k in removed])
+    return {u[0] for u in upserts} | removed
+
+def store_products(conn, records, now=None):
+    """Replace the product/variant tables with a full sync.
+
+    `records` is a list of (record_id, fields) pairs; fields may be raw
+    Airtable values or CSV strings. Returns the handles that changed.
+    """
+    now = now or time.time()
+    variant_rows = []
+    first_seen = {}
+    names = {}
+    for position, (record_id, fields) in enumerate(records):
+        row = normalize_fields(fields, PRODUCT_COLUMNS)
+        handle = row.get('Product Handle', '').strip()
+        if not handle:
+            continue
+        if handle not in first_seen:
+            first_seen[handle] = position
+            names[handle] = row.get('Product Name', '')
+        record_id = record_id or row.get('Variant ID') or f'{handle}:{position}'
+        variant_rows.append((record_id, row, {'handle': handle, 'position': position}))
+
+    with conn:
+        old_handles = {r[0]: r[1] for r in conn.execute("SELECT record_id, handle FROM variants")}
+        changed_variants = _replace_table(conn, 'variants', 'record_id', variant_rows, now)
+
+        # A product is "updated" when any of its variants changed or moved handle
+        changed_handles = set()
+        for record_id in changed_variants:
+            if record_id in old_handles:
+                changed_handles.add(old_handles[record_id])
+        for record_id, row, values in variant_rows:
+            if record_id in changed_variants:
+                changed_handles.add(values['handle'])
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO products (handle, name, position, updated_at) VALUES (?, ?, ?, ?)",
+            [(h, names[h], pos, now) for h, pos in first_seen.items() if h in changed_handles]
+        )
+        conn.executemany(
+            "UPDATE products SET position = ? WHERE handle = ? AND position != ?",
+            [(pos, h, pos) for h, pos in first_seen.items() if h not in changed_handles]
+        )
+        stale = [r[0] for r in conn.execute("SELECT handle FROM products") if r[0] not in first_seen]
+        conn.executemany("DELETE FROM products WHERE handle = ?", [(h,) for h in stale])
+    return changed_handles
+
+def store_recipes(conn, records, now=None):
+    """Replace the recipes table with a full sync. Returns changed slugs."""
+    now = now or time.time()
+    rows = []
+    for position, (record_id, fields) in enumerate(records):
+        row = normalize_fields(fields, RECIPE_COLUMNS)
+        name = row.get('Name', '')
+        if not name:
+            continue
+        slug = row.get('Slug') or slugify(name)
+        rows.append((slug, row, {
+            'record_id': record_id or row.get('Item ID', ''),
+            'name': name,
+            'locale': row.get('Locale ID', ''),
+            'position': position,
+        }))
+    with conn:
+        return _replace_table(conn, 'recipes', 'slug', rows, now)
+
+def store_ingredients(conn, records, now=None):
+    """Replace the ingredients table with a full sync. Returns changed names."""
+    now = now or time.time()
+    rows = []
+    for record_id, fields in records:
+        row = normalize_fields(fields, [])
+        name = row.get('Name', '').strip()
+        if name:
+            rows.append((name, row, {'record_id': record_id or ''}))
+    with conn:
+        return _replace_table(conn, 'ingredients', 'name', rows, now)
+
+def _refresh_products(conn, handles, now):
+    """Recompute product rows for handles whose variants changed"""
+    for handle in handles:
+        first = conn.execute(
+            "SELECT fields, position FROM variants WHERE handle = ? ORDER BY position LIMIT 1", (handle,)
+        ).fetchone()
+        if first is None:
+            conn.execute("DELETE FROM products WHERE handle = ?", (handle,))
+            continue
+        name = json.loads(first['fields']).get('Product Name', '')
+        conn.execute(
+            "INSERT OR REPLACE INTO products (handle, name, position, updated_at) VALUES (?, ?, ?, ?)",
+            (handle, name, first['position'], now)
+        )
+
+def apply_product_changes(conn, upserts, deleted_ids=(), now=None):
+    """Apply an incremental change set (e.g. from a webhook) to the variants.
+
+    `upserts` is a list of (record_id, fields) with each record's full fields;
+    new records are appended to the catalog order. Returns changed handles,
+    including handles a variant moved away from or that lost their last variant.
+    """
+    now = now or time.time()
+    changed = set()
+    with conn:
+        next_position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM variants").fetchone()[0]
+        for record_id, fields in upserts:
+            row = normalize_fields(fields, PRODUCT_COLUMNS)
+            handle = row.get('Product Handle', '').strip()
+            data, digest = serialize(row)
+            old = conn.execute(
+                "SELECT handle, position, content_hash FROM variants WHERE record_id = ?", (record_id,)
+            ).fetchone()
+            if old and old['content_hash'] == digest:
+                continue
+            if old:
+                changed.add(old['handle'])
+            if not handle:
+                conn.execute("DELETE FROM variants WHERE record_id = ?", (record_id,))
+                continue
+            if old:
+                position = old['position']
+            else:
+                position = next_position
+                next_position += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO variants (record_id, handle, position, fields, content_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (record_id, handle, position, data, digest, now)
+            )
+            changed.add(handle)
+        for record_id in deleted_ids:
+            old = conn.execute("SELECT handle FROM variants WHERE record_id = ?", (record_id,)).fetchone()
+            if old:
+                conn.execute("DELETE FROM variants WHERE record_id = ?", (record_id,))
+                changed.add(old['handle'])
+        _refresh_products(conn, changed, now)
+    return changed
+
+def apply_recipe_changes(conn, upserts, deleted_ids=(), now=None):
+    """Apply an incremental change set to the recipes. Returns changed slugs
+    (old and new slug when a recipe's slug changed)."""
+    now = now or time.time()
+    changed = set()
+    with conn:
+        next_position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM recipes").fetchone()[0]
+        for record_id, fields in upserts:
+            row = normalize_fields(fields, RECIPE_COLUMNS)
+            data, digest = serialize(row)
+            old = conn.execute(
+                "SELECT slug, position, content_hash FROM recipes WHERE record_id = ?", (record_id,)
+            ).fetchone()
+            if old and old['content_hash'] == digest:
+                continue
+            if old:
+                conn.execute("DELETE FROM recipes WHERE record_id = ?", (record_id,))
+                changed.add(old['slug'])
+            name = row.get('Name', '')
+            if not name:
+                continue
+            slug = row.get('Slug') or slugify(name)
+            if old:
+                position = old['position']
+            else:
+                position = next_position
+                next_position += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO recipes (slug, record_id, name, locale, position, fields, content_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (slug, record_id, name, row.get('Locale ID', ''), position, data, digest, now)
+            )
+            changed.add(slug)
+        for record_id in deleted_ids:
+            old = conn.execute("SELECT slug FROM recipes WHERE record_id = ?", (record_id,)).fetchone()
+            if old:
+                conn.execute("DELETE FROM recipes WHERE record_id = ?", (record_id,))
+                changed.add(old['slug'])
+    return changed
+
+def product_exists(conn, handle):
+    """True if the catalog still has variants for this handle"""
+    return conn.execute("SELECT 1 FROM products WHERE handle = ?", (handle,)).fetchone() is not None
+
+def recipe_exists(conn, slug):
+    """True if the catalog still has this recipe"""
+    return conn.execute("SELECT 1 FROM recipes WHERE slug = ?", (slug,)).fetchone() is not None
+
+def variants_by_handle(conn, handle):
+    """All variant rows for one product, in sync order"""
+    return [json.loads(r[0]) for r in conn.execute(
+        "SELECT fields FROM variants WHERE handle = ? ORDER BY position", (handle,)
+    )]
+
+def product_handles(conn, since=None):
+    """Product handles in catalog order, optionally only those changed since `since`"""
+    if since is None:
+        query = conn.execute("SELECT handle FROM products ORDER BY position")
+    else:
+        query = conn.execute(
+            "SELECT handle FROM products WHERE updated_at > ? ORDER BY position", (since,)
+        )
+    return [r[0] for r in query]
+
+def iter_grouped_variants(conn, since=None):
+    """Yield (handle, [row, ...]) one product at a time, in catalog order
+
+    Rows come off the cursor already ordered by product, so only one product's
+    variants are in memory at a time.
+    """
+    if since is None:
+        query = conn.execute(
+            "SELECT v.handle, v.fields FROM variants v JOIN products p ON p.handle = v.handle "
+            "ORDER BY p.position, v.position"
+        )
+    else:
+        query = conn.execute(
+            "SELECT v.handle, v.fields FROM variants v JOIN products p ON p.handle = v.handle "
+            "WHERE p.updated_at > ? ORDER BY p.position, v.position", (since,)
+        )
+    for handle, rows in itertools.groupby(query, key=lambda row: row[0]):
+        yield handle, [json.loads(fields) for _, fields in rows]
+
+def grouped_variants(conn, since=None):
+    """Variant rows grouped by handle: {handle: [row, ...]} in catalog order"""
+    return dict(iter_grouped_variants(conn, since))
+
+def load_recipes(conn, since=None):
+    """Recipe rows in catalog order"""
+    if since is None:
+        query = conn.execute("SELECT fields FROM recipes ORDER BY position")
+    else:
+        query = conn.execute(
+            "SELECT fields FROM recipes WHERE updated_at > ? ORDER BY position", (since,)
+        )
+    return [json.loads(r[0]) for r in query]
+
+def load_ingredients(conn):
+    """Ingredient rows keyed by name"""
+    return {r[0]: json.loads(r[1]) for r in conn.execute("SELECT name, fields FROM ingredients ORDER BY name")}
+
+def last_built(conn, name):
+    """Timestamp of the last successful build step `name`, or None"""
+    row = conn.execute("SELECT built_at FROM builds WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+def mark_built(conn, name, built_at=None):
+    """Record that build step `name` completed"""
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO builds (name, built_at) VALUES (?, ?)",
+                     (name, built_at or time.time()))
+
+def read_csv_records(path):
+    """Read a CSV export as (record_id, row) pairs"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(None, row) for row in csv.DictReader(f)]
+
+def import_csv(conn, products_csv=None, recipes_csv=None, ingredients_csv=None):
+    """Populate the catalog from existing CSV exports"""
+    if products_csv and os.path.exists(products_csv):
+        changed = store_products(conn, read_csv_records(products_csv))
+        print(f"   Products: {len(changed)} changed")
+    if recipes_csv and os.path.exists(recipes_csv):
+        changed = store_recipes(conn, read_csv_records(recipes_csv))
+        print(f"   Recipes: {len(changed)} changed")
+    if ingredients_csv and os.path.exists(ingredients_csv):
+        changed = store_ingredients(conn, read_csv_records(ingredients_csv))
+        print(f"   Ingredients: {len(changed)} changed")
+
+def _write_synthetic_csv(path, num_products, variants_per_product):
+    """Write a products CSV shaped like the Airtable export, for benchmarking"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=PRODUCT_COLUMNS)
+        writer.writeheader()
+        for p in range(num_products):
+            for v in range(variants_per_product):
+                writer.writerow({
+                    'Product Handle': f'spice-{p}',
+                    'Product Name': f'Spice {p}',
+                    'Variant ID': f'var-{p}-{v}',
+                    'Variant Price': f'${10 + v}.00',
+                    'Main Variant Image': f'https://cdn.example.com/spice-{p}-{v}.avif',
+                    'Product Description': 'A smoky blend of paprika and brown sugar. ' * 5,
+                    'Option1 Value': f'size-{v}',
+                })
+
+def benchmark(num_products=2000, variants_per_product=10):
+    """Compare CSV scans against catalog queries on a synthetic export"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'products.csv')
+        db_path = os.path.join(tmp, 'catalog.db')
+        _write_synthetic_csv(csv_path, num_products, variants_per_product)
+        rows = num_products * variants_per_product
+        print(f"Synthetic export: {num_products} products, {rows} variant rows")
+
+        def timed(label, func, repeat=1):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                result = func()
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"   {label:<44} {elapsed * 1000:9.2f} ms")
+            return result
+
+        def csv_group():
+            grouped = defaultdict(list)
+            with open(csv_path, 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    grouped[row['Product Handle']].append(row)
+            return grouped
+
+        def csv_one_handle():
+            with open(csv_path, 'r', encoding='utf-8') as f:
+                return [r for r in csv.DictReader(f) if r['Product Handle'] == 'spice-1500']
+
+        conn = connect(db_path)
+        records = read_csv_records(csv_path)
+        timed("catalog initial load (CSV -> SQLite)", lambda: store_products(conn, records, now=1.0))
+        timed("catalog re-sync, nothing changed", lambda: store_products(conn, records, now=2.0))
+        timed("CSV full scan + group by handle", csv_group, repeat=3)
+        timed("catalog all variants grouped", lambda: grouped_variants(conn), repeat=3)
+        timed("CSV scan for one handle", csv_one_handle, repeat=3)
+        timed("catalog variants_by_handle", lambda: variants_by_handle(conn, 'spice-1500'), repeat=100)
+        timed("catalog products changed since last build", lambda: product_handles(conn, since=1.5), repeat=100)
+        conn.close()
+
+def main():
+    """Import the CSV exports into the catalog (or benchmark with --benchmark)"""
+    if '--benchmark' in sys.argv:
+        benchmark()
+        return
+
+    print("🗄️  Importing CSV exports into the local catalog...")
+    conn = connect()
+    import_csv(
+        conn,
+        os.path.join(AIRTABLE_EXPORTS, "products.csv"),
+        os.path.join(AIRTABLE_EXPORTS, "recipes.csv"),
+        os.path.join(AIRTABLE_EXPORTS, "ingredients.csv"),
+    )
+    conn.close()
+    print(f"✅ Catalog ready: {CATALOG_DB}")
+
+if __name__ == '__main__':
+    main()
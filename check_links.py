@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Check the output tree for broken links, missing assets and orphan pages.
+
+The tree is listed once into an in-memory index of every file. Pages are
+tokenized in a process pool: a single-pass scanner walks each document's tags
+(skipping comments and script bodies) and collects link targets, asset
+references and element ids. The main process then checks every reference
+against the index:
+
+- dangling links: <a href> to a page that doesn't exist (e.g. a slider card
+  for a handle that was never generated)
+- missing assets: img/srcset/source/video poster/script/stylesheet/icon and
+  sprite <use> references to files that aren't there
+- broken fragments: page.html#id where the target page has no such id
+- orphan pages: pages no other page links to (entry pages excepted)
+
+Exits 1 if there are dangling links or missing assets; fragments and orphans
+are reported as warnings.
+"""
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+from urllib.parse import unquote
+
+import page_weight
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Not part of the output tree when checking the repository itself
+SKIP_DIRS = {'.git', 'airtable_exports', 'deploy_to_cloudflare', '__pycache__', 'node_modules'}
+
+# Pages nothing needs to link to
+ENTRY_PAGES = {'index.html', '401.html', '404.html', 'style-guide.html'}
+TEMPLATE_PAGE = re.compile(r'^detail_\w+\.html$')
+
+# Comments and script/style bodies are consumed whole so URLs inside them are
+# ignored; of the remaining tags only the ones that can reference something matter
+# (Webflow writes lowercase tags, so matching is case-sensitive, which is faster)
+TOKEN = re.compile(r'<(?:!--.*?-->|(script|style)\b([^>]*)>.*?</\1\s*>|(a|img|source|video|iframe|link|div|use)\b([^>]*)>)',
+                   re.DOTALL)
+ID_ATTR = re.compile(r' id="([^"]*)"')
+ATTR = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+ASSET_ATTRS = {
+    'img': ('src', 'srcset'),
+    'source': ('src', 'srcset'),
+    'video': ('poster',),
+    'script': ('src',),
+    'iframe': ('src',),
+    'use': ('href',),
+}
+ASSET_LINK_RELS = {'stylesheet', 'icon', 'shortcut icon', 'apple-touch-icon', 'preload', 'modulepreload'}
+
+def tokenize(html):
+    """Yield (tag, attrs) for the start tags that can reference a URL"""
+    for match in TOKEN.finditer(html):
+        if match.group(1):
+            yield match.group(1), dict(ATTR.findall(match.group(2)))
+        elif match.group(3) == 'div':
+            # Only Webflow background videos (data-poster-url) matter among the divs
+            if 'data-poster-url' in match.group(4):
+                yield 'div', dict(ATTR.findall(match.group(4)))
+        elif match.group(3):
+            yield match.group(3), dict(ATTR.findall(match.group(4)))
+
+def scan_page(args):
+    """Worker: (page, links, assets, ids) with raw (unresolved) URLs"""
+    site_dir, page = args
+    with open(os.path.join(site_dir, page), 'r', encoding='utf-8', errors='replace') as f:
+        html = f.read()
+    links, assets, ids = [], [], set()
+    ids.update(ID_ATTR.findall(html))
+    for tag, attrs in tokenize(html):
+        if tag == 'a' and 'href' in attrs:
+            links.append(unescape(attrs['href']))
+        elif tag == 'link' and attrs.get('rel') in ASSET_LINK_RELS:
+            assets.append(unescape(attrs.get('href', '')))
+        for name in ASSET_ATTRS.get(tag, ()):
+            value = unescape(attrs.get(name, ''))
+            if name == 'srcset':
+                assets += [entry.split()[0] for entry in value.split(',') if entry.strip()]
+            elif value:
+                assets.append(value)
+        if 'data-poster-url' in attrs:
+            assets.append(unescape(attrs['data-poster-url']))
+    return page, links, assets, sorted(ids)
+
+def list_tree(site_dir):
+    """Every file under the site, as site-relative paths"""
+    files = set()
+    for root, dirs, names in os.walk(site_dir):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+        rel = os.path.relpath(root, site_dir)
+        for name in names:
+            files.add(os.path.normpath(os.path.join(rel, name)))
+    return files
+
+def skip_url(url):
+    """External, in-page and script URLs aren't checked"""
+    url = url.strip()
+    return (not url or url.startswith(('#', 'data:', 'mailto:', 'tel:', 'javascript:'))
+            or page_weight.is_remote(url))
+
+def resolve_page(path, files):
+    """Page file for a link target, trying Cloudflare-style pretty URLs"""
+    if path in files:
+        return path
+    for candidate in (path + '.html', os.path.join(path, 'index.html')):
+        candidate = os.path.normpath(candidate)
+        if candidate in files:
+            return candidate
+    return None
+
+def main():
+    """Check the tree and print a report
+
+    Usage: check_links.py [--site DIR] [--jobs N]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    jobs = None
+    if '--jobs' in sys.argv:
+        jobs = int(sys.argv[sys.argv.index('--jobs') + 1])
+
+    started = time.time()
+    files = list_tree(site_dir)
+    pages = sorted(f for f in files if f.endswith('.html') and f.split(os.sep)[0] not in page_weight.SKIP_DIRS)
+
+    dangling = {}
+    missing = {}
+    fragments = []
+    inbound = {page: 0 for page in pages}
+    page_ids = {}
+    pending_fragments = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for page, links, assets, ids in pool.map(scan_page, [(site_dir, p) for p in pages], chunksize=64):
+            page_ids[page] = set(ids)
+            for url in links:
+                if skip_url(url):
+                    continue
+                fragment = url.split('#', 1)[1] if '#' in url else ''
+                target = resolve_page(page_weight.resolve(page, url), files)
+                if target is None:
+                    dangling.setdefault(url if url.startswith('/') else page_weight.resolve(page, url), []).append(page)
+                    continue
+                if target != page and target in inbound:
+                    inbound[target] += 1
+                if fragment and target.endswith('.html'):
+                    pending_fragments.append((page, target, unquote(fragment)))
+            for url in assets:
+                if skip_url(url):
+                    continue
+                path = page_weight.resolve(page, url)
+                if path not in files:
+                    missing.setdefault(path, []).append(page)
+    for page, target, fragment in pending_fragments:
+        if fragment not in page_ids.get(target, ()):
+            fragments.append((page, f'{target}#{fragment}'))
+
+    orphans = [page for page, count in inbound.items()
+               if count == 0 and os.path.basename(page) not in ENTRY_PAGES
+               and not (os.path.dirname(page) == '' and TEMPLATE_PAGE.match(page))]
+    elapsed = time.time() - started
+
+    print(f"🔗 Checked {len(pages)} page(s) against {len(files)} file(s) in {elapsed:.1f}s")
+    for title, problems in (('Dangling links', dangling), ('Missing assets', missing)):
+        if problems:
+            print(f"\n❌ {title}: {len(problems)}")
+            for target, sources in sorted(problems.items()):
+                shown = ', '.join(sorted(set(sources))[:3])
+                more = f' (+{len(set(sources)) - 3} more)' if len(set(sources)) > 3 else ''
+                print(f"   {target}  ← {shown}{more}")
+    if fragments:
+        print(f"\n⚠️  Broken fragments: {len(fragments)}")
+        for page, target in sorted(set(fragments)):
+            print(f"   {target}  ← {page}")
+    if orphans:
+        print(f"\n⚠️  Orphan pages (nothing links to them): {len(orphans)}")
+        for page in orphans:
+            print(f"   {page}")
+
+    if dangling or missing:
+        sys.exit(1)
+    print("\n✅ No dangling links or missing assets")
+
+if __name__ == '__main__':
+    main()
@@ -9,11 +9,26 @@ import re
 from html import escape
 from collections import defaultdict
 
+import airtable_schema
+import catalog_db
+import cross_reference
+import price_overlay
+import resource_hints
+
 # Paths
-PRODUCTS_CSV = "/Users/elombe.kisala/Downloads/Outlaw Spice 2025 - Products.csv"
-RECIPES_CSV = "/Users/elombe.kisala/Downloads/Outlaw Spice 2025 - Recipes (1).csv"
-TEMPLATE_DIR = "/Users/elombe.kisala/Library/Mobile Documents/com~apple~CloudDocs/Work - Core Home/CORE HOME/Brands : Projects/SPICES/Outlaw Spice/outlaw-spice-website"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+USE_CATALOG = catalog_db.catalog_exists()
+
+if os.path.exists(os.path.join(AIRTABLE_EXPORTS, "products.csv")):
+    PRODUCTS_CSV = os.path.join(AIRTABLE_EXPORTS, "products.csv")
+    RECIPES_CSV = os.path.join(AIRTABLE_EXPORTS, "recipes.csv")
+else:
+    PRODUCTS_CSV = "/Users/elombe.kisala/Downloads/Outlaw Spice 2025 - Products.csv"
+    RECIPES_CSV = "/Users/elombe.kisala/Downloads/Outlaw Spice 2025 - Recipes (1).csv"
+TEMPLATE_DIR = BASE_DIR
 OUTPUT_DIR = TEMPLATE_DIR
+PRICE_OVERLAY = price_overlay.enabled()
 
 def parse_categories(categories_str):
     """Parse semicolon-separated categories"""
@@ -25,12 +40,17 @@ def load_products():
     """Load and group products by Product Handle"""
     products = defaultdict(list)
     
-    with open(PRODUCTS_CSV, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            handle = row.get('Product Handle', '').strip()
-            if handle:
-                products[handle].append(row)
+    if USE_CATALOG:
+        conn = catalog_db.connect()
+        products.update(catalog_db.grouped_variants(conn))
+        conn.close()
+    else:
+        with open(PRODUCTS_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                handle = row.get('Product Handle', '').strip()
+                if handle:
+                    products[handle].append(row)
     
     # Convert to regular dict with first variant as main product
     result = {}
@@ -42,7 +62,13 @@ def load_products():
     return result
 
 def load_recipes():
-    """Load recipes from CSV"""
+    """Load recipes from the catalog or CSV"""
+    if USE_CATALOG:
+        conn = catalog_db.connect()
+        recipes = catalog_db.load_recipes(conn)
+        conn.close()
+        return recipes
+    
     recipes = []
     with open(RECIPES_CSV, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
@@ -51,6 +77,27 @@ def load_recipes():
                 recipes.append(row)
     return recipes
 
+def grid_page(template, title, list_class, cards):
+    """index.html with its homepage sections replaced by a grid of `cards`"""
+    html = template.replace('<title>Outlaw Spice 2025</title>', f'<title>{title}</title>')
+    start = html.find('<div class="scroll-area">')
+    if start == -1:
+        return html
+    end = resource_hints.element_end(html, start)
+    grid = f'''<div class="scroll-area">
+        <section class="section_grid">
+          <div class="padding-global">
+            <div class="container-large">
+              <div role="list" class="{list_class} w-dyn-items">{cards}</div>
+            </div>
+          </div>
+        </section>
+      </div>'''
+    html = html[:start] + grid + html[end:]
+    if PRICE_OVERLAY:
+        html = html.replace('</body>', f'{price_overlay.script_tag("")}\n</body>', 1)
+    return html
+
 def create_products_grid_page(products, output_dir):
     """Create a grid page showing all products"""
     
@@ -67,6 +114,12 @@ def create_products_grid_page(products, output_dir):
         price = product.get('Variant Price', '$0.00')
         description = product.get('Product Description', '')
         
+        # Left to js/price-overlay.js in price overlay mode
+        if PRICE_OVERLAY:
+            price_html = price_overlay.placeholder(handle, 'product-price')
+        else:
+            price_html = f'<div class="product-price">{escape(price)}</div>'
+        
         # Clean description (remove HTML tags and limit length)
         clean_desc = re.sub('<.*?>', '', description).strip()
         if len(clean_desc) > 100:
@@ -85,7 +138,7 @@ def create_products_grid_page(products, output_dir):
                 </div>
                 <p class="text-size-small">{escape(clean_desc)}</p>
                 <div class="margin-top margin-xxsmall">
-                  <div class="product-price">{escape(price)}</div>
+                  {price_html}
                 </div>
               </div>
             </div>
@@ -95,10 +148,7 @@ def create_products_grid_page(products, output_dir):
         product_cards += card_html
     
     # Create the products grid page
-    html = template
-    
-    # Update title
-    html = html.replace('<title>Outlaw Spice 2025</title>', '<title>All Products | Outlaw Spice</title>')
+    html = grid_page(template, 'All Products | Outlaw Spice', 'product-grid', product_cards)
     
     # Write output file
     output_file = os.path.join(output_dir, 'products.html')
@@ -120,7 +170,7 @@ def create_recipes_grid_page(recipes, output_dir):
     recipe_cards = ""
     for recipe in recipes:
         name = recipe.get('Name', '')
-        slug = recipe.get('Slug', '')
+        slug = cross_reference.recipe_slug(recipe)
         image = recipe.get('Thumbnail Image', '')
         color = recipe.get('Color', '#000000')
         servings = recipe.get('Number of Servings', '')
@@ -148,10 +198,7 @@ def create_recipes_grid_page(recipes, output_dir):
         recipe_cards += card_html
     
     # Create the recipes grid page
-    html = template
-    
-    # Update title
-    html = html.replace('<title>Outlaw Spice 2025</title>', '<title>All Recipes | Outlaw Spice</title>')
+    html = grid_page(template, 'All Recipes | Outlaw Spice', 'recipe-grid', recipe_cards)
     
     # Write output file
     output_file = os.path.join(output_dir, 'recipes.html')
@@ -163,6 +210,10 @@ def create_recipes_grid_page(recipes, output_dir):
 
 def main():
     """Main execution"""
+    # Offline check against the cached Airtable schema before touching any page
+    if not airtable_schema.verify_cached_schema():
+        return
+    
     print("Loading CSV data...")
     products = load_products()
     recipes = load_recipes()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Product <-> recipe cross-reference index for Outlaw Spice.
+Finds which of our spices (and which ingredients) each recipe mentions, so
+product pages can list the recipes that use them and recipe pages can list
+the spices they feature. Recipes are matched in a single pass each with an
+Aho-Corasick automaton over every product/ingredient name, and the index is
+kept in airtable_exports/xref_index.json so only recipes or names that changed
+are rescanned on the next build.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+
+import catalog_db
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+XREF_INDEX = os.path.join(AIRTABLE_EXPORTS, "xref_index.json")
+
+# Bump when the index layout or matching rules change
+INDEX_VERSION = 1
+
+# Recipe fields scanned for mentions
+RECIPE_TEXT_FIELDS = ['Ingredients', 'Instructions']
+
+# Names shorter than this match too much noise to be useful
+MIN_PATTERN_LENGTH = 3
+
+# Cards shown in a "used in" / "featured spices" block
+MAX_CARDS = 6
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every pattern occurrence in one pass over the text"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append(pattern)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find_words(self, text):
+        """Set of patterns found in `text` as whole words"""
+        found = set()
+        state = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in out[state]:
+                start = end - len(pattern) + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end + 1 < len(text) and text[end + 1].isalnum():
+                    continue
+                found.add(pattern)
+        return found
+
+def normalize_text(text):
+    """Lowercase plain text with tags stripped and whitespace collapsed"""
+    text = re.sub(r'<[^>]*>', ' ', text or '')
+    text = html.unescape(text).replace('’', "'").replace('‘', "'")
+    return ' '.join(text.lower().split())
+
+def recipe_slug(recipe):
+    """Slug the recipe page is written under (the name's slug when Slug is empty)"""
+    return recipe.get('Slug') or catalog_db.slugify(recipe.get('Name', ''))
+
+def recipe_text(recipe):
+    """Normalized text the recipe is matched on"""
+    return normalize_text(' '.join(recipe.get(field, '') or '' for field in RECIPE_TEXT_FIELDS))
+
+def product_image(product):
+    """Image used for a product card"""
+    return product.get('Transparent Product Image') or product.get('Main Variant Image', '')
+
+def collect_patterns(products, ingredients):
+    """Map normalized name -> [[kind, key], ...] for products and ingredients"""
+    patterns = {}
+    def add(name, kind, key):
+        name = normalize_text(name)
+        if len(name) >= MIN_PATTERN_LENGTH and [kind, key] not in patterns.setdefault(name, []):
+            patterns[name].append([kind, key])
+    for handle, product in products.items():
+        add(product.get('Product Name', ''), 'product', handle)
+        add(handle.replace('-', ' '), 'product', handle)
+    for name in ingredients:
+        add(name, 'ingredient', name)
+    for name in [name for name, targets in patterns.items() if not targets]:
+        del patterns[name]
+    return patterns
+
+def text_hash(text):
+    """Short content hash for change detection"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def load_index(path=XREF_INDEX):
+    """Return the stored index, or an empty one if missing or from another version"""
+    empty = {'version': INDEX_VERSION, 'patterns': {}, 'recipes': {}, 'blocks': {'products': {}, 'recipes': {}}}
+    if not os.path.exists(path):
+        return empty
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if index.get('version') != INDEX_VERSION:
+        return empty
+    return index
+
+def save_index(index, path=XREF_INDEX):
+    """Write the index atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def render_cards(title, cards):
+    """Sidebar-style card list shared by both blocks"""
+    items = []
+    for href, name, image in cards[:MAX_CARDS]:
+        items.append(f'''                        <div role="listitem" class="recipe-extra-item">
+                          <a href="{html.escape(href)}" class="side-blog w-inline-block">
+                            <div class="w-layout-grid recipe-extra-grid">
+                              <div class="div-block-7"><img alt="" src="{html.escape(image)}" loading="lazy" class="blog-image-small"></div>
+                              <div class="recipe-title-wrap">
+                                <h6 class="content-h6">{html.escape(name)}</h6>
+                              </div>
+                            </div>
+                          </a>
+                        </div>''')
+    return f'''<div class="other-recipes xref-block">
+                    <h2 class="heading-5">{html.escape(title)}</h2>
+                    <div class="collection-list-wrapper">
+                      <div role="list">
+{chr(10).join(items)}
+                      </div>
+                    </div>
+                  </div>'''
+
+def render_used_in(slugs, recipes_by_slug):
+    """Used-in block for a product page (empty string if no recipe uses it)"""
+    cards = [(f'../recipes/{slug}.html', recipes_by_slug[slug].get('Name', ''),
+              recipes_by_slug[slug].get('Thumbnail Image', '')) for slug in slugs]
+    return render_cards('Used In These Recipes', cards) if cards else ''
+
+def render_featured(handles, products):
+    """Featured-spices block for a recipe page (empty string if none)"""
+    cards = [(f'../products/{handle}.html', products[handle].get('Product Name', ''),
+              product_image(products[handle])) for handle in handles]
+    return render_cards('Featured Spices', cards) if cards else ''
+
+def update_index(products, recipes, ingredients, path=XREF_INDEX, scan_cache=None):
+    """Bring the cross-reference index up to date.
+
+    Only recipes whose text changed get a full scan; unchanged recipes are
+    scanned for newly added names only, and names that disappeared are
+    dropped from their matches. A `scan_cache` dict shared between calls
+    (one per locale, say) reuses full scans of the same text against the
+    same names. Returns a dict with the rendered blocks
+    ('used_in' by handle, 'featured' by slug), ingredient matches per recipe,
+    the pages whose block changed ('stale_products', 'stale_recipes'), scan
+    stats, and the new 'index' to pass to save_index() once pages are written.
+    """
+    old = load_index(path)
+    patterns = collect_patterns(products, ingredients)
+    added = [p for p in patterns if p not in old['patterns']]
+    removed = {p for p in old['patterns'] if p not in patterns}
+    full_matcher = None
+    added_matcher = AhoCorasick(added) if added and old['recipes'] else None
+    stats = {'full_scans': 0, 'partial_scans': 0, 'reused': 0, 'patterns': len(patterns)}
+    patterns_hash = text_hash('\n'.join(sorted(patterns))) if scan_cache is not None else None
+
+    recipes_by_slug = {}
+    recipe_entries = {}
+    for recipe in recipes:
+        slug = recipe_slug(recipe)
+        recipes_by_slug[slug] = recipe
+        text = recipe_text(recipe)
+        digest = text_hash(text)
+        previous = old['recipes'].get(slug)
+        if previous and previous['hash'] == digest:
+            matches = set(previous['matches']) - removed
+            if added_matcher:
+                matches |= added_matcher.find_words(text)
+                stats['partial_scans'] += 1
+            else:
+                stats['reused'] += 1
+        elif scan_cache is not None and (digest, patterns_hash) in scan_cache:
+            matches = set(scan_cache[(digest, patterns_hash)])
+            stats['reused'] += 1
+        else:
+            if full_matcher is None:
+                full_matcher = AhoCorasick(list(patterns))
+            matches = full_matcher.find_words(text)
+            stats['full_scans'] += 1
+            if scan_cache is not None:
+                scan_cache[(digest, patterns_hash)] = frozenset(matches)
+        recipe_entries[slug] = {'hash': digest, 'matches': sorted(matches)}
+
+    # Invert the matches into product -> recipes and recipe -> products/ingredients
+    used_in = {}
+    featured = {}
+    recipe_ingredients = {}
+    for slug, entry in recipe_entries.items():
+        handles = []
+        names = []
+        for pattern in entry['matches']:
+            for kind, key in patterns[pattern]:
+                if kind == 'product' and key not in handles:
+                    handles.append(key)
+                elif kind == 'ingredient' and key not in names:
+                    names.append(key)
+        handles.sort(key=lambda h: products[h].get('Product Name', h))
+        featured[slug] = handles
+        recipe_ingredients[slug] = sorted(names)
+        for handle in handles:
+            used_in.setdefault(handle, []).append(slug)
+    for handle in used_in:
+        used_in[handle].sort(key=lambda s: recipes_by_slug[s].get('Name', s))
+
+    blocks = {
+        'used_in': {handle: render_used_in(used_in.get(handle, []), recipes_by_slug) for handle in products},
+        'featured': {slug: render_featured(featured[slug], products) for slug in recipe_entries},
+    }
+    block_hashes = {
+        'products': {handle: text_hash(block) for handle, block in blocks['used_in'].items()},
+        'recipes': {slug: text_hash(block) for slug, block in blocks['featured'].items()},
+    }
+    stale_products = {h for h, digest in block_hashes['products'].items()
+                      if old['blocks']['products'].get(h) != digest}
+    stale_recipes = {s for s, digest in block_hashes['recipes'].items()
+                     if old['blocks']['recipes'].get(s) != digest}
+
+    return {
+        'used_in': blocks['used_in'],
+        'featured': blocks['featured'],
+        'ingredients': recipe_ingredients,
+        'stale_products': stale_products,
+        'stale_recipes': stale_recipes,
+        'stats': stats,
+        'index': {
+            'version': INDEX_VERSION,
+            'built_at': time.time(),
+            'patterns': patterns,
+            'recipes': recipe_entries,
+            'blocks': block_hashes,
+        },
+    }
+
+def benchmark(num_products=500, num_recipes=2000):
+    """Compare the automaton against per-product substring scans on synthetic data"""
+    import random
+    rng = random.Random(42)
+    words = ['smoky', 'honey', 'chipotle', 'garlic', 'mesquite', 'citrus', 'pepper', 'maple',
+             'ranch', 'cajun', 'hickory', 'lime', 'ancho', 'brisket', 'bourbon', 'sage']
+    products = {}
+    for i in range(num_products):
+        name = f"{' '.join(rng.sample(words, 2)).title()} Rub {i}"
+        products[catalog_db.slugify(name)] = {'Product Name': name}
+    names = [p['Product Name'] for p in products.values()]
+    recipes = []
+    for i in range(num_recipes):
+        lines = [f"<li>{rng.randint(1, 4)} tbsp {rng.choice(names)}</li>" for _ in range(3)]
+        lines += [f"<li>1 cup {' '.join(rng.sample(words, 3))}</li>" for _ in range(12)]
+        recipes.append({'Name': f'Recipe {i}', 'Slug': f'recipe-{i}', 'Ingredients': '<ul>' + ''.join(lines) + '</ul>'})
+
+    patterns = list(collect_patterns(products, {}))
+    started = time.time()
+    matcher = AhoCorasick(patterns)
+    ac_hits = sum(len(matcher.find_words(recipe_text(r))) for r in recipes)
+    ac_seconds = time.time() - started
+
+    started = time.time()
+    naive_hits = 0
+    for recipe in recipes:
+        text = recipe_text(recipe)
+        naive_hits += sum(1 for p in patterns if re.search(r'(?<!\w)' + re.escape(p) + r'(?!\w)', text))
+    naive_seconds = time.time() - started
+
+    print(f"📊 {num_recipes} recipes x {len(patterns)} names")
+    print(f"   Aho-Corasick:      {ac_seconds:.2f}s ({ac_hits} matches)")
+    print(f"   Substring scans:   {naive_seconds:.2f}s ({naive_hits} matches)")
+
+def main():
+    """Match the current data and print what links to what (the index isn't saved)"""
+    if '--benchmark' in sys.argv:
+        benchmark()
+        return
+    # Reuse the generator's loaders so CSV and catalog builds see the same data
+    import generate_cms_pages
+    products = generate_cms_pages.load_products()
+    recipes = generate_cms_pages.load_recipes()
+    ingredients = generate_cms_pages.load_ingredients()
+    xref = update_index(products, recipes, ingredients)
+    stats = xref['stats']
+    print(f"🔗 {stats['patterns']} names, {stats['full_scans']} full / {stats['partial_scans']} partial scans, "
+          f"{stats['reused']} reused")
+    for slug, entry in sorted(xref['index']['recipes'].items()):
+        print(f"   - {slug}: {', '.join(entry['matches']) or '(no matches)'}")
+    print(f"   {len(xref['stale_products'])} product page(s) and {len(xref['stale_recipes'])} recipe page(s) need a rebuild")
+
+if __name__ == '__main__':
+    main()
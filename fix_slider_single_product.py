@@ -8,10 +8,14 @@ import re
 from collections import defaultdict
 from html import escape
 
+import airtable_schema
+import catalog_db
+
 # Paths
 import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+USE_CATALOG = catalog_db.catalog_exists()
 
 # Use Airtable exports if available, otherwise use original CSV
 if os.path.exists(os.path.join(AIRTABLE_EXPORTS, "products.csv")):
@@ -25,12 +29,18 @@ def load_products():
     """Load and group products by Product Handle"""
     products = defaultdict(list)
     
-    with open(PRODUCTS_CSV, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            handle = row.get('Product Handle', '').strip()
-            if handle:
-                products[handle].append(row)
+    if USE_CATALOG:
+        # Variants come back already grouped by handle from the indexed catalog
+        conn = catalog_db.connect()
+        products.update(catalog_db.grouped_variants(conn))
+        conn.close()
+    else:
+        with open(PRODUCTS_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                handle = row.get('Product Handle', '').strip()
+                if handle:
+                    products[handle].append(row)
     
     # Convert to regular dict with first variant as main product
     # BUT search all variants for the best image (.avif preferred)
@@ -157,6 +167,10 @@ def create_product_slides(products):
 def update_homepage():
     """Update the homepage product slider"""
     
+    # Offline check against the cached Airtable schema before touching any page
+    if not airtable_schema.verify_cached_schema():
+        return
+    
     print("Loading products...")
     products = load_products()
     
@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+"""
+Work out which web-font faces the site actually renders and load only those.
+
+Every page asks WebFont.load for Montserrat in 18 weight/style variants, Open
+Sans in 10, Changa One and Inconsolata. This walks css/*.css and every page,
+resolves font-family / font-weight / font-style for each element that shows
+text (a small cascade: selector matching, specificity, inheritance, the
+browser's default bold/italic tags, ::before/::after content), maps each
+request onto the faces the browser would pick, and then:
+
+- trims the WebFont.load families list on every page to the faces in use and
+  asks Google Fonts for font-display: swap
+- trims @font-face rules for self-hosted families the same way and adds
+  font-display: swap to the ones kept
+- preloads the primary text face's woff2 file (with crossorigin) when it is
+  self-hosted. Google Fonts faces aren't preloaded: their woff2 URLs are
+  versioned and picked per browser by the stylesheet, so the build can't know
+  them, and preloading the stylesheet itself doesn't fetch the face
+
+It errs on the side of keeping a face: :hover/:focus and other state
+selectors, w--current/w--open style classes Webflow toggles at runtime and
+every media query are treated as if they apply.
+"""
+
+import json
+import os
+import re
+import sys
+from html.parser import HTMLParser
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSS_DIR = 'css'
+
+# Icon fonts rely on font-display: block to avoid showing fallback glyphs
+ICON_FONTS = {'webflow-icons'}
+
+# Rough size of one Google Fonts latin woff2 face, used when files aren't local
+ESTIMATED_FACE_BYTES = 22_000
+
+# The families list as exported from Webflow, kept so later runs can add a face
+# back when new content starts using it
+FAMILIES_FILE = os.path.join(CSS_DIR, 'webfont-families.json')
+
+# Marks the preload hint so re-runs replace it
+PRELOAD_MARKER = 'data-font-preload'
+
+# The bits of the browser's default stylesheet that change fonts
+UA_STYLESHEET = """
+h1, h2, h3, h4, h5, h6, b, strong, th { font-weight: bold; }
+em, i, cite, var, dfn, address { font-style: italic; }
+code, kbd, samp, pre, tt { font-family: monospace; }
+"""
+
+# Form controls show text without a text node (value, placeholder, options)
+FORM_TEXT_TAGS = {'input', 'textarea', 'select', 'button', 'option'}
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'param', 'source', 'track', 'wbr'}
+SKIP_TEXT_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'title', 'head'}
+
+# --- CSS --------------------------------------------------------------------
+
+class Rule:
+    """One selector from a style rule, with the font declarations it sets"""
+    __slots__ = ('compounds', 'specificity', 'order', 'decls', 'pseudo_element')
+
+    def __init__(self, compounds, specificity, order, decls, pseudo_element):
+        self.compounds = compounds
+        self.specificity = specificity
+        self.order = order
+        self.decls = decls
+        self.pseudo_element = pseudo_element
+
+FONT_PROPS = ('font-family', 'font-weight', 'font-style')
+COMPONENT = re.compile(r'(\*|[a-zA-Z][\w-]*)|\.((?:[\w-]|\\.)+)|#((?:[\w-]|\\.)+)|'
+                       r'\[([^\]]*)\]|(::?)([\w-]+)(\((?:[^()]|\([^()]*\))*\))?')
+COMBINATOR = re.compile(r'\s*([>+~])\s*|\s+')
+
+def parse_declarations(text):
+    """Font-related declarations as {prop: (value, important)}"""
+    decls = {}
+    for part in text.split(';'):
+        if ':' not in part:
+            continue
+        prop, value = part.split(':', 1)
+        prop = prop.strip().lower()
+        value = value.strip()
+        important = value.lower().endswith('!important')
+        if important:
+            value = value[:-len('!important')].strip()
+        if prop in FONT_PROPS or prop == 'content':
+            decls[prop] = (value, important)
+        elif prop == 'font':
+            for sub, sub_value in parse_font_shorthand(value).items():
+                decls[sub] = (sub_value, important)
+    return decls
+
+def parse_font_shorthand(value):
+    """Split `font: italic 600 1rem/1.2 Montserrat, sans-serif` into longhands"""
+    if value in ('inherit', 'initial', 'unset'):
+        return {prop: value for prop in FONT_PROPS}
+    match = re.match(r'(.*?)(?:^|\s)([\d.]+[a-z%]*|[a-z-]+-size|medium|small|large|x+-?\w+)(?:/\S+)?\s+(.+)$', value)
+    if not match:
+        return {}
+    longhands = {'font-family': match.group(3), 'font-weight': 'normal', 'font-style': 'normal'}
+    for token in match.group(1).split():
+        if token in ('italic', 'oblique'):
+            longhands['font-style'] = token
+        elif token in ('bold', 'bolder', 'lighter') or token.isdigit():
+            longhands['font-weight'] = token
+    return longhands
+
+def split_selectors(text):
+    """Split a selector list on top-level commas"""
+    parts, depth, current = [], 0, ''
+    for char in text:
+        if char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        depth += char == '('
+        depth -= char == ')'
+        current += char
+    parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+def parse_selector(selector):
+    """Selector -> (compounds, specificity, pseudo_element) or None if unsupported.
+
+    compounds is a list of (combinator, tag, ids, classes, attrs), rightmost last;
+    combinator says how it relates to the compound on its left.
+    """
+    compounds = []
+    spec = [0, 0, 0]
+    pseudo_element = None
+    pos = 0
+    combinator = ' '
+    while pos < len(selector):
+        tag, ids, classes, attrs = None, [], [], []
+        start = pos
+        while pos < len(selector):
+            match = COMPONENT.match(selector, pos)
+            if not match:
+                break
+            pos = match.end()
+            if match.group(1):
+                tag = match.group(1).lower()
+                if tag != '*':
+                    spec[2] += 1
+            elif match.group(2):
+                classes.append(match.group(2).replace('\\', ''))
+                spec[1] += 1
+            elif match.group(3):
+                ids.append(match.group(3).replace('\\', ''))
+                spec[0] += 1
+            elif match.group(4) is not None:
+                attrs.append(match.group(4))
+                spec[1] += 1
+            elif match.group(5) == '::' or match.group(6) in ('before', 'after', 'first-line', 'first-letter'):
+                pseudo_element = match.group(6)
+                spec[2] += 1
+            else:
+                # :hover, :focus, :nth-child(), :not(...) ... assumed to apply
+                if match.group(6) == 'root':
+                    tag = 'html'
+                spec[1] += 1
+        if pos == start:
+            return None
+        compounds.append((combinator, tag, ids, classes, attrs))
+        match = COMBINATOR.match(selector, pos)
+        if match and match.end() > pos:
+            combinator = match.group(1) or ' '
+            pos = match.end()
+    return compounds, tuple(spec), pseudo_element
+
+def iter_blocks(css):
+    """Yield (prelude, body) for each top-level block of a stylesheet"""
+    pos = 0
+    while True:
+        brace = css.find('{', pos)
+        if brace == -1:
+            return
+        prelude = css[pos:brace]
+        if ';' in prelude:
+            prelude = prelude.rsplit(';', 1)[1]  # skip @import/@charset statements
+        depth, end = 1, brace + 1
+        while depth:
+            next_open = css.find('{', end)
+            next_close = css.find('}', end)
+            if next_close == -1:
+                end = len(css) + 1  # unterminated block runs to the end
+                break
+            if next_open != -1 and next_open < next_close:
+                depth += 1
+                end = next_open + 1
+            else:
+                depth -= 1
+                end = next_close + 1
+        yield prelude.strip(), css[brace + 1:end - 1]
+        pos = end
+
+def parse_stylesheet(css, rules, font_faces, source):
+    """Append the font-relevant rules and @font-face blocks of a stylesheet"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    for prelude, body in iter_blocks(css):
+        lowered = prelude.lower()
+        if lowered.startswith(('@media', '@supports', '@document')):
+            parse_stylesheet(body, rules, font_faces, source)
+        elif lowered.startswith('@font-face'):
+            font_faces.append((source, body))
+        elif lowered.startswith('@'):
+            continue  # @keyframes, @page, ...
+        else:
+            decls = parse_declarations(body)
+            if not decls:
+                continue
+            for selector in split_selectors(prelude):
+                parsed = parse_selector(selector)
+                if parsed:
+                    rules.append(Rule(parsed[0], parsed[1], len(rules), decls, parsed[2]))
+
+def rule_key(compound):
+    """Index key for the rightmost compound: a class, id, tag or '*'"""
+    _, tag, ids, classes, _ = compound
+    for cls in classes:
+        if not cls.startswith('w--'):
+            return '.' + cls
+    if ids:
+        return '#' + ids[0]
+    return tag if tag and tag != '*' else '*'
+
+# --- HTML -------------------------------------------------------------------
+
+class Element:
+    __slots__ = ('tag', 'id', 'classes', 'attrs', 'parent', 'children', 'has_text', 'style')
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.id = self.attrs.get('id')
+        self.classes = set((self.attrs.get('class') or '').split())
+        self.parent = parent
+        self.children = []
+        self.has_text = tag in FORM_TEXT_TAGS
+        self.style = parse_declarations(self.attrs.get('style') or '')
+
+class TreeBuilder(HTMLParser):
+    """Loose DOM: enough structure for descendant/child/sibling matching"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element('#document', [], None)
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        parent = self.stack[-1]
+        element = Element(tag, attrs, parent)
+        parent.children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        element = Element(tag, attrs, self.stack[-1])
+        self.stack[-1].children.append(element)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        if data.strip() and not any(e.tag in SKIP_TEXT_TAGS for e in self.stack[-2:]):
+            self.stack[-1].has_text = True
+
+def compound_matches(element, compound):
+    _, tag, ids, classes, attrs = compound
+    if tag and tag != '*' and element.tag != tag:
+        return False
+    if ids and element.id not in ids:
+        return False
+    for cls in classes:
+        if cls not in element.classes and not cls.startswith('w--'):
+            return False
+    for attr in attrs:
+        match = ATTR_SELECTOR.match(attr)
+        if not match or match.group(1) not in element.attrs:
+            return False
+        operator, value = match.group(2), (match.group(3) or '').strip('"\'')
+        actual = element.attrs[match.group(1)] or ''
+        if operator and not ATTR_OPERATORS[operator](actual, value):
+            return False
+    return True
+
+ATTR_SELECTOR = re.compile(r'\s*([\w-]+)\s*(?:([~|^$*]?=)\s*(.*?)(?:\s+[iIsS])?)?\s*$')
+ATTR_OPERATORS = {
+    '=': lambda actual, value: actual == value,
+    '~=': lambda actual, value: value in actual.split(),
+    '|=': lambda actual, value: actual == value or actual.startswith(value + '-'),
+    '^=': lambda actual, value: actual.startswith(value),
+    '$=': lambda actual, value: actual.endswith(value),
+    '*=': lambda actual, value: value in actual,
+}
+
+def matches(element, compounds, index):
+    """Right-to-left match of compounds[:index + 1] ending at element"""
+    if not compound_matches(element, compounds[index]):
+        return False
+    if index == 0:
+        return True
+    combinator = compounds[index][0]
+    if combinator == '>':
+        return element.parent is not None and matches(element.parent, compounds, index - 1)
+    if combinator in '+~':
+        siblings = element.parent.children if element.parent else []
+        earlier = siblings[:siblings.index(element)]
+        if combinator == '+':
+            earlier = earlier[-1:]
+        return any(matches(s, compounds, index - 1) for s in earlier)
+    ancestor = element.parent
+    while ancestor is not None:
+        if matches(ancestor, compounds, index - 1):
+            return True
+        ancestor = ancestor.parent
+    return False
+
+# --- Cascade ----------------------------------------------------------------
+
+def resolve_weight(value, inherited):
+    value = value.strip().lower()
+    if value == 'normal':
+        return 400
+    if value == 'bold':
+        return 700
+    if value == 'bolder':
+        return 400 if inherited < 350 else 700 if inherited < 550 else 900
+    if value == 'lighter':
+        return 100 if inherited < 550 else 400 if inherited < 750 else 700
+    if value.isdigit():
+        return int(value)
+    return inherited
+
+def resolve_style(value, inherited):
+    value = value.strip().lower()
+    if value in ('italic', 'oblique') or value.startswith('oblique'):
+        return 'italic'
+    if value == 'normal':
+        return 'normal'
+    return inherited
+
+def primary_family(value):
+    """First family in a font-family list"""
+    first = value.split(',')[0].strip().strip('"\'')
+    return first
+
+def cascade(decl_sets, parent_font):
+    """Apply matched declarations (list of (important, specificity, order, decls)) over the parent font"""
+    family, weight, style = parent_font
+    winners = {}
+    for important, specificity, order, decls in sorted(decl_sets, key=lambda d: (d[0], d[1], d[2])):
+        for prop in FONT_PROPS + ('content',):
+            if prop in decls:
+                value, prop_important = decls[prop]
+                if prop_important == important:
+                    winners[prop] = value
+    for prop, value in winners.items():
+        if value in ('inherit', 'unset'):
+            continue
+        if value == 'initial':
+            value = {'font-family': 'serif', 'font-weight': 'normal', 'font-style': 'normal'}.get(prop, value)
+        if prop == 'font-family':
+            family = primary_family(value)
+        elif prop == 'font-weight':
+            weight = resolve_weight(value, weight)
+        elif prop == 'font-style':
+            style = resolve_style(value, style)
+    return (family, weight, style), winners.get('content')
+
+class FontAnalyzer:
+    """Collects (family, weight, style) requests across pages"""
+
+    def __init__(self, css_texts):
+        self.rules = []
+        self.font_faces = []
+        parse_stylesheet(UA_STYLESHEET, self.rules, [], 'ua')
+        ua_count = len(self.rules)
+        for source, css in css_texts:
+            parse_stylesheet(css, self.rules, self.font_faces, source)
+        self.index = {}
+        for i, rule in enumerate(self.rules):
+            if i < ua_count:
+                rule.specificity = (-1, 0, 0)  # user-agent origin loses to any author rule
+            self.index.setdefault(rule_key(rule.compounds[-1]), []).append(rule)
+        self.usage = {}
+
+    def candidate_rules(self, element):
+        keys = ['*', element.tag] + ['.' + c for c in element.classes]
+        if element.id:
+            keys.append('#' + element.id)
+        for key in keys:
+            yield from self.index.get(key, ())
+
+    def analyze_html(self, html):
+        builder = TreeBuilder()
+        builder.feed(html)
+        self.walk(builder.root, ('serif', 400, 'normal'))
+
+    def walk(self, element, parent_font):
+        for child in element.children:
+            if child.tag in SKIP_TEXT_TAGS - {'head'}:
+                continue
+            normal, pseudo = [], {}
+            for rule in self.candidate_rules(child):
+                if matches(child, rule.compounds, len(rule.compounds) - 1):
+                    for important in (False, True):
+                        entry = (important, rule.specificity, rule.order, rule.decls)
+                        if rule.pseudo_element:
+                            pseudo.setdefault(rule.pseudo_element, []).append(entry)
+                        else:
+                            normal.append(entry)
+            if child.style:
+                normal += [(False, (1, 0, 0, 0), 0, child.style), (True, (1, 0, 0, 0), 0, child.style)]
+            font, _ = cascade(normal, parent_font)
+            if child.has_text:
+                self.record(font)
+            for entries in pseudo.values():
+                pseudo_font, content = cascade(entries, font)
+                if content and content.strip() not in ('none', 'normal', '""', "''"):
+                    self.record(pseudo_font)
+            self.walk(child, font)
+
+    def record(self, font):
+        self.usage[font] = self.usage.get(font, 0) + 1
+
+# --- Face selection ---------------------------------------------------------
+
+def closest_weight(wanted, available):
+    """CSS font matching: which available weight the browser uses for `wanted`"""
+    if not available:
+        return None
+    if wanted in available:
+        return wanted
+    lighter = sorted((w for w in available if w < wanted), reverse=True)
+    heavier = sorted(w for w in available if w > wanted)
+    if 400 <= wanted <= 500:
+        up_to_500 = [w for w in heavier if w <= 500]
+        return (up_to_500 + lighter + [w for w in heavier if w > 500])[0]
+    if wanted < 400:
+        return (lighter + heavier)[0]
+    return (heavier + lighter)[0]
+
+def parse_google_families(families):
+    """["Montserrat:100,100italic", ...] -> {family: {(weight, style)}}"""
+    faces = {}
+    for entry in families:
+        entry = entry.split('&', 1)[0]
+        name, _, variants = entry.partition(':')
+        faces[name] = set()
+        for variant in (variants or '400').split(','):
+            variant = variant.split(':')[0]
+            style = 'italic' if variant.endswith('italic') else 'normal'
+            weight = variant.replace('italic', '') or '400'
+            weight = {'regular': '400', 'bold': '700'}.get(weight, weight)
+            faces[name].add((int(weight), style))
+    return faces
+
+def faces_in_use(usage, available):
+    """Map requested fonts onto available faces: {family: {(weight, style): uses}}"""
+    used = {}
+    for (family, weight, style), count in usage.items():
+        faces = available.get(family)
+        if not faces:
+            continue
+        same_style = {w for w, s in faces if s == style} or {w for w, s in faces}
+        matched_style = style if any(s == style for _, s in faces) else next(iter(faces))[1]
+        face = (closest_weight(weight, same_style), matched_style)
+        used.setdefault(family, {})
+        used[family][face] = used[family].get(face, 0) + count
+    return used
+
+def format_google_families(used, display=None):
+    """{family: {(weight, style)}} -> WebFont families list"""
+    families = []
+    for family in sorted(used):
+        variants = sorted(used[family], key=lambda f: (f[0], f[1] == 'italic'))
+        families.append(family + ':' + ','.join(f"{w}{'italic' if s == 'italic' else ''}" for w, s in variants))
+    if families and display:
+        families[-1] += '&display=' + display  # webfontloader passes this through to the CSS API URL
+    return families
+
+STYLESHEET_LINK = re.compile(r'<link href="([^"]*\.css)" rel="stylesheet"')
+WEBFONT_CALL = re.compile(r'(WebFont\.load\(\{\s*google:\s*\{\s*families:\s*)(\[[^\]]*\])')
+
+# --- Self-hosted @font-face -------------------------------------------------
+
+def face_descriptor(body):
+    decls = {}
+    for part in body.split(';'):
+        if ':' in part:
+            prop, value = part.split(':', 1)
+            decls[prop.strip().lower()] = value.strip()
+    family = primary_family(decls.get('font-family', ''))
+    weight = resolve_weight(decls.get('font-weight', 'normal').split()[0], 400)
+    style = resolve_style(decls.get('font-style', 'normal'), 'normal')
+    return family, weight, style, decls
+
+def rewrite_font_faces(css, used):
+    """Drop unused @font-face rules for analyzed families and add font-display: swap"""
+    def replace(match):
+        body = match.group(1)
+        family, weight, style, decls = face_descriptor(body)
+        if family in ICON_FONTS or family not in used:
+            return match.group(0)
+        if (weight, style) not in used[family]:
+            return ''
+        if 'font-display' not in decls:
+            body = body.rstrip().rstrip(';') + ';\n  font-display: swap;\n'
+        return '@font-face {' + body + '}' + match.group(2)
+    return re.sub(r'@font-face\s*\{([^}]*)\}(\n?)', replace, css)
+
+def face_src(body):
+    """First woff2 (else first) url() in an @font-face src"""
+    urls = re.findall(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)', body)
+    woff2 = [u for u in urls if u.split('?')[0].endswith('.woff2')]
+    return (woff2 or urls or [None])[0]
+
+# --- Pages ------------------------------------------------------------------
+
+def site_pages(site_dir):
+    """HTML pages at the site root and in products/ and recipes/"""
+    pages = []
+    for folder in ['', 'products', 'recipes']:
+        path = os.path.join(site_dir, folder)
+        if os.path.isdir(path):
+            pages += sorted(os.path.join(folder, f) for f in os.listdir(path) if f.endswith('.html'))
+    return pages
+
+def set_preload(html, tag):
+    """Insert or replace our preload hint right before the first stylesheet link"""
+    html = re.sub(r'\s*<link [^>]*' + PRELOAD_MARKER + r'[^>]*>', '', html)
+    if not tag:
+        return html
+    anchor = re.search(r'\n(\s*)<link href="[^"]*\.css" rel="stylesheet"', html)
+    if not anchor:
+        return html
+    return html[:anchor.start()] + '\n' + anchor.group(1) + tag + html[anchor.start():]
+
+def main():
+    """Analyze, rewrite and report
+
+    Usage: font_usage.py [--site DIR] [--report]
+    --report prints the analysis without changing any file.
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    report_only = '--report' in sys.argv
+
+    pages = {}
+    for page in site_pages(site_dir):
+        with open(os.path.join(site_dir, page), 'r', encoding='utf-8') as f:
+            pages[page] = f.read()
+
+    # Stylesheets in the order the pages link them (the cascade depends on it)
+    css_files = []
+    for html in pages.values():
+        for href in STYLESHEET_LINK.findall(html):
+            name = os.path.basename(href)
+            if name not in css_files and os.path.exists(os.path.join(site_dir, CSS_DIR, name)):
+                css_files.append(name)
+    css_files += sorted(f for f in os.listdir(os.path.join(site_dir, CSS_DIR))
+                        if f.endswith('.css') and f not in css_files)
+    css_texts = []
+    for name in css_files:
+        with open(os.path.join(site_dir, CSS_DIR, name), 'r', encoding='utf-8') as f:
+            css_texts.append((name, f.read()))
+    analyzer = FontAnalyzer(css_texts)
+
+    # Google faces on offer: the saved export list plus whatever pages ask for
+    # (a fresh Webflow export brings the full list back)
+    families_path = os.path.join(site_dir, FAMILIES_FILE)
+    google = {}
+    if os.path.exists(families_path):
+        with open(families_path, 'r', encoding='utf-8') as f:
+            google = parse_google_families(json.load(f))
+    requested = {}
+    for page in pages:
+        analyzer.analyze_html(pages[page])
+        call = WEBFONT_CALL.search(pages[page])
+        if call:
+            for family, faces in parse_google_families(json.loads(call.group(2))).items():
+                requested.setdefault(family, set()).update(faces)
+                google.setdefault(family, set()).update(faces)
+
+    # Self-hosted faces declared in our CSS
+    hosted = {}
+    hosted_src = {}
+    for source, body in analyzer.font_faces:
+        family, weight, style, _ = face_descriptor(body)
+        if family in ICON_FONTS:
+            continue
+        hosted.setdefault(family, set()).add((weight, style))
+        hosted_src[(family, weight, style)] = (source, face_src(body))
+
+    used_google = faces_in_use(analyzer.usage, google)
+    used_hosted = faces_in_use(analyzer.usage, hosted)
+
+    print(f"🔤 Analyzed {len(pages)} page(s), {len(analyzer.rules)} CSS selectors")
+    for family in sorted(set(google) | set(hosted)):
+        available = google.get(family) or hosted.get(family)
+        kept = (used_google.get(family) or used_hosted.get(family) or {})
+        variants = ', '.join(f"{w}{' italic' if s == 'italic' else ''} ({n})"
+                             for (w, s), n in sorted(kept.items())) or 'unused'
+        print(f"   - {family}: {len(kept)}/{len(available)} faces kept: {variants}")
+
+    before_faces = sum(len(f) for f in requested.values()) + sum(len(f) for f in hosted.values())
+    after_faces = sum(len(f) for f in used_google.values()) + sum(len(f) for f in used_hosted.values())
+    hosted_bytes = {}
+    for (family, weight, style), (source, src) in hosted_src.items():
+        path = os.path.normpath(os.path.join(site_dir, CSS_DIR, src)) if src else None
+        hosted_bytes[(family, weight, style)] = os.path.getsize(path) if path and os.path.exists(path) else ESTIMATED_FACE_BYTES
+    before_bytes = sum(len(f) for f in requested.values()) * ESTIMATED_FACE_BYTES + sum(hosted_bytes.values())
+    after_bytes = (sum(len(f) for f in used_google.values()) * ESTIMATED_FACE_BYTES
+                   + sum(hosted_bytes[(fam, w, s)] for fam, faces in used_hosted.items() for (w, s) in faces))
+
+    # Primary text face: the most used face overall
+    primary = None
+    for family, faces in list(used_google.items()) + list(used_hosted.items()):
+        for face, count in faces.items():
+            if primary is None or count > primary[2]:
+                primary = (family, face, count)
+
+    families = format_google_families(used_google, display='swap')
+    preload = None
+    if primary and primary[0] in used_hosted:
+        source, src = hosted_src[(primary[0],) + primary[1]]
+        if src and src.split('?')[0].endswith('.woff2'):
+            href = os.path.normpath(os.path.join(CSS_DIR, src)).replace(os.sep, '/')
+            preload = (f'<link rel="preload" href="{{prefix}}{href}" as="font" '
+                       f'type="font/woff2" crossorigin="anonymous" {PRELOAD_MARKER}>')
+    if primary:
+        print(f"   Primary text face: {primary[0]} {primary[1][0]}{' italic' if primary[1][1] == 'italic' else ''}")
+
+    print(f"\n📉 Font faces requested per page: {before_faces} -> {after_faces}")
+    print(f"   Font bytes per cold page load: ~{before_bytes:,} -> ~{after_bytes:,}"
+          + (" (Google faces estimated at ~22 KB each)" if google else ""))
+
+    if report_only:
+        print("   (report only, nothing written)")
+        return
+
+    if google:
+        with open(families_path, 'w', encoding='utf-8') as f:
+            json.dump(format_google_families(google), f, indent=2)
+            f.write('\n')
+    changed = 0
+    for page, html in pages.items():
+        updated = html
+        if families:
+            updated = WEBFONT_CALL.sub(lambda m: m.group(1) + json.dumps(families, separators=(',', ':')), updated)
+        prefix = '../' * page.count('/')
+        updated = set_preload(updated, preload.replace('{prefix}', prefix) if preload else None)
+        if updated != html:
+            with open(os.path.join(site_dir, page), 'w', encoding='utf-8') as f:
+                f.write(updated)
+            changed += 1
+    if used_hosted:
+        for name, css in css_texts:
+            updated = rewrite_font_faces(css, {f: set(faces) for f, faces in used_hosted.items()})
+            if updated != css:
+                with open(os.path.join(site_dir, CSS_DIR, name), 'w', encoding='utf-8') as f:
+                    f.write(updated)
+    print(f"✅ Updated {changed} page(s)")
+
+if __name__ == '__main__':
+    main()
@@ -5,32 +5,64 @@ This recreates the Webflow CMS functionality after export.
 """
 
 import csv
+import heapq
+import itertools
 import os
 import re
+import sys
+import tempfile
+import time
 from html import escape
 from collections import defaultdict
 
+import airtable_schema
+import build_cache
+import catalog_db
+import cross_reference
+import price_overlay
+import variant_matrix
+
 # Paths
-# Check if Airtable exports exist (from sync), otherwise use original CSVs
+# Prefer the local SQLite catalog (from sync), then Airtable CSV exports, then original CSVs
 import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+USE_CATALOG = catalog_db.catalog_exists()
+
+if USE_CATALOG:
+    print("🗄️  Using local catalog")
 
 if os.path.exists(os.path.join(AIRTABLE_EXPORTS, "products.csv")):
     # Use Airtable exports if available
     PRODUCTS_CSV = os.path.join(AIRTABLE_EXPORTS, "products.csv")
     RECIPES_CSV = os.path.join(AIRTABLE_EXPORTS, "recipes.csv")
     INGREDIENTS_CSV = "/Users/elombe.kisala/Downloads/Outlaw Spice 2025 - Ingredients.csv"  # Still from original
-    print("📡 Using Airtable exports")
+    if not USE_CATALOG:
+        print("📡 Using Airtable exports")
 else:
     # Fall back to original CSVs
     PRODUCTS_CSV = "/Users/elombe.kisala/Downloads/Outlaw Spice 2025 - Products.csv"
     RECIPES_CSV = "/Users/elombe.kisala/Downloads/Outlaw Spice 2025 - Recipes (1).csv"
     INGREDIENTS_CSV = "/Users/elombe.kisala/Downloads/Outlaw Spice 2025 - Ingredients.csv"
     print("📁 Using original CSV files")
-TEMPLATE_DIR = "/Users/elombe.kisala/Library/Mobile Documents/com~apple~CloudDocs/Work - Core Home/CORE HOME/Brands : Projects/SPICES/Outlaw Spice/outlaw-spice-website"
+TEMPLATE_DIR = BASE_DIR
 OUTPUT_DIR = TEMPLATE_DIR
 
+# Price and stock come from prices.json at runtime instead of the HTML (see price_overlay.py)
+PRICE_OVERLAY = price_overlay.enabled()
+
+# Product fields the cross-reference needs when streaming (name and card image)
+CARD_FIELDS = ['Product Name', 'Transparent Product Image', 'Main Variant Image']
+
+# Detail templates with asset paths fixed up, by (template, prefix); read once
+# per process and shared by every page (and locale) rendered in it. Re-read
+# when the file's mtime changes, for long-running callers like rebuild_daemon.py
+_templates = {}
+
+# Variant rows sorted in memory per run when streaming an export that isn't
+# grouped by handle; bigger exports spill sorted runs to disk and merge them
+STREAM_RUN_ROWS = 50000
+
 def slugify(text):
     """Convert text to URL-friendly slug"""
     text = text.lower().strip()
@@ -57,8 +89,59 @@ def strip_html_tags(html_text):
     clean = re.sub('<.*?>', '', html_text)
     return clean.replace('&nbsp;', ' ').strip()
 
-def load_products():
-    """Load and group products by Product Handle"""
+def merge_variants(variants):
+    """Merge a product's variant rows into one main product dict"""
+    main = variants[0].copy()
+    main['variants'] = variants
+    
+    # Look through all variants to find best images and content
+    # Priority: Transparent Product Image > Main Product Image > Main Variant Image (.avif)
+    for variant in variants:
+        # Check for Transparent Product Image first
+        transparent_img = variant.get('Transparent Product Image', '').strip()
+        if transparent_img and transparent_img.lower().endswith('.avif'):
+            main['Transparent Product Image'] = transparent_img
+            break
+    
+    # If no transparent image, look for Main Variant Image
+    if not main.get('Transparent Product Image'):
+        for variant in variants:
+            image = variant.get('Main Variant Image', '').strip()
+            if image and image.lower().endswith('.avif'):
+                main['Main Variant Image'] = image
+                break
+    
+    # Also collect other image and content fields from first variant with data
+    for variant in variants:
+        if not main.get('Main Product Image') and variant.get('Main Product Image'):
+            main['Main Product Image'] = variant.get('Main Product Image')
+        if not main.get('More Images 1') and variant.get('More Images 1'):
+            main['More Images 1'] = variant.get('More Images 1')
+        if not main.get('More Images 2') and variant.get('More Images 2'):
+            main['More Images 2'] = variant.get('More Images 2')
+        if not main.get('More Images 3') and variant.get('More Images 3'):
+            main['More Images 3'] = variant.get('More Images 3')
+        if not main.get('Product Description') and variant.get('Product Description'):
+            main['Product Description'] = variant.get('Product Description')
+        if not main.get('Product Ingredients') and variant.get('Product Ingredients'):
+            main['Product Ingredients'] = variant.get('Product Ingredients')
+    
+    return main
+
+def load_products(since=None):
+    """Load and group products by Product Handle
+    
+    With the local catalog, `since` limits the result to products whose
+    variants changed after that timestamp.
+    """
+    if USE_CATALOG:
+        conn = catalog_db.connect()
+        try:
+            grouped = catalog_db.grouped_variants(conn, since)
+        finally:
+            conn.close()
+        return {handle: merge_variants(variants) for handle, variants in grouped.items()}
+    
     products = defaultdict(list)
     
     with open(PRODUCTS_CSV, 'r', encoding='utf-8') as f:
@@ -70,49 +153,109 @@ def load_products():
     
     # Convert to regular dict with first variant as main product
     # BUT search all variants for the best image (.avif preferred)
-    result = {}
-    for handle, variants in products.items():
-        main = variants[0].copy()
-        main['variants'] = variants
-        
-        # Look through all variants to find best images and content
-        # Priority: Transparent Product Image > Main Product Image > Main Variant Image (.avif)
-        for variant in variants:
-            # Check for Transparent Product Image first
-            transparent_img = variant.get('Transparent Product Image', '').strip()
-            if transparent_img and transparent_img.lower().endswith('.avif'):
-                main['Transparent Product Image'] = transparent_img
-                break
-        
-        # If no transparent image, look for Main Variant Image
-        if not main.get('Transparent Product Image'):
-            for variant in variants:
-                image = variant.get('Main Variant Image', '').strip()
-                if image and image.lower().endswith('.avif'):
-                    main['Main Variant Image'] = image
-                    break
-        
-        # Also collect other image and content fields from first variant with data
-        for variant in variants:
-            if not main.get('Main Product Image') and variant.get('Main Product Image'):
-                main['Main Product Image'] = variant.get('Main Product Image')
-            if not main.get('More Images 1') and variant.get('More Images 1'):
-                main['More Images 1'] = variant.get('More Images 1')
-            if not main.get('More Images 2') and variant.get('More Images 2'):
-                main['More Images 2'] = variant.get('More Images 2')
-            if not main.get('More Images 3') and variant.get('More Images 3'):
-                main['More Images 3'] = variant.get('More Images 3')
-            if not main.get('Product Description') and variant.get('Product Description'):
-                main['Product Description'] = variant.get('Product Description')
-            if not main.get('Product Ingredients') and variant.get('Product Ingredients'):
-                main['Product Ingredients'] = variant.get('Product Ingredients')
-        
-        result[handle] = main
-    
-    return result
+    return {handle: merge_variants(variants) for handle, variants in products.items()}
+
+def product_rows(path):
+    """(handle, row) for every variant row that has a handle, in file order"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f, restval=''):
+            handle = row.get('Product Handle', '').strip()
+            if handle:
+                yield handle, row
+
+def rows_grouped(path):
+    """True if each handle's rows are contiguous in the export (one streaming pass)"""
+    seen = set()
+    current = None
+    for handle, _ in product_rows(path):
+        if handle != current:
+            if handle in seen:
+                return False
+            seen.add(handle)
+            current = handle
+    return True
+
+def sorted_runs(path, run_rows, tmp_dir):
+    """Sort the rows by (handle, file position) in runs of `run_rows`
+
+    Returns (fieldnames, runs): a single run stays in memory as a list, more
+    than one are written to tmp_dir as CSV files.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        fieldnames = csv.DictReader(f).fieldnames or []
+    rows = enumerate(product_rows(path))
+    runs = []
+    while True:
+        run = sorted(((handle, seq, row) for seq, (handle, row) in itertools.islice(rows, run_rows)),
+                     key=lambda item: (item[0], item[1]))
+        if not run:
+            break
+        runs.append(run)
+        if len(runs) > 1:
+            for i, pending in enumerate(runs):
+                if isinstance(pending, list):
+                    runs[i] = spill_run(pending, fieldnames, tmp_dir, i)
+    return fieldnames, runs
+
+def spill_run(run, fieldnames, tmp_dir, number):
+    """Write a sorted run to disk; returns its path"""
+    run_path = os.path.join(tmp_dir, f'run-{number:05d}.csv')
+    with open(run_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for handle, seq, row in run:
+            writer.writerow([handle, seq] + [row.get(name, '') for name in fieldnames])
+    return run_path
+
+def read_run(run, fieldnames):
+    """Iterate a run as (handle, seq, row), from memory or from its file"""
+    if isinstance(run, list):
+        yield from run
+        return
+    with open(run, 'r', encoding='utf-8', newline='') as f:
+        for record in csv.reader(f):
+            yield record[0], int(record[1]), dict(zip(fieldnames, record[2:]))
+
+def iter_products(since=None, path=None, run_rows=STREAM_RUN_ROWS):
+    """Yield (handle, merged product) one product at a time
+
+    The streaming counterpart of load_products for very large variant
+    exports: only one product's variants (plus, for an ungrouped CSV, one
+    sorted run) are in memory at a time. Merging is the same merge_variants,
+    applied to each product's rows in their original order.
+
+    The catalog and CSVs already grouped by handle stream in their own order;
+    other CSVs are sorted externally and come out in handle order.
+    """
+    if USE_CATALOG and path is None:
+        conn = catalog_db.connect()
+        try:
+            for handle, variants in catalog_db.iter_grouped_variants(conn, since):
+                yield handle, merge_variants(variants)
+        finally:
+            conn.close()
+        return
+    
+    path = path or PRODUCTS_CSV
+    if rows_grouped(path):
+        for handle, rows in itertools.groupby(product_rows(path), key=lambda item: item[0]):
+            yield handle, merge_variants([row for _, row in rows])
+        return
+    
+    with tempfile.TemporaryDirectory(prefix='product-runs-') as tmp_dir:
+        fieldnames, runs = sorted_runs(path, run_rows, tmp_dir)
+        merged = heapq.merge(*[read_run(run, fieldnames) for run in runs], key=lambda item: (item[0], item[1]))
+        for handle, rows in itertools.groupby(merged, key=lambda item: item[0]):
+            yield handle, merge_variants([row for _, _, row in rows])
 
 def load_recipes():
-    """Load recipes from CSV"""
+    """Load recipes from the catalog or CSV"""
+    if USE_CATALOG:
+        conn = catalog_db.connect()
+        try:
+            return catalog_db.load_recipes(conn)
+        finally:
+            conn.close()
+    
     recipes = []
     with open(RECIPES_CSV, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
@@ -122,8 +265,18 @@ def load_recipes():
     return recipes
 
 def load_ingredients():
-    """Load ingredients from CSV"""
+    """Load ingredients from the catalog or CSV"""
+    if USE_CATALOG:
+        conn = catalog_db.connect()
+        try:
+            return catalog_db.load_ingredients(conn)
+        finally:
+            conn.close()
+    
     ingredients = {}
+    if not os.path.exists(INGREDIENTS_CSV):
+        print(f"⚠️  Ingredients CSV not found: {INGREDIENTS_CSV}")
+        return ingredients
     with open(INGREDIENTS_CSV, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
@@ -132,13 +285,49 @@ def load_ingredients():
                 ingredients[name] = row
     return ingredients
 
-def create_product_page(handle, product, output_dir):
-    """Generate a product detail page"""
+def page_template(name, prefix='../'):
+    """A detail template with its root-relative asset paths pointed at `prefix`"""
+    key = (name, prefix)
+    path = os.path.join(TEMPLATE_DIR, name)
+    mtime = os.path.getmtime(path)
+    if key not in _templates or _templates[key][0] != mtime:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        html = html.replace('href="css/', f'href="{prefix}css/')
+        html = html.replace('src="js/', f'src="{prefix}js/')
+        html = html.replace('href="images/', f'href="{prefix}images/')
+        html = html.replace('src="images/', f'src="{prefix}images/')
+        html = html.replace('href="index.html"', f'href="{prefix}index.html"')
+        _templates[key] = (mtime, html, build_cache.key(html))
+    return _templates[key][1]
+
+def cached_page(kind, output_file, *inputs):
+    """Restore a page from the build cache; returns its cache key, or None on a hit"""
+    digest = build_cache.key(kind, *inputs, build_cache.source_hash(sys.modules[__name__], variant_matrix,
+                                                                    price_overlay))
+    html = build_cache.get('pages', digest)
+    if html is None:
+        return digest
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'wb') as f:
+        f.write(html)
+    return None
+
+def create_product_page(handle, product, output_dir, used_in='', prefix='../'):
+    """Generate a product detail page
+    
+    `used_in` is the rendered "used in these recipes" block from cross_reference.
+    `prefix` leads from the page back to the site root ('../../' for a locale).
+    """
     
-    # Read the template
-    template_path = os.path.join(TEMPLATE_DIR, 'detail_product.html')
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template = f.read()
+    started = time.perf_counter()
+    output_file = os.path.join(output_dir, 'products', f'{handle}.html')
+    template = page_template('detail_product.html', prefix)
+    digest = cached_page('product', output_file, handle, product, used_in, prefix, PRICE_OVERLAY,
+                         _templates[('detail_product.html', prefix)][2])
+    if digest is None:
+        print(f"Restored product page from cache: products/{handle}.html")
+        return f'products/{handle}.html'
     
     # Extract product data
     name = product.get('Product Name', '')
@@ -168,21 +357,13 @@ def create_product_page(handle, product, output_dir):
     # Get all variants
     variants = product.get('variants', [product])
     
-    # Build variant options HTML
-    variants_html = ""
-    option1_values = list(set([v.get('Option1 Value', '') for v in variants if v.get('Option1 Value')]))
-    option2_values = list(set([v.get('Option2 Value', '') for v in variants if v.get('Option2 Value')]))
+    # Option selector for multi-variant products; the variant data itself is
+    # fetched from variants/<handle>.json on first use (see variant_matrix.py)
+    variants_html = variant_matrix.render_selector(handle, variants, prefix)
     
-    # Replace template placeholders
+    # Replace template placeholders (asset paths are already fixed up for products/)
     html = template
     
-    # Fix CSS paths for subdirectory (products are in products/ folder)
-    html = html.replace('href="css/', 'href="../css/')
-    html = html.replace('src="js/', 'src="../js/')
-    html = html.replace('href="images/', 'href="../images/')
-    html = html.replace('src="images/', 'src="../images/')
-    html = html.replace('href="index.html"', 'href="../index.html"')
-    
     # Update title and meta
     html = html.replace('<title>Outlaw Spice 2025</title>', f'<title>{escape(name)} | Outlaw Spice</title>')
     
@@ -222,14 +403,6 @@ def create_product_page(handle, product, output_dir):
                 count=1  # Replace one at a time in order
             )
     
-    # Update price
-    html = re.sub(
-        r'<div[^>]*class="[^"]*text-weight-semibold w-dyn-bind-empty[^"]*"[^>]*></div>',
-        f'<div class="text-weight-semibold">{escape(price)}</div>',
-        html,
-        count=1
-    )
-    
     # Update description (in the accordion section)
     clean_description = strip_html_tags(description) if description else "No description available."
     html = re.sub(
@@ -256,27 +429,74 @@ def create_product_page(handle, product, output_dir):
         count=1
     )
     
+    # Update price in the product header (a placeholder for js/price-overlay.js in overlay mode).
+    # The first empty text-weight-semibold div is the nav cart dropdown, not the product's price.
+    price_attrs = ' data-variant-price=""' if variants_html else ''
+    html = html.replace(
+        '<div class="heading-style-h5-2"></div>',
+        price_overlay.placeholder(handle, 'heading-style-h5-2', price_attrs) if PRICE_OVERLAY
+        else f'<div class="heading-style-h5-2"{price_attrs}>{escape(price)}</div>',
+        1
+    )
+    
+    if variants_html:
+        html = html.replace(
+            '<a href="#" class="button-7 is-add-to-cart-button',
+            f'{variants_html}\n                  <a href="#" class="button-7 is-add-to-cart-button',
+            1
+        )
+        html = html.replace(
+            '</body>',
+            f'<script src="{prefix}{variant_matrix.LOADER_SCRIPT}" type="text/javascript" defer></script>\n</body>',
+            1
+        )
+    
+    if PRICE_OVERLAY:
+        html = html.replace(
+            '<div class="text-align-center">\n                    <div class="text-size-tiny">Free shipping',
+            f'{price_overlay.stock_placeholder(handle)}\n                  '
+            '<div class="text-align-center">\n                    <div class="text-size-tiny">Free shipping',
+            1
+        )
+        html = html.replace('</body>', f'{price_overlay.script_tag(prefix)}\n</body>', 1)
+    
+    # Recipes that mention this product, above the (hidden) related products list
+    if used_in:
+        html = html.replace(
+            '<div class="top-margin-2 _60-pixels hide">',
+            f'<div class="top-margin-2 _60-pixels">\n          {used_in}\n        </div>\n        <div class="top-margin-2 _60-pixels hide">',
+            1
+        )
+    
     # Write output file
-    output_file = os.path.join(output_dir, 'products', f'{handle}.html')
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html)
+    build_cache.put('pages', digest, html.encode('utf-8'), time.perf_counter() - started)
     
     print(f"Created product page: products/{handle}.html")
     return f'products/{handle}.html'
 
-def create_recipe_page(recipe, output_dir):
-    """Generate a recipe detail page"""
+def create_recipe_page(recipe, output_dir, featured='', prefix='../'):
+    """Generate a recipe detail page
     
-    # Read the template
-    template_path = os.path.join(TEMPLATE_DIR, 'detail_recipe.html')
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template = f.read()
+    `featured` is the rendered "featured spices" block from cross_reference.
+    `prefix` leads from the page back to the site root ('../../' for a locale).
+    """
     
-    # Extract recipe data
+    started = time.perf_counter()
     name = recipe.get('Name', '')
-    slug = recipe.get('Slug', slugify(name))
+    slug = cross_reference.recipe_slug(recipe)
+    output_file = os.path.join(output_dir, 'recipes', f'{slug}.html')
+    template = page_template('detail_recipe.html', prefix)
+    digest = cached_page('recipe', output_file, recipe, featured, prefix,
+                         _templates[('detail_recipe.html', prefix)][2])
+    if digest is None:
+        print(f"Restored recipe page from cache: recipes/{slug}.html")
+        return f'recipes/{slug}.html'
+    
+    # Extract recipe data
     history = recipe.get('Recipe History', '')
     ingredients_text = recipe.get('Ingredients', '')
     instructions = recipe.get('Instructions', '')
@@ -289,16 +509,9 @@ def create_recipe_page(recipe, output_dir):
     main_image = recipe.get('Main Image', '')
     video_link = recipe.get('Video Link', '')
     
-    # Replace template placeholders
+    # Replace template placeholders (asset paths are already fixed up for recipes/)
     html = template
     
-    # Fix CSS paths for subdirectory (recipes are in recipes/ folder)
-    html = html.replace('href="css/', 'href="../css/')
-    html = html.replace('src="js/', 'src="../js/')
-    html = html.replace('href="images/', 'href="../images/')
-    html = html.replace('src="images/', 'src="../images/')
-    html = html.replace('href="index.html"', 'href="../index.html"')
-    
     # Update title
     html = html.replace('<title>Outlaw Spice 2025</title>', f'<title>{escape(name)} | Outlaw Spice</title>')
     
@@ -380,31 +593,89 @@ def create_recipe_page(recipe, output_dir):
         flags=re.DOTALL
     )
     
+    # Spices this recipe mentions, in the sidebar above the newsletter signup
+    if featured:
+        html = html.replace(
+            '<div class="newsletter">',
+            f'{featured}\n                  <div class="newsletter">',
+            1
+        )
+    
     # Write output file
-    output_file = os.path.join(output_dir, 'recipes', f'{slug}.html')
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html)
+    build_cache.put('pages', digest, html.encode('utf-8'), time.perf_counter() - started)
     
     print(f"Created recipe page: recipes/{slug}.html")
     return f'recipes/{slug}.html'
 
 def main():
-    """Main execution"""
+    """Main execution
+    
+    Pass --changed to only regenerate product pages whose variants changed in
+    the local catalog since the last build (plus any whose "used in" block
+    changed because a recipe or product name changed).
+    
+    Pass --stream for very large variant exports: products are read with
+    iter_products, one at a time, in two passes (names and card images for
+    the cross-reference, then the pages), so memory stays flat as the
+    export grows.
+    """
+    stream = '--stream' in sys.argv
+    since = None
+    if '--changed' in sys.argv:
+        if not USE_CATALOG:
+            print("⚠️  --changed needs the local catalog; regenerating everything")
+        else:
+            conn = catalog_db.connect()
+            since = catalog_db.last_built(conn, 'product_pages')
+            conn.close()
+    build_started = time.time()
+    
+    # Offline check against the cached Airtable schema before touching any page
+    if not airtable_schema.verify_cached_schema():
+        return
+    
     print("Loading CSV data...")
-    products = load_products()
+    if stream:
+        # Only what the cross-reference needs is kept for every product
+        all_products = {handle: {field: product.get(field, '') for field in CARD_FIELDS}
+                        for handle, product in iter_products()}
+    else:
+        all_products = load_products()
+        products = load_products(since) if since else all_products
     recipes = load_recipes()
     ingredients = load_ingredients()
     
-    print(f"\nFound {len(products)} unique products")
+    # Cross-reference recipes with products/ingredients (incremental, see cross_reference.py)
+    xref = cross_reference.update_index(all_products, recipes, ingredients)
+    if stream:
+        wanted = None
+        if since:
+            wanted = {handle for handle, _ in iter_products(since)} | set(xref['stale_products'])
+        product_items = ((handle, product) for handle, product in iter_products()
+                         if wanted is None or handle in wanted)
+        product_count = len(wanted) if since else len(all_products)
+    else:
+        if since:
+            for handle in xref['stale_products']:
+                products.setdefault(handle, all_products[handle])
+        product_items = products.items()
+        product_count = len(products)
+    stats = xref['stats']
+    print(f"🔗 Cross-reference: {stats['full_scans']} recipe(s) scanned, {stats['partial_scans']} "
+          f"partially rescanned, {stats['reused']} reused")
+    
+    print(f"\nFound {product_count} {'changed' if since else 'unique'} products")
     print(f"Found {len(recipes)} recipes")
     print(f"Found {len(ingredients)} ingredients")
     
     print("\nGenerating product pages...")
     product_pages = []
-    for handle, product in products.items():
-        page_path = create_product_page(handle, product, OUTPUT_DIR)
+    for handle, product in product_items:
+        page_path = create_product_page(handle, product, OUTPUT_DIR, xref['used_in'].get(handle, ''))
         product_pages.append({
             'path': page_path,
             'name': product.get('Product Name', ''),
@@ -417,19 +688,26 @@ def main():
     print("\nGenerating recipe pages...")
     recipe_pages = []
     for recipe in recipes:
-        page_path = create_recipe_page(recipe, OUTPUT_DIR)
+        page_path = create_recipe_page(recipe, OUTPUT_DIR,
+                                       xref['featured'].get(cross_reference.recipe_slug(recipe), ''))
         recipe_pages.append({
             'path': page_path,
             'name': recipe.get('Name', ''),
-            'slug': recipe.get('Slug', ''),
+            'slug': cross_reference.recipe_slug(recipe),
             'image': recipe.get('Thumbnail Image', ''),
             'color': recipe.get('Color', '#000000')
         })
     
+    cross_reference.save_index(xref['index'])
+    if USE_CATALOG:
+        conn = catalog_db.connect()
+        catalog_db.mark_built(conn, 'product_pages', build_started)
+        conn.close()
+    
     print(f"\n✅ Generated {len(product_pages)} product pages")
     print(f"✅ Generated {len(recipe_pages)} recipe pages")
+    build_cache.report()
     print("\nDone!")
 
 if __name__ == '__main__':
     main()
-
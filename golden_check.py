@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Golden-output equivalence check for generator changes.
+
+Renders the same catalog twice, once with the generator code at a reference
+git revision (HEAD by default) and once with the working tree, then diffs the
+output page by page. Covers what the page scripts write:
+
+- generate_cms_pages.py: products/*.html, recipes/*.html
+- create_grid_pages.py: products.html, recipes.html
+- fix_slider_single_product.py: the homepage slider in index.html
+
+Only the Python differs between the two sides. The HTML templates and the
+catalog are the working tree's, copied into a scratch directory per side, so
+the real site is never written to. Catalogs:
+
+- checked-in: airtable_exports/products.csv and recipes.csv
+- synthetic: mock_airtable.synthetic_tables (--products N, 3 variants each)
+
+Both sides render one after the other (so their timings are comparable) and
+the outputs are then compared in a process pool. For each page that differs
+it prints the first differing slot: the innermost element around the first
+difference, its line, and both versions of the text there.
+--normalize-whitespace ignores whitespace-only differences.
+
+Render throughput (pages per second, best of --rounds N renders per side,
+alternating) is reported for both sides, so a speed-up and its unchanged
+output are shown by one command. Exits non-zero when any page differs.
+"""
+
+import csv
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import catalog_db
+import mock_airtable
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+
+# (module, entry point) run in order on each side
+STAGES = [
+    ('generate_cms_pages', 'main'),
+    ('create_grid_pages', 'main'),
+    ('fix_slider_single_product', 'update_homepage'),
+]
+# Templates and other inputs the stages read from the site root
+INPUT_PAGES = ['index.html', 'detail_product.html', 'detail_recipe.html']
+OUTPUTS = ['products/*.html', 'recipes/*.html', 'products.html', 'recipes.html', 'index.html']
+
+DEFAULT_SYNTHETIC_PRODUCTS = 300
+# Renders per side; the best time of each stage is reported
+DEFAULT_ROUNDS = 3
+# Differing pages listed per catalog
+MAX_LISTED = 20
+# Characters of context shown on each side of a difference
+CONTEXT = 60
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+TAG = re.compile(r'<(/?)([a-zA-Z][\w-]*)([^>]*)>')
+
+# Runs inside the scratch tree: each stage's entry point, timed, output discarded
+RUNNER = """
+import contextlib, importlib, io, json, sys, time
+timings = {}
+for module, func in STAGES:
+    sys.argv = [module + '.py', '--skip-schema-check']
+    with contextlib.redirect_stdout(io.StringIO()):
+        entry = getattr(importlib.import_module(module), func)
+        started = time.perf_counter()
+        entry()
+    timings[module] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+def tracked_python(ref):
+    """{name: source} for the top-level .py files at a git revision"""
+    names = subprocess.run(['git', 'ls-tree', '--name-only', ref], cwd=BASE_DIR, check=True,
+                           capture_output=True, text=True).stdout.split()
+    sources = {}
+    for name in names:
+        if name.endswith('.py'):
+            sources[name] = subprocess.run(['git', 'show', f'{ref}:{name}'], cwd=BASE_DIR, check=True,
+                                           capture_output=True).stdout
+    return sources
+
+def working_python():
+    sources = {}
+    for path in glob.glob(os.path.join(BASE_DIR, '*.py')):
+        with open(path, 'rb') as f:
+            sources[os.path.basename(path)] = f.read()
+    return sources
+
+def write_synthetic_catalog(exports_dir, num_products):
+    """products.csv/recipes.csv from mock_airtable's synthetic tables"""
+    tables = mock_airtable.synthetic_tables(num_products)
+    for name, columns in (('products', catalog_db.PRODUCT_COLUMNS), ('recipes', catalog_db.RECIPE_COLUMNS)):
+        table = tables['Products' if name == 'products' else 'Recipes']
+        with open(os.path.join(exports_dir, f'{name}.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            for record in table:
+                writer.writerow(catalog_db.normalize_fields(record.get('fields', {}), columns))
+
+def make_tree(root, sources, catalog, num_products):
+    """Scratch site: the given Python, the working tree's templates and a catalog"""
+    os.makedirs(os.path.join(root, 'airtable_exports'))
+    for name, source in sources.items():
+        with open(os.path.join(root, name), 'wb') as f:
+            f.write(source)
+    for name in INPUT_PAGES:
+        shutil.copy2(os.path.join(BASE_DIR, name), os.path.join(root, name))
+    exports = os.path.join(root, 'airtable_exports')
+    if catalog == 'synthetic':
+        write_synthetic_catalog(exports, num_products)
+    else:
+        for name in ('products.csv', 'recipes.csv'):
+            shutil.copy2(os.path.join(AIRTABLE_EXPORTS, name), os.path.join(exports, name))
+
+def render(root, seed='0'):
+    """Run the stages in a scratch tree; returns ({module: seconds}, pages written)"""
+    # Every round renders from scratch: no build cache
+    env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONDONTWRITEBYTECODE='1', OUTLAW_BUILD_CACHE='off')
+    result = subprocess.run([sys.executable, '-c', f'STAGES = {STAGES!r}\n' + RUNNER], cwd=root, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"render failed in {root}:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), len(output_pages(root))
+
+def output_pages(root):
+    pages = set()
+    for pattern in OUTPUTS:
+        pages.update(os.path.relpath(p, root) for p in glob.glob(os.path.join(root, pattern)))
+    return pages
+
+def normalize(text):
+    """Collapse whitespace runs and drop whitespace between tags"""
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', text)).strip()
+
+def enclosing_slot(text, offset):
+    """Innermost element open at `offset`, as its opening tag"""
+    stack = []
+    for match in TAG.finditer(text, 0, offset):
+        closing, name = match.group(1), match.group(2).lower()
+        if closing:
+            for depth in range(len(stack) - 1, -1, -1):
+                if stack[depth][0] == name:
+                    del stack[depth:]
+                    break
+        elif name not in VOID_TAGS and not match.group(3).rstrip().endswith('/'):
+            stack.append((name, match.group(0)))
+    return stack[-1][1] if stack else '(document)'
+
+def compare_page(args):
+    """(page, None) if the outputs match, else (page, first difference)"""
+    page, reference_root, candidate_root, whitespace = args
+    texts = []
+    for root in (reference_root, candidate_root):
+        path = os.path.join(root, page)
+        if not os.path.exists(path):
+            return page, {'missing': 'reference' if root == reference_root else 'candidate'}
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            texts.append(f.read())
+    reference, candidate = texts
+    if whitespace:
+        reference, candidate = normalize(reference), normalize(candidate)
+    if reference == candidate:
+        return page, None
+    offset = next((i for i, (a, b) in enumerate(zip(reference, candidate)) if a != b),
+                  min(len(reference), len(candidate)))
+    slot = enclosing_slot(reference, offset)
+    return page, {
+        'line': reference.count('\n', 0, offset) + 1,
+        'slot': slot if len(slot) <= 120 else slot[:117] + '...',
+        'reference': reference[max(0, offset - 20):offset + CONTEXT],
+        'candidate': candidate[max(0, offset - 20):offset + CONTEXT],
+    }
+
+def print_differences(differing):
+    for page, diff in differing[:MAX_LISTED]:
+        if 'missing' in diff:
+            print(f"   - {page}: only written by the {'candidate' if diff['missing'] == 'reference' else 'reference'}")
+            continue
+        print(f"   - {page}:{diff['line']} in {diff['slot']}")
+        print(f"       reference: {diff['reference']!r}")
+        print(f"       candidate: {diff['candidate']!r}")
+    if len(differing) > MAX_LISTED:
+        print(f"   ... and {len(differing) - MAX_LISTED} more")
+
+def check(catalog, ref, num_products, whitespace, jobs, keep, rounds=DEFAULT_ROUNDS, seeds=False):
+    """Render one catalog both ways and diff; returns the number of differing pages"""
+    work_dir = tempfile.mkdtemp(prefix=f'golden-{catalog}-')
+    try:
+        sources = {'reference': tracked_python(ref), 'candidate': working_python()}
+        sides = {}
+        # Alternate the sides each round and keep each stage's best time
+        for number in range(rounds):
+            for label in ('reference', 'candidate'):
+                root = os.path.join(work_dir, f'{label}-{number}')
+                make_tree(root, sources[label], catalog, num_products)
+                timings, pages = render(root)
+                if label in sides:
+                    shutil.rmtree(sides[label][0], ignore_errors=True)
+                    timings = {m: min(t, sides[label][1][m]) for m, t in timings.items()}
+                sides[label] = (root, timings, pages)
+
+        print(f"\n🧪 {catalog} catalog: {ref} vs working tree")
+        print(f"   {'stage':<28} {'reference':>12} {'candidate':>12} {'speedup':>8}")
+        for module, _ in STAGES:
+            before, after = sides['reference'][1][module], sides['candidate'][1][module]
+            print(f"   {module:<28} {before:>11.3f}s {after:>11.3f}s {before / max(after, 1e-9):>7.2f}x")
+        totals = {label: sum(side[1].values()) for label, side in sides.items()}
+        print(f"   {'pages/s':<28} {sides['reference'][2] / totals['reference']:>12,.0f} "
+              f"{sides['candidate'][2] / totals['candidate']:>12,.0f} "
+              f"{totals['reference'] / max(totals['candidate'], 1e-9):>7.2f}x")
+
+        pages = sorted(output_pages(sides['reference'][0]) | output_pages(sides['candidate'][0]))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(compare_page, [(page, sides['reference'][0], sides['candidate'][0], whitespace)
+                                                   for page in pages], chunksize=16))
+        differing = [(page, diff) for page, diff in results if diff]
+        if not differing:
+            print(f"   ✅ {len(pages)} page(s) identical{' (ignoring whitespace)' if whitespace else ''}")
+        else:
+            print(f"   ❌ {len(differing)} of {len(pages)} page(s) differ")
+            print_differences(differing)
+
+        if seeds:
+            # Same code, another hash seed: set or dict-of-set ordering would show up here
+            root = os.path.join(work_dir, 'candidate-seed')
+            make_tree(root, sources['candidate'], catalog, num_products)
+            render(root, seed='1')
+            candidate = sides['candidate'][0]
+            pages = sorted(output_pages(candidate) | output_pages(root))
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(compare_page, [(page, candidate, root, False) for page in pages],
+                                        chunksize=16))
+            unstable = [(page, diff) for page, diff in results if diff]
+            if unstable:
+                print(f"   ❌ {len(unstable)} page(s) change with PYTHONHASHSEED (0 vs 1)")
+                print_differences(unstable)
+            else:
+                print(f"   ✅ Candidate output identical under PYTHONHASHSEED 0 and 1")
+            differing += unstable
+        if keep:
+            print(f"   Outputs kept in {work_dir}")
+        return len(differing)
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def main():
+    """Check the working tree's generators against a reference revision
+
+    Usage: golden_check.py [--ref REV] [--catalog checked-in|synthetic|both] [--products N]
+                           [--normalize-whitespace] [--rounds N] [--hash-seeds] [--jobs N] [--keep]
+    --hash-seeds also renders the working tree under a second hash seed and
+    diffs it against the first, to catch output that depends on set order.
+    Exits non-zero if any page differs.
+    """
+    ref = sys.argv[sys.argv.index('--ref') + 1] if '--ref' in sys.argv else 'HEAD'
+    catalog = sys.argv[sys.argv.index('--catalog') + 1] if '--catalog' in sys.argv else 'both'
+    num_products = DEFAULT_SYNTHETIC_PRODUCTS
+    if '--products' in sys.argv:
+        num_products = int(sys.argv[sys.argv.index('--products') + 1])
+    jobs = int(sys.argv[sys.argv.index('--jobs') + 1]) if '--jobs' in sys.argv else None
+    rounds = int(sys.argv[sys.argv.index('--rounds') + 1]) if '--rounds' in sys.argv else DEFAULT_ROUNDS
+    catalogs = ['checked-in', 'synthetic'] if catalog == 'both' else [catalog]
+
+    differing = 0
+    for name in catalogs:
+        differing += check(name, ref, num_products, '--normalize-whitespace' in sys.argv, jobs,
+                           '--keep' in sys.argv, rounds, '--hash-seeds' in sys.argv)
+    sys.exit(1 if differing else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Content-addressed image store.
+
+Every file under images/ is hashed once and stored as
+images/store/<sha256[:16]>.<ext>, one physical copy per unique content. Pages
+and stylesheets are rewritten to reference the store URL, so a photo that was
+exported under several names is downloaded and cached once, and because the
+URL changes whenever the content does, it can be cached forever (the
+Cloudflare `_headers` file gets an immutable Cache-Control rule for the
+store).
+
+images/store/index.json remembers every original name and which content it
+was, plus each present file's size/mtime, so a re-scan only stats files and
+hashes the new or changed ones. An old name that shows up again, e.g. in a
+fresh Webflow export, maps straight back to its store copy.
+
+It works on the build output, deploy_to_cloudflare/ unless --site says
+otherwise, and never on the source tree's images, templates and stylesheets.
+Every .html, .css and .js file in the output is rewritten, locale folders
+(<code>/products/) and js/ included; URLs in scripts resolve against the site
+root. Originals are only removed with --prune, and an original that some file
+still references is kept even then.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from urllib.parse import quote, unquote
+
+import resource_hints
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEPLOY_DIR = os.path.join(BASE_DIR, 'deploy_to_cloudflare')
+IMAGES_DIR = 'images'
+STORE_DIR = os.path.join('images', 'store')
+INDEX_FILE = os.path.join(STORE_DIR, 'index.json')
+HEADERS_FILE = '_headers'
+HEADERS_BEGIN = '# BEGIN image store (generated by image_store.py)'
+HEADERS_END = '# END image store'
+
+HASH_LENGTH = 16
+
+# Files whose references are rewritten: all of these anywhere in the output
+# except under SKIP_DIRS
+TEXT_EXTENSIONS = ('.html', '.css', '.js')
+SKIP_DIRS = {'.git', 'airtable_exports', 'deploy_to_cloudflare', '__pycache__', 'node_modules', 'images', 'videos'}
+
+# A path into images/, as written in HTML attributes, srcset lists and CSS url()
+IMAGE_REF = re.compile(r'(?<![\w/.-])((?:/|(?:\.\./)+)?images/[^"\'\s()<>,&?#]+)')
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def store_name(digest, original):
+    ext = os.path.splitext(original)[1].lower() or '.bin'
+    return os.path.join(STORE_DIR, digest[:HASH_LENGTH] + ext).replace(os.sep, '/')
+
+def load_index(site_dir):
+    path = os.path.join(site_dir, INDEX_FILE)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'files': {}, 'aliases': {}}
+
+def save_index(site_dir, index):
+    path = os.path.join(site_dir, INDEX_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+def scan(site_dir, index):
+    """Hash new/changed originals under images/ (outside the store); returns the number hashed"""
+    hashed = 0
+    present = set()
+    store_abs = os.path.join(site_dir, STORE_DIR)
+    for root, dirs, names in os.walk(os.path.join(site_dir, IMAGES_DIR)):
+        if os.path.abspath(root) == os.path.abspath(store_abs):
+            dirs[:] = []
+            continue
+        dirs.sort()
+        for name in sorted(names):
+            if name.startswith('.'):
+                continue
+            full = os.path.join(root, name)
+            rel = os.path.relpath(full, site_dir).replace(os.sep, '/')
+            present.add(rel)
+            stat = os.stat(full)
+            known = index['files'].get(rel)
+            if known and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime_ns:
+                continue
+            digest = file_hash(full)
+            hashed += 1
+            index['files'][rel] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': digest}
+            index['aliases'][rel] = store_name(digest, rel)
+    for rel in list(index['files']):
+        if rel not in present:
+            del index['files'][rel]
+    return hashed
+
+def fill_store(site_dir, index):
+    """Make sure every aliased content has its store copy; returns bytes copied"""
+    copied = 0
+    for rel, stored in sorted(index['aliases'].items()):
+        target = os.path.join(site_dir, stored)
+        if os.path.exists(target) or rel not in index['files']:
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(site_dir, rel), target)
+        copied += os.path.getsize(target)
+    return copied
+
+def ref_base(file_rel):
+    """Folder relative URLs in a file resolve against (scripts run on pages, so the root)"""
+    return '' if file_rel.endswith('.js') else os.path.dirname(file_rel)
+
+def resolve_ref(ref, base):
+    """Site-relative path an images/ reference points at"""
+    if ref.startswith('/'):
+        return unquote(ref.lstrip('/'))
+    return os.path.normpath(os.path.join(base, unquote(ref))).replace(os.sep, '/')
+
+def rewrite_refs(text, file_rel, aliases):
+    """Point every images/ reference in a page, stylesheet or script at its store copy"""
+    base = ref_base(file_rel)
+    def replace(match):
+        ref = match.group(1)
+        stored = aliases.get(resolve_ref(ref, base))
+        if not stored:
+            return ref
+        if ref.startswith('/'):
+            return '/' + stored
+        return quote(os.path.relpath(stored, base or '.').replace(os.sep, '/'))
+    return IMAGE_REF.sub(replace, text)
+
+def referenced(text, file_rel):
+    """Site-relative paths of the images/ files a text file references"""
+    base = ref_base(file_rel)
+    return {resolve_ref(match.group(1), base) for match in IMAGE_REF.finditer(text)}
+
+def text_files(site_dir):
+    """Every page, stylesheet and script in the output, as site-relative paths"""
+    files = []
+    for root, dirs, names in os.walk(site_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith('.'))
+        rel = os.path.relpath(root, site_dir)
+        files += sorted(os.path.normpath(os.path.join(rel, name)).replace(os.sep, '/') for name in names
+                        if name.endswith(TEXT_EXTENSIONS))
+    return files
+
+def write_headers(site_dir):
+    """Add (or refresh) the immutable caching rule for the store in _headers"""
+    resource_hints.write_managed_block(os.path.join(site_dir, HEADERS_FILE), HEADERS_BEGIN, HEADERS_END,
+                                       '/' + STORE_DIR.replace(os.sep, '/') + '/*\n'
+                                       '  Cache-Control: public, max-age=31536000, immutable')
+
+def main():
+    """Scan, store, rewrite and prune
+
+    Usage: image_store.py [--site DIR] [--prune] [--report]
+    --site defaults to deploy_to_cloudflare/, the build output.
+    --prune removes originals nothing references any more.
+    --report only prints what would be deduplicated.
+    """
+    site_dir = DEPLOY_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    if not os.path.isdir(os.path.join(site_dir, IMAGES_DIR)):
+        print(f"ℹ️  No {IMAGES_DIR}/ in {site_dir}; nothing to store")
+        return
+    os.makedirs(os.path.join(site_dir, STORE_DIR), exist_ok=True)
+
+    index = load_index(site_dir)
+    hashed = scan(site_dir, index)
+    present = index['files']
+    groups = {}
+    for rel, entry in present.items():
+        groups.setdefault(entry['hash'], []).append(rel)
+    duplicate_bytes = sum(present[names[0]]['size'] * (len(names) - 1) for names in groups.values())
+    print(f"🗃️  {len(present)} original image(s), {len(groups)} unique ({hashed} hashed this run)")
+    for names in sorted(groups.values(), key=lambda n: -len(n)):
+        if len(names) > 1:
+            print(f"   = {', '.join(sorted(names))}")
+    print(f"   Duplicate bytes: {duplicate_bytes:,}")
+    if '--report' in sys.argv:
+        return
+
+    copied = fill_store(site_dir, index)
+    save_index(site_dir, index)
+
+    changed = 0
+    still_used = set()
+    for rel in text_files(site_dir):
+        path = os.path.join(site_dir, rel)
+        with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            text = f.read()
+        updated = rewrite_refs(text, rel, index['aliases'])
+        still_used |= referenced(updated, rel)
+        if updated != text:
+            with open(path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                f.write(updated)
+            changed += 1
+    write_headers(site_dir)
+
+    removed = 0
+    kept = sorted(rel for rel in present if rel in still_used)
+    if '--prune' in sys.argv:
+        for rel in sorted(present):
+            if rel in still_used:
+                continue
+            os.remove(os.path.join(site_dir, rel))
+            del index['files'][rel]
+            removed += 1
+        save_index(site_dir, index)
+        for root, dirs, names in os.walk(os.path.join(site_dir, IMAGES_DIR), topdown=False):
+            if root != os.path.join(site_dir, IMAGES_DIR) and not os.listdir(root):
+                os.rmdir(root)
+
+    store_files = len(set(index['aliases'].values()))
+    print(f"✅ Store: {store_files} file(s) ({copied:,} bytes added); rewrote {changed} file(s); "
+          f"removed {removed} original(s)")
+    if kept and '--prune' in sys.argv:
+        print(f"⚠️  Kept {len(kept)} original(s) still referenced by name, e.g. {kept[0]}")
+
+if __name__ == '__main__':
+    main()
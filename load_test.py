@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Load test for the generated site.
+
+Replays a realistic mix of page views against preview_server.py (started
+in-process on a free port) or any --url. A page view is the HTML page plus
+the local assets it references (stylesheets, scripts, images, posters), all
+fetched by one simulated visitor over one keep-alive connection.
+
+Visitors browse in sessions of a few page views. Within a session they keep
+the ETags they have seen and revalidate with If-None-Match, so a later view
+mostly gets 304s, like a browser with a warm HTTP cache. Every session starts
+cold.
+
+Reports p50/p95/p99 latency per request and per page view, requests per
+second, status codes, and bytes per page view (headers + body as sent, so
+precompressed responses count at their compressed size), cold and warm.
+"""
+
+import http.client
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+import page_weight
+import preview_server
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Share of page views per page type
+MIX = [('home', 0.25), ('grid', 0.20), ('product', 0.35), ('recipe', 0.20)]
+SESSION_VIEWS = 4
+ACCEPT_ENCODING = 'br, gzip'
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_VIEWS = 400
+
+def page_kind(page):
+    if page == 'index.html':
+        return 'home'
+    if page in ('products.html', 'recipes.html'):
+        return 'grid'
+    if page.startswith('products/'):
+        return 'product'
+    if page.startswith('recipes/'):
+        return 'recipe'
+    return None
+
+def build_catalog(site_dir):
+    """{kind: [(page url, [asset urls])]} for the pages in the mix"""
+    catalog = {kind: [] for kind, _ in MIX}
+    for page in page_weight.find_pages(site_dir):
+        kind = page_kind(page)
+        if kind is None:
+            continue
+        with open(os.path.join(site_dir, page), 'r', encoding='utf-8', errors='replace') as f:
+            refs, _, _ = page_weight.page_refs(f.read(), page)
+        assets = sorted('/' + quote(ref) for ref in refs if os.path.isfile(os.path.join(site_dir, ref)))
+        catalog[kind].append((quote(preview_server.pretty_url(page)), assets))
+    return {kind: pages for kind, pages in catalog.items() if pages}
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))]
+
+class Visitor(threading.Thread):
+    """One simulated visitor: a keep-alive connection and a per-session ETag cache"""
+
+    def __init__(self, host, port, catalog, views, seed, results, lock):
+        super().__init__(daemon=True)
+        self.host, self.port = host, port
+        self.catalog = catalog
+        self.views = views
+        self.random = random.Random(seed)
+        self.results = results
+        self.lock = lock
+        self.connection = None
+
+    def get(self, url, etags):
+        """(status, wire bytes, seconds) for one request, reconnecting once if the server closed"""
+        headers = {'Accept-Encoding': ACCEPT_ENCODING}
+        if url in etags:
+            headers['If-None-Match'] = etags[url]
+        for attempt in (0, 1):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            started = time.perf_counter()
+            try:
+                self.connection.request('GET', url, headers=headers)
+                response = self.connection.getresponse()
+                body = response.read()
+            except (ConnectionError, http.client.HTTPException):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+                continue
+            elapsed = time.perf_counter() - started
+            header_bytes = 17 + sum(len(k) + len(v) + 4 for k, v in response.getheaders())
+            if response.getheader('ETag'):
+                etags[url] = response.getheader('ETag')
+            if response.getheader('Connection', '').lower() == 'close':
+                self.connection.close()
+                self.connection = None
+            return response.status, header_bytes + len(body), elapsed
+
+    def run(self):
+        kinds = [kind for kind, _ in MIX if kind in self.catalog]
+        weights = [weight for kind, weight in MIX if kind in self.catalog]
+        etags = {}
+        for number in range(self.views):
+            if number % SESSION_VIEWS == 0:
+                etags = {}
+            warm = bool(etags)
+            page, assets = self.random.choice(self.catalog[self.random.choices(kinds, weights)[0]])
+            requests = []
+            started = time.perf_counter()
+            for url in [page] + assets:
+                requests.append(self.get(url, etags))
+            view_time = time.perf_counter() - started
+            with self.lock:
+                self.results['requests'] += requests
+                self.results['views'].append((view_time, sum(r[1] for r in requests), warm))
+        if self.connection:
+            self.connection.close()
+
+def main():
+    """Run the load test and print the report
+
+    Usage: load_test.py [--site DIR] [--url http://host:port] [--concurrency N] [--views N] [--seed N]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    concurrency = DEFAULT_CONCURRENCY
+    if '--concurrency' in sys.argv:
+        concurrency = int(sys.argv[sys.argv.index('--concurrency') + 1])
+    views = DEFAULT_VIEWS
+    if '--views' in sys.argv:
+        views = int(sys.argv[sys.argv.index('--views') + 1])
+    seed = int(sys.argv[sys.argv.index('--seed') + 1]) if '--seed' in sys.argv else 1
+
+    server = None
+    if '--url' in sys.argv:
+        target = urlsplit(sys.argv[sys.argv.index('--url') + 1])
+        host, port = target.hostname, target.port or 80
+    else:
+        server = preview_server.serve(site_dir, port=0)
+        host, port = server.server_address
+
+    catalog = build_catalog(site_dir)
+    print(f"🚦 {views} page views from {concurrency} concurrent visitor(s) against http://{host}:{port}/")
+    for kind, weight in MIX:
+        print(f"   {kind:<8} {weight:>4.0%}  {len(catalog.get(kind, [])):>4} page(s)")
+
+    results = {'requests': [], 'views': []}
+    lock = threading.Lock()
+    visitors = [Visitor(host, port, catalog, views // concurrency + (1 if i < views % concurrency else 0),
+                        seed * 1000 + i, results, lock) for i in range(concurrency)]
+    started = time.perf_counter()
+    for visitor in visitors:
+        visitor.start()
+    for visitor in visitors:
+        visitor.join()
+    elapsed = time.perf_counter() - started
+    if server:
+        server.shutdown()
+
+    request_times = sorted(r[2] * 1000 for r in results['requests'])
+    view_times = sorted(v[0] * 1000 for v in results['views'])
+    statuses = {}
+    for status, _, _ in results['requests']:
+        statuses[status] = statuses.get(status, 0) + 1
+    cold = [v[1] for v in results['views'] if not v[2]]
+    warm = [v[1] for v in results['views'] if v[2]]
+    print(f"\n📊 {len(results['requests']):,} requests in {elapsed:.1f}s "
+          f"({len(results['requests']) / elapsed:,.0f} req/s, {len(view_times) / elapsed:,.1f} views/s)")
+    print(f"   Status: {', '.join(f'{s}: {n:,}' for s, n in sorted(statuses.items()))}")
+    print(f"   {'':<12} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for label, values in (('request', request_times), ('page view', view_times)):
+        print(f"   {label:<12} " + ' '.join(f"{percentile(values, p):>7.1f}ms" for p in (50, 95, 99)))
+    all_bytes = cold + warm
+    print(f"   Bytes per page view: {sum(all_bytes) / max(len(all_bytes), 1) / 1024:,.1f} KB average, "
+          f"{sum(cold) / max(len(cold), 1) / 1024:,.1f} KB cold ({len(cold)}), "
+          f"{sum(warm) / max(len(warm), 1) / 1024:,.1f} KB warm ({len(warm)})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Multi-locale product and recipe page builds for Outlaw Spice.
+
+Webflow exports carry a `Locale ID` on every localized record (the recipe
+export already does). Rather than running the whole generator once per
+locale, this builds every locale in one run:
+
+- Products and recipes are read once and partitioned by Locale ID in the
+  same pass. Records without a Locale ID are shared by every locale; a
+  locale's own rows for a handle or slug replace the shared ones.
+- One process pool renders the pages of all locales concurrently. Each
+  worker keeps generate_cms_pages' template cache, so a detail template is
+  read and path-fixed once per worker, not once per locale or page.
+- The cross-reference runs per locale (names and recipes differ), sharing
+  one scan cache: a recipe whose text and candidate names are the same in
+  several locales is scanned once.
+- The primary locale renders to the site root (products/, recipes/, as
+  today); the others to <code>/products/ and <code>/recipes/.
+- Each locale has its own manifest of page -> input hash (record, rendered
+  blocks, templates) in airtable_exports/locales/<code>/, so an edit in one
+  locale only re-renders that locale's pages. Pages whose record is gone are
+  removed.
+
+Locale codes come from locales.json ({"primary": "<Locale ID>", "codes":
+{"<Locale ID>": "fr", ...}}); without it the locale with the most records is
+primary and the others use their Locale ID as directory name.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import airtable_schema
+import build_cache
+import catalog_db
+import cross_reference
+import generate_cms_pages
+import price_overlay
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+LOCALES_CONFIG = os.path.join(BASE_DIR, "locales.json")
+LOCALE_STATE_DIR = os.path.join(AIRTABLE_EXPORTS, "locales")
+
+# Bump when the manifest layout or what goes into a page hash changes
+MANIFEST_VERSION = 1
+TEMPLATES = ['detail_product.html', 'detail_recipe.html']
+
+def locale_id(row):
+    return (row.get('Locale ID') or '').strip()
+
+def variant_rows():
+    """(handle, row) for every variant row, from the catalog or the CSV export"""
+    if generate_cms_pages.USE_CATALOG:
+        conn = catalog_db.connect()
+        try:
+            for handle, variants in catalog_db.iter_grouped_variants(conn):
+                for row in variants:
+                    yield handle, row
+        finally:
+            conn.close()
+        return
+    yield from generate_cms_pages.product_rows(generate_cms_pages.PRODUCTS_CSV)
+
+def partition(rows, recipes):
+    """Split records by Locale ID in one pass
+
+    Returns ({locale: {handle: [variant rows]}}, {locale: [recipes]}, record
+    counts by locale); the '' locale holds the shared records.
+    """
+    products = {}
+    counts = {}
+    for handle, row in rows:
+        locale = locale_id(row)
+        products.setdefault(locale, {}).setdefault(handle, []).append(row)
+        counts[locale] = counts.get(locale, 0) + 1
+    by_locale = {}
+    for recipe in recipes:
+        locale = locale_id(recipe)
+        by_locale.setdefault(locale, []).append(recipe)
+        counts[locale] = counts.get(locale, 0) + 1
+    return products, by_locale, counts
+
+def load_config(path=LOCALES_CONFIG):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def plan_locales(counts, config):
+    """[(locale id, code, primary)] with the primary first
+
+    The shared '' partition only becomes a locale of its own when no record
+    has a Locale ID.
+    """
+    ids = sorted(locale for locale in counts if locale)
+    ids += [locale for locale in config.get('codes', {}) if locale not in ids]
+    if not ids:
+        return [('', 'default', True)]
+    primary = config.get('primary')
+    if primary not in ids:
+        primary = max(ids, key=lambda locale: (counts.get(locale, 0), locale == ids[0]))
+    codes = config.get('codes', {})
+    plan = [(primary, codes.get(primary, primary), True)]
+    plan += [(locale, codes.get(locale, locale), False) for locale in ids if locale != primary]
+    return plan
+
+def locale_records(locale, products, recipes):
+    """Merged products and recipes one locale renders: shared records plus its own"""
+    grouped = dict(products.get('', {}))
+    if locale:
+        grouped.update(products.get(locale, {}))
+    merged = {handle: generate_cms_pages.merge_variants(variants) for handle, variants in grouped.items()}
+    by_slug = {}
+    for recipe in recipes.get('', []) + (recipes.get(locale, []) if locale else []):
+        by_slug[cross_reference.recipe_slug(recipe)] = recipe
+    return merged, list(by_slug.values())
+
+def input_hash(*parts):
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def templates_hash():
+    digest = hashlib.sha1()
+    for name in TEMPLATES:
+        with open(os.path.join(generate_cms_pages.TEMPLATE_DIR, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def load_manifest(path, templates):
+    """Stored page hashes, or none if missing, from another version or other templates"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION and manifest.get('templates') == templates:
+                return manifest['pages']
+        except (OSError, ValueError, KeyError):
+            pass
+    return {}
+
+def save_manifest(path, templates, pages):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'templates': templates, 'pages': pages}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def build(output_dir=generate_cms_pages.OUTPUT_DIR, state_dir=LOCALE_STATE_DIR, jobs=None, force=False):
+    """Render every locale; returns per-locale stats"""
+    started = time.time()
+    products, recipes, counts = partition(variant_rows(), generate_cms_pages.load_recipes())
+    ingredients = generate_cms_pages.load_ingredients()
+    plan = plan_locales(counts, load_config())
+    templates = templates_hash()
+    scan_cache = {}
+    loaded = time.time() - started
+
+    stats = []
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        pending = []
+        for locale, code, primary in plan:
+            root = output_dir if primary else os.path.join(output_dir, code)
+            prefix = '../' if primary else '../../'
+            locale_dir = os.path.join(state_dir, code)
+            local_products, local_recipes = locale_records(locale, products, recipes)
+            xref = cross_reference.update_index(local_products, local_recipes, ingredients,
+                                                os.path.join(locale_dir, 'xref_index.json'), scan_cache)
+            manifest_path = os.path.join(locale_dir, 'manifest.json')
+            old = {} if force else load_manifest(manifest_path, templates)
+            pages = {}
+            futures = []
+            for handle, product in local_products.items():
+                used_in = xref['used_in'].get(handle, '')
+                page = f'products/{handle}.html'
+                record = price_overlay.without_prices(product) if generate_cms_pages.PRICE_OVERLAY else product
+                pages[page] = input_hash(record, used_in, prefix, generate_cms_pages.PRICE_OVERLAY)
+                if old.get(page) != pages[page] or not os.path.exists(os.path.join(root, page)):
+                    futures.append(pool.submit(build_cache.tracked, generate_cms_pages.create_product_page,
+                                               handle, product, root, used_in, prefix))
+            for recipe in local_recipes:
+                featured = xref['featured'].get(cross_reference.recipe_slug(recipe), '')
+                page = f"recipes/{cross_reference.recipe_slug(recipe)}.html"
+                pages[page] = input_hash(recipe, featured, prefix)
+                if old.get(page) != pages[page] or not os.path.exists(os.path.join(root, page)):
+                    futures.append(pool.submit(build_cache.tracked, generate_cms_pages.create_recipe_page,
+                                               recipe, root, featured, prefix))
+            removed = sorted(page for page in old if page not in pages)
+            pending.append((code, root, locale_dir, manifest_path, pages, futures, removed, xref, len(pages)))
+
+        # Every locale's pages are queued before waiting on any of them
+        for code, root, locale_dir, manifest_path, pages, futures, removed, xref, total in pending:
+            for future in futures:
+                build_cache.merge(future.result()[1])
+            for page in removed:
+                path = os.path.join(root, page)
+                if os.path.exists(path):
+                    os.remove(path)
+            cross_reference.save_index(xref['index'], os.path.join(locale_dir, 'xref_index.json'))
+            save_manifest(manifest_path, templates, pages)
+            stats.append({'code': code, 'root': os.path.relpath(root, output_dir), 'pages': total,
+                          'rendered': len(futures), 'removed': len(removed), 'xref': xref['stats']})
+    return stats, loaded, time.time() - started
+
+def main():
+    """Build every locale
+
+    Usage: locale_build.py [--site DIR] [--jobs N] [--force]
+    """
+    output_dir = generate_cms_pages.OUTPUT_DIR
+    if '--site' in sys.argv:
+        output_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    jobs = int(sys.argv[sys.argv.index('--jobs') + 1]) if '--jobs' in sys.argv else None
+
+    if not airtable_schema.verify_cached_schema():
+        return
+    stats, loaded, elapsed = build(output_dir, jobs=jobs, force='--force' in sys.argv)
+
+    print(f"\n🌍 {len(stats)} locale(s) built in {elapsed:.2f}s (records loaded and partitioned in {loaded:.2f}s)")
+    for locale in stats:
+        where = 'site root' if locale['root'] == '.' else f"{locale['root']}/"
+        print(f"   {locale['code']:<26} {where:<28} {locale['rendered']:>5} of {locale['pages']} page(s) rendered, "
+              f"{locale['removed']} removed, {locale['xref']['full_scans']} recipe scan(s)")
+    build_cache.report()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Airtable REST API, for exercising the sync offline.
+Serves the list-records and meta endpoints from the checked-in exports (or a
+synthetic catalog) and can inject latency, failures and expired offsets.
+
+Record edits sent to it (PATCH/POST/DELETE on a table, like the real API)
+are queued as webhook payloads and announced to --notify-url, so the rebuild
+daemon can be tested end to end with no network.
+
+Point the sync at it with "api_url": "http://127.0.0.1:8765/v0" in
+airtable_config.json.
+"""
+
+import argparse
+import base64
+import csv
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import airtable_schema
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+
+PAGE_SIZE = 100
+
+def load_export_tables():
+    """Build Products/Recipes tables from the checked-in Airtable exports"""
+    tables = {}
+    with open(os.path.join(AIRTABLE_EXPORTS, "products_raw.json"), 'r', encoding='utf-8') as f:
+        tables['Products'] = json.load(f).get('records', [])
+    recipes = []
+    with open(os.path.join(AIRTABLE_EXPORTS, "recipes.csv"), 'r', encoding='utf-8') as f:
+        for idx, row in enumerate(csv.DictReader(f)):
+            fields = {k: v for k, v in row.items() if v}
+            recipes.append({'id': f'recMockRecipe{idx:05d}', 'createdTime': '2025-01-01T00:00:00.000Z', 'fields': fields})
+    tables['Recipes'] = recipes
+    tables['Ingredients'] = []
+    return tables
+
+def synthetic_tables(num_products, variants_per_product=3):
+    """Build a large synthetic Products table on top of the export's recipes"""
+    tables = load_export_tables()
+    template = tables['Products'][0]['fields']
+    records = []
+    for p in range(num_products):
+        for v in range(variants_per_product):
+            fields = dict(template)
+            fields.update({
+                'Product Handle': f'spice-{p:05d}',
+                'Product Name': f'Spice {p}',
+                'Variant ID': f'var-{p:05d}-{v}',
+                'Variant Price': f'${10 + v}.{p % 100:02d}',
+                'Option1 Value': f'size-{v}',
+            })
+            records.append({
+                'id': f'rec{p:08d}{v:02d}',
+                'createdTime': '2025-01-01T00:00:00.000Z',
+                'fields': fields,
+            })
+    tables['Products'] = records
+    return tables
+
+class MockAirtable:
+    """State shared by the request handler: tables plus fault injection knobs"""
+
+    def __init__(self, tables, latency=0.0, fail_at_page=None, fail_times=1,
+                 fail_status=503, offset_ttl=None, notify_url=None, mac_secret=None):
+        self.tables = tables
+        self.notify_url = notify_url
+        self.mac_secret = mac_secret
+        self.payloads = []
+        self.latency = latency
+        self.fail_at_page = fail_at_page
+        self.fail_times = fail_times
+        self.fail_status = fail_status
+        self.offset_ttl = offset_ttl
+        self.failures = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def schema(self):
+        """Meta API response: every field seen in the data plus the required ones"""
+        tables = []
+        for t_idx, (name, records) in enumerate(self.tables.items()):
+            names = []
+            for record in records:
+                for field in record.get('fields', {}):
+                    if field not in names:
+                        names.append(field)
+            for key, table_name in airtable_schema.configured_table_names().items():
+                if table_name == name:
+                    names += [f for f in airtable_schema.REQUIRED_FIELDS.get(key, []) if f not in names]
+            tables.append({
+                'id': f'tblMock{t_idx:03d}',
+                'name': name,
+                'fields': [{'id': f'fldMock{t_idx:03d}{i:04d}', 'name': n, 'type': 'singleLineText'}
+                           for i, n in enumerate(names)],
+            })
+        return {'tables': tables}
+
+    def list_records(self, table_name, query):
+        """One page of records: (status, body)"""
+        records = self.tables.get(table_name)
+        if records is None:
+            return 404, {'error': 'TABLE_NOT_FOUND'}
+        formula = query.get('filterByFormula', [None])[0]
+        if formula:
+            # Only the RECORD_ID() lookups the sync sends are understood
+            wanted = set(re.findall(r"RECORD_ID\(\)\s*=\s*'([^']+)'", formula))
+            records = [r for r in records if r['id'] in wanted]
+        page_size = min(int(query.get('pageSize', [PAGE_SIZE])[0]), PAGE_SIZE)
+        start = 0
+        offset = query.get('offset', [None])[0]
+        if offset:
+            match = re.match(r'itr(\d+(?:\.\d+)?)/(\d+)$', offset)
+            if not match:
+                return 422, {'error': {'type': 'INVALID_OFFSET_VALUE'}}
+            issued, start = float(match.group(1)), int(match.group(2))
+            if self.offset_ttl is not None and time.time() - issued > self.offset_ttl:
+                return 422, {'error': {'type': 'LIST_RECORDS_ITERATOR_NOT_AVAILABLE'}}
+        page_number = start // page_size + 1
+        with self.lock:
+            if self.fail_at_page == page_number and self.failures < self.fail_times:
+                self.failures += 1
+                return self.fail_status, {'error': {'type': 'INJECTED_FAILURE', 'page': page_number}}
+
+        page = records[start:start + page_size]
+        if 'returnFieldsByFieldId' in query:
+            schema = {t['name']: t for t in self.schema()['tables']}[table_name]
+            by_name = {f['name']: f['id'] for f in schema['fields']}
+            page = [dict(r, fields={by_name.get(k, k): v for k, v in r['fields'].items()}) for r in page]
+        body = {'records': page}
+        if start + page_size < len(records):
+            body['offset'] = f'itr{time.time():.3f}/{start + page_size}'
+        return 200, body
+
+    def table_id(self, table_name):
+        """Mock table id for a table name"""
+        return {t['name']: t['id'] for t in self.schema()['tables']}[table_name]
+
+    def field_ids(self, table_name, fields):
+        """Rename field names to mock field ids, as webhook payloads use ids"""
+        schema = {t['name']: t for t in self.schema()['tables']}[table_name]
+        by_name = {f['name']: f['id'] for f in schema['fields']}
+        return {by_name.get(k, k): v for k, v in fields.items()}
+
+    def edit(self, method, table_name, record_id, fields):
+        """Apply a create/update/delete and queue the matching webhook payload"""
+        records = self.tables.get(table_name)
+        if records is None:
+            return 404, {'error': 'TABLE_NOT_FOUND'}
+        with self.lock:
+            record = next((r for r in records if r['id'] == record_id), None)
+            if method == 'POST':
+                record = {'id': f'recMock{int(time.time() * 1000) % 10 ** 10:010d}',
+                          'createdTime': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+                          'fields': fields}
+                records.append(record)
+                change = {'createdRecordsById': {record['id']: {
+                    'cellValuesByFieldId': self.field_ids(table_name, fields)}}}
+            elif record is None:
+                return 404, {'error': 'NOT_FOUND'}
+            elif method == 'DELETE':
+                records.remove(record)
+                change = {'destroyedRecordIds': [record_id]}
+            else:
+                previous = {k: record['fields'].get(k) for k in fields}
+                record['fields'].update(fields)
+                change = {'changedRecordsById': {record_id: {
+                    'current': {'cellValuesByFieldId': self.field_ids(table_name, fields)},
+                    'previous': {'cellValuesByFieldId': self.field_ids(table_name, previous)},
+                }}}
+            self.payloads.append({
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+                'baseTransactionNumber': len(self.payloads) + 1,
+                'payloadFormat': 'v0',
+                'changedTablesById': {self.table_id(table_name): change},
+            })
+        self.notify()
+        if method == 'DELETE':
+            return 200, {'id': record_id, 'deleted': True}
+        return 200, record
+
+    def list_payloads(self, query):
+        """Webhook payloads after a cursor (cursors start at 1, like Airtable)"""
+        cursor = int(query.get('cursor', ['1'])[0])
+        with self.lock:
+            page = self.payloads[cursor - 1:cursor - 1 + 50]
+            next_cursor = cursor + len(page)
+            more = next_cursor - 1 < len(self.payloads)
+        return 200, {'payloads': page, 'cursor': next_cursor, 'mightHaveMore': more}
+
+    def notify(self):
+        """POST a webhook notification ping to the daemon, like Airtable does"""
+        if not self.notify_url:
+            return
+        body = json.dumps({
+            'base': {'id': 'appMock'},
+            'webhook': {'id': 'achMock'},
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+        }).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.mac_secret:
+            mac = hmac.new(base64.b64decode(self.mac_secret), body, hashlib.sha256).hexdigest()
+            headers['X-Airtable-Content-MAC'] = f'hmac-sha256={mac}'
+
+        def send():
+            try:
+                urllib.request.urlopen(urllib.request.Request(self.notify_url, body, headers), timeout=5)
+            except OSError as e:
+                print(f"⚠️  Webhook notification to {self.notify_url} failed: {e}")
+
+        threading.Thread(target=send, daemon=True).start()
+
+def make_handler(state):
+    """Request handler class bound to a MockAirtable instance"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            with state.lock:
+                state.requests += 1
+            if state.latency:
+                time.sleep(state.latency)
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = [unquote(p) for p in url.path.strip('/').split('/')]
+            if parts[:3] == ['v0', 'meta', 'bases'] and parts[-1] == 'tables':
+                self.send_json(200, state.schema())
+            elif parts[:2] == ['v0', 'bases'] and parts[-1] == 'payloads':
+                self.send_json(*state.list_payloads(query))
+            elif len(parts) == 3 and parts[0] == 'v0':
+                self.send_json(*state.list_records(parts[2], query))
+            else:
+                self.send_json(404, {'error': 'NOT_FOUND'})
+
+        def do_edit(self):
+            parts = [unquote(p) for p in urlparse(self.path).path.strip('/').split('/')]
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if parts[0] != 'v0' or len(parts) not in (3, 4):
+                self.send_json(404, {'error': 'NOT_FOUND'})
+                return
+            record_id = parts[3] if len(parts) == 4 else None
+            self.send_json(*state.edit(self.command, parts[2], record_id, body.get('fields', {})))
+
+        do_PATCH = do_edit
+        do_POST = do_edit
+        do_DELETE = do_edit
+
+    return Handler
+
+def serve(state, host='127.0.0.1', port=8765):
+    """Start the mock in a background thread and return the server"""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    """Run the mock Airtable API until interrupted"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--synthetic', type=int, metavar='PRODUCTS',
+                        help='serve a synthetic Products table with this many products')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds of delay per request')
+    parser.add_argument('--fail-at-page', type=int, help='fail requests for this page number')
+    parser.add_argument('--fail-times', type=int, default=1, help='how many times to fail it')
+    parser.add_argument('--fail-status', type=int, default=503)
+    parser.add_argument('--offset-ttl', type=float, help='expire pagination offsets after N seconds')
+    parser.add_argument('--notify-url', help='POST webhook notifications here (e.g. http://127.0.0.1:8787/webhook)')
+    parser.add_argument('--mac-secret', help='base64 secret to sign notifications with')
+    args = parser.parse_args()
+
+    tables = synthetic_tables(args.synthetic) if args.synthetic else load_export_tables()
+    state = MockAirtable(tables, args.latency, args.fail_at_page, args.fail_times,
+                         args.fail_status, args.offset_ttl, args.notify_url, args.mac_secret)
+    server = serve(state, port=args.port)
+    print(f"🧪 Mock Airtable on http://127.0.0.1:{args.port}/v0")
+    for name, records in tables.items():
+        print(f"   - {name}: {len(records)} records")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Page weight report and budget check.
+
+Parses every page in the output tree once, resolves the local assets it
+references (stylesheets, scripts, images, videos and posters, preloads, plus the
+fonts and background images its CSS pulls in for classes the page uses) and
+adds up raw and compressed transfer size per page and per asset class. Pages
+over budget are flagged; with --ci the script exits 1 if any are.
+
+Compressed sizes are gzip -6 for text assets (brotli isn't in the standard
+library; it lands a little smaller) and the raw size for formats that are
+already compressed. Asset sizes are memoized per file, and pages are parsed in
+parallel, so most of the time on a big tree goes to reading the HTML.
+
+Budgets (compressed KB) come from BUDGETS below, optionally overridden by
+page_budgets.json ({"default": {...}, "product": {...}, "recipe": {...}}) and
+--budget CLASS=KB on the command line.
+"""
+
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+from urllib.parse import unquote
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGETS_FILE = os.path.join(BASE_DIR, 'page_budgets.json')
+
+# Compressed KB per page
+BUDGETS = {
+    'default': {'total': 2500, 'html': 60, 'css': 80, 'js': 300, 'font': 250, 'image': 2000},
+    'product': {'total': 1500},
+    'recipe': {'total': 2500},
+}
+
+# Directories that aren't part of the page tree
+SKIP_DIRS = {'.git', 'css', 'js', 'images', 'videos', 'airtable_exports', 'deploy_to_cloudflare',
+             '__pycache__', 'node_modules'}
+
+ASSET_CLASSES = {
+    '.html': 'html', '.css': 'css', '.js': 'js', '.mjs': 'js', '.json': 'js',
+    '.woff': 'font', '.woff2': 'font', '.ttf': 'font', '.otf': 'font', '.eot': 'font',
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.gif': 'image', '.svg': 'image',
+    '.webp': 'image', '.avif': 'image', '.ico': 'image',
+    '.mp4': 'media', '.webm': 'media', '.mp3': 'media',
+}
+TEXT_CLASSES = {'html', 'css', 'js'}
+TEXT_EXTENSIONS = {'.svg'}
+
+# srcset images are counted at the candidate a ~1080px-wide screen would pick
+REFERENCE_WIDTH = 1080
+
+REF_ATTR = re.compile(r'<(link|script|img|source|video|iframe|use)\b([^>]*)>', re.IGNORECASE)
+ATTR = re.compile(r'([\w:-]+)="([^"]*)"')
+CLASS_ATTR = re.compile(r'class="([^"]*)"')
+STYLE_URL = re.compile(r'url\(\s*[\'"]?([^\'")]+?)[\'"]?\s*\)')
+CSS_RULE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+
+def asset_class(path):
+    return ASSET_CLASSES.get(os.path.splitext(path)[1].lower(), 'other')
+
+def is_remote(url):
+    return bool(re.match(r'^[a-z][a-z0-9+.-]*:|^//', url, re.IGNORECASE))
+
+def resolve(base, url):
+    """Site-relative path for a URL referenced from the file at `base`, or None"""
+    url = url.strip()
+    if not url or url.startswith(('#', 'data:')) or is_remote(url):
+        return None
+    url = unquote(url.split('#', 1)[0].split('?', 1)[0])
+    if url.startswith('/'):
+        return os.path.normpath(url.lstrip('/'))
+    return os.path.normpath(os.path.join(os.path.dirname(base), url))
+
+def srcset_pick(srcset):
+    """The srcset candidate closest to REFERENCE_WIDTH without going under it"""
+    candidates = []
+    for entry in srcset.split(','):
+        parts = entry.split()
+        if len(parts) == 2 and parts[1].endswith('w') and parts[1][:-1].isdigit():
+            candidates.append((int(parts[1][:-1]), parts[0]))
+    if not candidates:
+        return None
+    candidates.sort()
+    for width, url in candidates:
+        if width >= REFERENCE_WIDTH:
+            return url
+    return candidates[-1][1]
+
+def page_refs(html, page):
+    """(local asset refs, external URLs, classes used) for one page"""
+    refs = set()
+    external = set()
+    for match in REF_ATTR.finditer(html):
+        tag = match.group(1).lower()
+        attrs = dict(ATTR.findall(match.group(2)))
+        urls = []
+        if tag == 'link':
+            rel = attrs.get('rel', '')
+            if rel in ('stylesheet', 'preload', 'icon', 'shortcut icon', 'modulepreload'):
+                urls.append(attrs.get('href', ''))
+        elif tag == 'video':
+            urls.append(attrs.get('poster', ''))
+        elif tag == 'use':
+            urls.append(attrs.get('href', ''))
+        elif attrs.get('srcset'):
+            urls.append(srcset_pick(attrs['srcset']) or attrs.get('src', ''))
+        else:
+            urls.append(attrs.get('src', ''))
+        for url in urls:
+            url = unescape(url).strip('"\'')
+            if is_remote(url):
+                external.add(url)
+            else:
+                path = resolve(page, url)
+                if path:
+                    refs.add(path)
+    for div in re.finditer(r'data-poster-url="([^"]+)"', html):
+        path = resolve(page, unescape(div.group(1)).strip('"\''))
+        if path:
+            refs.add(path)
+    for url in STYLE_URL.findall(html):
+        path = resolve(page, unescape(url).strip('"\''))
+        if path:
+            refs.add(path)
+    classes = set()
+    for value in CLASS_ATTR.findall(html):
+        classes.update(value.split())
+    return refs, external, classes
+
+def analyze_page(args):
+    """Worker: parse one page (runs in a process pool)"""
+    site_dir, page = args
+    with open(os.path.join(site_dir, page), 'rb') as f:
+        data = f.read()
+    refs, external, classes = page_refs(data.decode('utf-8', 'replace'), page)
+    return page, len(data), len(gzip.compress(data, 6)), sorted(refs), sorted(external), sorted(classes)
+
+class AssetSizes:
+    """Memoized (raw, compressed) sizes and CSS sub-resources per file"""
+
+    def __init__(self, site_dir):
+        self.site_dir = site_dir
+        self.sizes = {}
+        self.css_deps = {}
+
+    def size(self, path):
+        if path not in self.sizes:
+            full = os.path.join(self.site_dir, path)
+            if not os.path.isfile(full):
+                self.sizes[path] = None
+            else:
+                raw = os.path.getsize(full)
+                compressed = raw
+                ext = os.path.splitext(path)[1].lower()
+                if asset_class(path) in TEXT_CLASSES or ext in TEXT_EXTENSIONS:
+                    with open(full, 'rb') as f:
+                        compressed = len(gzip.compress(f.read(), 6))
+                self.sizes[path] = (raw, compressed)
+        return self.sizes[path]
+
+    def css(self, path):
+        """[(required classes, asset path)] for url()s in a stylesheet; fonts need no classes"""
+        if path not in self.css_deps:
+            deps = []
+            full = os.path.join(self.site_dir, path)
+            if os.path.isfile(full):
+                with open(full, 'r', encoding='utf-8', errors='replace') as f:
+                    css = re.sub(r'/\*.*?\*/', '', f.read(), flags=re.DOTALL)
+                for selector, body in CSS_RULE.findall(css):
+                    urls = [resolve(path, url) for url in STYLE_URL.findall(body)]
+                    urls = [url for url in urls if url]
+                    if not urls:
+                        continue
+                    if selector.strip().startswith('@font-face'):
+                        deps += [(frozenset(), url) for url in urls]
+                        continue
+                    # One alternative per selector in the list: the classes of its last compound
+                    for alternative in selector.split(','):
+                        last = re.split(r'[\s>+~]+', alternative.strip())[-1]
+                        required = frozenset(re.findall(r'\.([\w-]+)', last.split(':')[0]))
+                        if required:
+                            deps += [(required, url) for url in urls]
+            self.css_deps[path] = deps
+        return self.css_deps[path]
+
+def page_type(page):
+    folder = os.path.dirname(page)
+    return {'products': 'product', 'recipes': 'recipe'}.get(folder, 'page')
+
+def load_budgets(overrides):
+    budgets = {kind: dict(values) for kind, values in BUDGETS.items()}
+    if os.path.exists(BUDGETS_FILE):
+        with open(BUDGETS_FILE, 'r', encoding='utf-8') as f:
+            for kind, values in json.load(f).items():
+                budgets.setdefault(kind, {}).update(values)
+    for override in overrides:
+        name, _, value = override.partition('=')
+        budgets['default'][name] = float(value.upper().rstrip('KB'))
+    return budgets
+
+def budget_for(budgets, kind):
+    merged = dict(budgets['default'])
+    merged.update(budgets.get(kind, {}))
+    return merged
+
+def find_pages(site_dir):
+    pages = []
+    for root, dirs, files in os.walk(site_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith('.'))
+        rel = os.path.relpath(root, site_dir)
+        for name in sorted(files):
+            if name.endswith('.html'):
+                pages.append(os.path.normpath(os.path.join(rel, name)))
+    return pages
+
+def main():
+    """Analyze page weights, print a summary, optionally write JSON and fail in CI
+
+    Usage: page_weight.py [--site DIR] [--json FILE] [--ci] [--budget CLASS=KB ...] [--jobs N] [--top N]
+    """
+    args = sys.argv[1:]
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+    site_dir = os.path.abspath(option('--site', BASE_DIR))
+    json_path = option('--json')
+    jobs = int(option('--jobs', 0)) or None
+    top = int(option('--top', 10))
+    overrides = [args[i + 1] for i, arg in enumerate(args) if arg == '--budget']
+    budgets = load_budgets(overrides)
+
+    started = time.time()
+    pages = find_pages(site_dir)
+    sizes = AssetSizes(site_dir)
+    report = {}
+    missing = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(analyze_page, [(site_dir, page) for page in pages], chunksize=64)
+        for page, raw, compressed, refs, external, classes in results:
+            classes = set(classes)
+            totals = {'html': {'raw': raw, 'compressed': compressed, 'count': 1}}
+            assets = set(refs)
+            for ref in refs:
+                if asset_class(ref) == 'css':
+                    assets.update(url for required, url in sizes.css(ref) if required <= classes)
+            for asset in sorted(assets):
+                size = sizes.size(asset)
+                if size is None:
+                    missing.setdefault(asset, []).append(page)
+                    continue
+                bucket = totals.setdefault(asset_class(asset), {'raw': 0, 'compressed': 0, 'count': 0})
+                bucket['raw'] += size[0]
+                bucket['compressed'] += size[1]
+                bucket['count'] += 1
+            total = {'raw': sum(b['raw'] for b in totals.values()),
+                     'compressed': sum(b['compressed'] for b in totals.values()),
+                     'requests': sum(b['count'] for b in totals.values()) + len(external)}
+            budget = budget_for(budgets, page_type(page))
+            over = []
+            for name, limit in sorted(budget.items()):
+                actual = total['compressed'] if name == 'total' else totals.get(name, {}).get('compressed', 0)
+                if actual > limit * 1024:
+                    over.append({'class': name, 'compressed': actual, 'budget': int(limit * 1024)})
+            report[page] = {'type': page_type(page), 'total': total, 'classes': totals,
+                            'external': len(external), 'over_budget': over}
+    elapsed = time.time() - started
+
+    heaviest = sorted(report, key=lambda p: -report[p]['total']['compressed'])
+    failing = [p for p in heaviest if report[p]['over_budget']]
+    print(f"⚖️  {len(report)} page(s), {len(sizes.sizes)} distinct asset(s) in {elapsed:.1f}s")
+    for page in heaviest[:top]:
+        entry = report[page]
+        by_class = ', '.join(f"{name} {b['compressed'] / 1024:,.0f}" for name, b in
+                             sorted(entry['classes'].items(), key=lambda item: -item[1]['compressed']))
+        flag = ' ❌' if entry['over_budget'] else ''
+        print(f"   {entry['total']['compressed'] / 1024:>8,.0f} KB  {page}  ({by_class}){flag}")
+    if missing:
+        print(f"⚠️  {len(missing)} referenced asset(s) missing, e.g. {sorted(missing)[0]}")
+    for page in failing:
+        problems = ', '.join(f"{o['class']} {o['compressed'] / 1024:,.0f} KB > {o['budget'] / 1024:,.0f} KB"
+                             for o in report[page]['over_budget'])
+        print(f"❌ {page}: {problems}")
+
+    if json_path:
+        summary = {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'site': site_dir,
+            'pages': len(report),
+            'over_budget': len(failing),
+            'budgets': budgets,
+            'totals': {kind: {'pages': sum(1 for e in report.values() if e['type'] == kind),
+                              'compressed': sum(e['total']['compressed'] for e in report.values() if e['type'] == kind)}
+                       for kind in sorted({e['type'] for e in report.values()})},
+            'missing_assets': {asset: pages for asset, pages in sorted(missing.items())},
+            'page_weights': report,
+        }
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"📝 Wrote {json_path}")
+
+    if failing:
+        print(f"\n{len(failing)} page(s) over budget")
+        if '--ci' in args:
+            sys.exit(1)
+    else:
+        print("\n✅ All pages within budget")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Pipelined sync-to-render build for Outlaw Spice.
+
+Running airtable_sync.py and then generate_cms_pages.py is strictly serial:
+every Airtable page is fetched and exported before the first product page is
+rendered from the re-read export. Here the same work runs as asyncio stages
+connected by bounded queues:
+
+  fetch (one producer per table) -> persist + group -> render (process pool)
+
+- Each table is paged through in its own thread (pagination offsets are
+  sequential), so Products, Recipes and Ingredients download side by side.
+- The persist stage appends each Products page to the CSV export as it
+  arrives and groups records by Product Handle. Airtable lists a product's
+  variants together, so a handle is complete as soon as a different handle
+  follows it, and it goes to the render queue right away.
+- Renderers wait for Recipes and Ingredients (the "used in" block needs
+  them), then run create_product_page in a process pool. A full render queue
+  stalls grouping, and a full page queue stalls the fetch.
+- Once everything has arrived, the catalog is updated, the cross-reference
+  index is rebuilt with every product, and pages whose "used in" block came
+  out different (or whose handle showed up again later in the listing) are
+  rendered again, followed by the recipe pages.
+
+Wall time approaches max(fetch, render) instead of their sum. --benchmark
+compares the serial and pipelined builds against mock_airtable.py with
+injected latency. Interrupted runs start over; airtable_sync.py is the
+resumable sync.
+"""
+
+import asyncio
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import airtable_schema
+import airtable_sync
+import build_cache
+import catalog_db
+import cross_reference
+import generate_cms_pages
+import mock_airtable
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+
+# Queue bounds: Airtable pages waiting to be persisted, products waiting per renderer
+PAGE_QUEUE_SIZE = 4
+RENDER_QUEUE_PER_JOB = 4
+
+class FetchError(Exception):
+    """A table couldn't be fetched from Airtable"""
+
+async def fetch_table(table_name, schema, queue):
+    """Put each page of records on `queue` as it arrives, then None"""
+    url = f"{airtable_sync.AIRTABLE_API_URL}/{airtable_sync.AIRTABLE_BASE_ID}/{table_name}"
+    headers = {
+        "Authorization": f"Bearer {airtable_sync.AIRTABLE_TOKEN}",
+        "Content-Type": "application/json"
+    }
+    id_map = airtable_schema.field_map(schema, table_name)
+    offset = None
+    while True:
+        params = {"offset": offset} if offset else {}
+        if id_map:
+            params["returnFieldsByFieldId"] = "true"
+        status, data, text = await asyncio.to_thread(airtable_sync.fetch_page, url, headers, params)
+        if status != 200:
+            raise FetchError(f"{table_name}: Airtable returned {status}: {text[:200]}")
+        records = data.get('records', [])
+        if id_map:
+            for record in records:
+                record['fields'], _ = airtable_schema.remap_fields(record.get('fields', {}), id_map)
+        await queue.put(records)
+        offset = data.get('offset')
+        if not offset:
+            break
+    await queue.put(None)
+
+async def collect_table(table_name, schema):
+    """Fetch a whole (small) table"""
+    queue = asyncio.Queue(PAGE_QUEUE_SIZE)
+    producer = asyncio.create_task(fetch_table(table_name, schema, queue))
+    records = []
+    while (page := await queue.get()) is not None:
+        records.extend(page)
+    await producer
+    return records
+
+class RecipeMatcher:
+    """Provisional "used in" blocks for one product at a time
+
+    Same matching rules as cross_reference.update_index (the product's name
+    and handle as whole words in the recipe text); the final cross-reference
+    pass re-renders any page where the two disagree.
+    """
+
+    def __init__(self, recipes):
+        self.recipes_by_slug = {cross_reference.recipe_slug(r): r for r in recipes}
+        self.texts = [(slug, cross_reference.recipe_text(r)) for slug, r in self.recipes_by_slug.items()]
+
+    def used_in(self, handle, product):
+        patterns = {cross_reference.normalize_text(name) for name in (product.get('Product Name', ''),
+                                                                       handle.replace('-', ' '))}
+        patterns = [p for p in patterns if len(p) >= cross_reference.MIN_PATTERN_LENGTH]
+        if not patterns:
+            return ''
+        matcher = cross_reference.AhoCorasick(patterns)
+        # Plain substring tests first; the word-boundary scan only runs on hits
+        slugs = [slug for slug, text in self.texts
+                 if any(p in text for p in patterns) and matcher.find_words(text)]
+        slugs.sort(key=lambda s: self.recipes_by_slug[s].get('Name', s))
+        return cross_reference.render_used_in(slugs, self.recipes_by_slug)
+
+def product_row(record):
+    """CSV-shaped variant row, as the catalog stores it"""
+    return catalog_db.normalize_fields(record.get('fields', {}), catalog_db.PRODUCT_COLUMNS)
+
+async def group_products(pages, render_queue, build):
+    """Persist Products pages to the CSV export and queue each complete product"""
+    csv_path = os.path.join(build['exports'], 'products.csv')
+    tmp_path = csv_path + '.tmp'
+    current, variants = None, []
+    seen = set()
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=catalog_db.PRODUCT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        while (records := await pages.get()) is not None:
+            for record in records:
+                row = product_row(record)
+                build['product_records'].append((record.get('id'), row))
+                writer.writerow(row)
+                handle = row['Product Handle'].strip()
+                if not handle:
+                    continue
+                if handle != current:
+                    if current and current not in build['late']:
+                        await render_queue.put((current, variants))
+                    if handle in seen:
+                        # Variants weren't listed together; rendered once everything is in
+                        build['late'].add(handle)
+                    seen.add(handle)
+                    current, variants = handle, []
+                variants.append(row)
+        if current and current not in build['late']:
+            await render_queue.put((current, variants))
+    os.replace(tmp_path, csv_path)
+
+async def render_products(render_queue, build, pool):
+    """Render queued products once the recipes are in"""
+    loop = asyncio.get_running_loop()
+    await build['recipes_ready'].wait()
+    while (item := await render_queue.get()) is not None:
+        handle, variants = item
+        product = generate_cms_pages.merge_variants(variants)
+        used_in = build['matcher'].used_in(handle, product)
+        _, stats = await loop.run_in_executor(pool, build_cache.tracked, generate_cms_pages.create_product_page,
+                                              handle, product, build['output'], used_in)
+        build_cache.merge(stats)
+        build['rendered'][handle] = used_in
+        if build['first_render'] is None:
+            build['first_render'] = time.time() - build['started']
+
+def store_catalog(build):
+    """Write everything fetched to the catalog (runs in a thread)"""
+    if not build['catalog']:
+        return
+    conn = catalog_db.connect()
+    try:
+        catalog_db.store_products(conn, build['product_records'])
+        catalog_db.store_recipes(conn, build['recipe_records'])
+        catalog_db.store_ingredients(conn, build['ingredient_records'])
+    finally:
+        conn.close()
+
+async def run_build(schema, output_dir, exports_dir, jobs, overlap=True, catalog=True):
+    """Fetch, persist and render; returns the build state with timings
+
+    With overlap=False the stages run one after another (the serial build),
+    for comparison.
+    """
+    build = {
+        'started': time.time(), 'output': output_dir, 'exports': exports_dir, 'catalog': catalog,
+        'product_records': [], 'recipe_records': [], 'ingredient_records': [],
+        'late': set(), 'rendered': {}, 'first_render': None,
+        'recipes_ready': asyncio.Event(), 'matcher': None,
+    }
+    os.makedirs(exports_dir, exist_ok=True)
+    pages = asyncio.Queue(PAGE_QUEUE_SIZE)
+    render_queue = asyncio.Queue(RENDER_QUEUE_PER_JOB * jobs if overlap else 0)
+
+    async def fetch_small_tables():
+        recipes = await collect_table(airtable_sync.RECIPES_TABLE, schema)
+        ingredients = await collect_table(airtable_sync.INGREDIENTS_TABLE, schema)
+        build['recipe_records'] = [(r.get('id'), r.get('fields', {})) for r in recipes]
+        build['ingredient_records'] = [(r.get('id'), r.get('fields', {})) for r in ingredients]
+        build['recipes'] = [row for row in (catalog_db.normalize_fields(fields, catalog_db.RECIPE_COLUMNS)
+                                            for _, fields in build['recipe_records']) if row.get('Name')]
+        build['ingredients'] = {}
+        for _, fields in build['ingredient_records']:
+            row = catalog_db.normalize_fields(fields, [])
+            if row.get('Name', '').strip():
+                build['ingredients'][row['Name'].strip()] = row
+        build['matcher'] = RecipeMatcher(build['recipes'])
+        build['recipes_ready'].set()
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        renderers = [asyncio.create_task(render_products(render_queue, build, pool)) for _ in range(jobs)]
+        if overlap:
+            await asyncio.gather(fetch_table(airtable_sync.PRODUCTS_TABLE, schema, pages),
+                                 group_products(pages, render_queue, build),
+                                 fetch_small_tables())
+        else:
+            # Serial: one table after another; renderers start when the last one is in
+            await asyncio.gather(fetch_table(airtable_sync.PRODUCTS_TABLE, schema, pages),
+                                 group_products(pages, render_queue, build))
+            await fetch_small_tables()
+        build['fetched'] = time.time() - build['started']
+        for _ in renderers:
+            await render_queue.put(None)
+        await asyncio.gather(*renderers)
+
+        # Everything is in: catalog, authoritative cross-reference, fix-ups, recipes
+        await asyncio.to_thread(store_catalog, build)
+        with open(os.path.join(exports_dir, 'recipes.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=catalog_db.RECIPE_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            for _, fields in build['recipe_records']:
+                writer.writerow(catalog_db.normalize_fields(fields, catalog_db.RECIPE_COLUMNS))
+
+        grouped = {}
+        for _, row in build['product_records']:
+            if row['Product Handle'].strip():
+                grouped.setdefault(row['Product Handle'].strip(), []).append(row)
+        products = {handle: generate_cms_pages.merge_variants(variants) for handle, variants in grouped.items()}
+        xref = cross_reference.update_index(products, build['recipes'], build['ingredients'],
+                                            os.path.join(exports_dir, 'xref_index.json'))
+        redo = sorted(h for h in products
+                      if h in build['late'] or build['rendered'].get(h) != xref['used_in'].get(h, ''))
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(pool, build_cache.tracked, generate_cms_pages.create_product_page, handle,
+                                 products[handle], output_dir, xref['used_in'].get(handle, ''))
+            for handle in redo
+        ], *[
+            loop.run_in_executor(pool, build_cache.tracked, generate_cms_pages.create_recipe_page, recipe,
+                                 output_dir, xref['featured'].get(cross_reference.recipe_slug(recipe), ''))
+            for recipe in build['recipes']
+        ])
+        for _, stats in results:
+            build_cache.merge(stats)
+        cross_reference.save_index(xref['index'], os.path.join(exports_dir, 'xref_index.json'))
+
+    build['redone'] = redo
+    build['products'] = len(products)
+    build['elapsed'] = time.time() - build['started']
+    return build
+
+def report(label, build):
+    first = f"{build['first_render']:.2f}s" if build['first_render'] is not None else 'n/a'
+    print(f"   {label}: {build['elapsed']:.2f}s total, fetch done at {build['fetched']:.2f}s, "
+          f"first page at {first}, {build['products']} products ({len(build['redone'])} re-rendered)")
+
+def benchmark(num_products, latency, jobs):
+    """Serial vs pipelined build against the local mock; prints the timings"""
+    state = mock_airtable.MockAirtable(mock_airtable.synthetic_tables(num_products), latency=latency)
+    server = mock_airtable.serve(state, port=0)
+    airtable_sync.AIRTABLE_API_URL = f"http://127.0.0.1:{server.server_address[1]}/v0"
+    airtable_sync.AIRTABLE_BASE_ID = 'appMock'
+    print(f"⏱️  {num_products} products x 3 variants, {latency:g}s latency per request, {jobs} render job(s)")
+    # Both builds render every page; cache hits would skew the comparison
+    os.environ[build_cache.ENV_VAR] = 'off'
+    work_dir = tempfile.mkdtemp(prefix='pipeline-bench-')
+    stdout = sys.stdout
+    try:
+        results = {}
+        for label, overlap in (('serial', False), ('pipelined', True)):
+            output = os.path.join(work_dir, label)
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                results[label] = asyncio.run(run_build(None, output, os.path.join(output, 'exports'), jobs,
+                                                       overlap=overlap, catalog=False))
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            report(label, results[label])
+        pages = {label: sorted(os.listdir(os.path.join(work_dir, label, 'products'))) for label in results}
+        same = pages['serial'] == pages['pipelined'] and all(
+            open(os.path.join(work_dir, 'serial', 'products', p), 'rb').read() ==
+            open(os.path.join(work_dir, 'pipelined', 'products', p), 'rb').read()
+            for p in pages['serial'])
+        print(f"   Speedup: {results['serial']['elapsed'] / results['pipelined']['elapsed']:.2f}x; "
+              f"product pages identical: {'yes' if same else 'NO'}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main():
+    """Pipelined sync + page generation
+
+    Usage: pipeline_build.py [--jobs N] [--refresh-schema]
+           pipeline_build.py --benchmark [--products N] [--latency SECONDS] [--jobs N]
+    """
+    jobs = os.cpu_count() or 1
+    if '--jobs' in sys.argv:
+        jobs = int(sys.argv[sys.argv.index('--jobs') + 1])
+    if '--benchmark' in sys.argv:
+        products = int(sys.argv[sys.argv.index('--products') + 1]) if '--products' in sys.argv else 300
+        latency = float(sys.argv[sys.argv.index('--latency') + 1]) if '--latency' in sys.argv else 0.2
+        benchmark(products, latency, jobs)
+        return
+
+    print("=" * 60)
+    print("OUTLAW SPICE - PIPELINED SYNC + BUILD")
+    print("=" * 60)
+    if not airtable_sync.AIRTABLE_BASE_ID:
+        print("\n⚠️  SETUP REQUIRED: set base_id in airtable_config.json")
+        return
+    schema = airtable_sync.test_connection(airtable_sync.AIRTABLE_BASE_ID, refresh='--refresh-schema' in sys.argv)
+    if not schema:
+        return
+    drift = airtable_schema.check_drift(schema, {
+        'products_table': airtable_sync.PRODUCTS_TABLE,
+        'recipes_table': airtable_sync.RECIPES_TABLE,
+    })
+    if drift:
+        print("\n❌ Airtable schema drift detected:")
+        for table_name, missing in drift.items():
+            print(f"   - {table_name}: missing {', '.join(missing)}")
+        return
+
+    try:
+        build = asyncio.run(run_build(schema, generate_cms_pages.OUTPUT_DIR, AIRTABLE_EXPORTS, jobs))
+    except FetchError as e:
+        print(f"❌ {e}")
+        print("   Nothing was written to the catalog; re-run (or use airtable_sync.py to resume)")
+        sys.exit(1)
+    print()
+    report('Build', build)
+    print(f"\n✅ {build['products']} product pages and {len(build['recipes'])} recipe pages written; "
+          f"catalog and CSV exports updated")
+    build_cache.report()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Blurred low-quality placeholders (LQIP) for product and recipe imagery.
+
+Grid cards, slider slides and recipe grid items (img-2, product-image,
+product-item-image) show an empty box until the full image arrives. For every
+such <img> whose src is a local file this makes a ~20px-wide blurred WebP,
+inlines it as the image's background (so the blur shows while the real image
+loads) and tags the tag with data-lqip. js/lqip.js drops the background once
+the image has loaded so transparent PNGs don't keep the blur behind them.
+
+Placeholders are cached by image content hash in airtable_exports/lqip_cache.json
+(with each file's size/mtime, so unchanged images aren't even re-read) and
+in the shared build cache (build_cache.py), so only images no machine has
+seen yet are thumbnailed, in parallel.
+
+Needs Pillow (`pip install Pillow`); without it the stage is skipped.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import build_cache
+
+try:
+    from PIL import Image, ImageFilter
+except ImportError:
+    Image = None
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(BASE_DIR, 'airtable_exports', 'lqip_cache.json')
+SWAP_SCRIPT = os.path.join('js', 'lqip.js')
+
+PLACEHOLDER_CLASSES = {'img-2', 'product-image', 'product-item-image'}
+PLACEHOLDER_WIDTH = 20
+BLUR_RADIUS = 1
+
+IMG_TAG = re.compile(r'<img\b[^>]*>')
+LQIP_STYLE = re.compile(r'background-image:url\(data:image/[a-z]+;base64,[^)]*\);'
+                        r'background-size:cover;background-position:center;?')
+
+SWAP_JS = """(function () {
+  function clear(img) {
+    img.style.backgroundImage = '';
+    img.removeAttribute('data-lqip');
+  }
+  document.querySelectorAll('img[data-lqip]').forEach(function (img) {
+    if (img.complete && img.naturalWidth) {
+      clear(img);
+    } else {
+      img.addEventListener('load', function () { clear(img); }, {once: true});
+    }
+  });
+})();
+"""
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def make_placeholder(path):
+    """Data URI of a tiny blurred copy of an image (runs in a worker process)"""
+    with Image.open(path) as image:
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+        image = image.resize((PLACEHOLDER_WIDTH, height), Image.LANCZOS).filter(ImageFilter.GaussianBlur(BLUR_RADIUS))
+    buffer = io.BytesIO()
+    try:
+        image.save(buffer, 'WEBP', quality=40)
+        mime = 'image/webp'
+    except (KeyError, OSError):
+        # Pillow built without WebP support
+        buffer = io.BytesIO()
+        image.convert('RGB').save(buffer, 'JPEG', quality=40)
+        mime = 'image/jpeg'
+    return f'data:{mime};base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def timed_placeholder(path):
+    """(data URI, seconds taken) for make_placeholder in a worker"""
+    started = time.perf_counter()
+    return make_placeholder(path), time.perf_counter() - started
+
+def shared_key(digest):
+    """Build cache key of an image's placeholder"""
+    return build_cache.key('lqip', digest, PLACEHOLDER_WIDTH, BLUR_RADIUS, Image.__version__,
+                           build_cache.source_hash(sys.modules[__name__]))
+
+def load_cache():
+    if os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'files': {}, 'placeholders': {}}
+
+def save_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp_path = CACHE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, CACHE_FILE)
+
+def get_attr(tag, name):
+    match = re.search(r'\s' + name + r'="([^"]*)"', tag)
+    return match.group(1) if match else None
+
+def image_refs(html, page):
+    """Site-relative paths of local images that should get a placeholder"""
+    refs = []
+    for match in IMG_TAG.finditer(html):
+        tag = match.group(0)
+        src = get_attr(tag, 'src') or ''
+        if not (set((get_attr(tag, 'class') or '').split()) & PLACEHOLDER_CLASSES):
+            continue
+        if not src or re.match(r'^[a-z]+:|^//', src):
+            continue
+        refs.append(os.path.normpath(os.path.join(os.path.dirname(page), src.split('?')[0])))
+    return refs
+
+def apply_placeholders(html, page, placeholders):
+    """Set the inline background and data-lqip on each matching <img>"""
+    def replace(match):
+        tag = match.group(0)
+        src = get_attr(tag, 'src') or ''
+        if not (set((get_attr(tag, 'class') or '').split()) & PLACEHOLDER_CLASSES):
+            return tag
+        path = os.path.normpath(os.path.join(os.path.dirname(page), src.split('?')[0])) if src else None
+        entry = placeholders.get(path)
+        style = LQIP_STYLE.sub('', get_attr(tag, 'style') or '')
+        tag = re.sub(r'\s(?:style|data-lqip)="[^"]*"', '', tag)
+        if entry:
+            uri, digest = entry
+            style = (f'background-image:url({uri});background-size:cover;'
+                     f'background-position:center;' + style)
+            tag = tag[:-1].rstrip('/').rstrip() + f' style="{style}" data-lqip="{digest[:12]}">'
+        elif style:
+            tag = tag[:-1].rstrip('/').rstrip() + f' style="{style}">'
+        return tag
+    html = IMG_TAG.sub(replace, html)
+
+    prefix = '../' * page.count('/')
+    has_script = 'js/lqip.js' in html
+    if 'data-lqip=' in html and not has_script:
+        at = html.rfind('</body>')
+        html = html[:at] + f'<script src="{prefix}{SWAP_SCRIPT}" type="text/javascript" defer></script>\n' + html[at:]
+    elif 'data-lqip=' not in html and has_script:
+        html = re.sub(r'<script src="[^"]*js/lqip\.js"[^>]*></script>\n?', '', html)
+    return html
+
+def site_pages(site_dir):
+    """HTML pages at the site root and in products/ and recipes/"""
+    pages = []
+    for folder in ['', 'products', 'recipes']:
+        path = os.path.join(site_dir, folder)
+        if os.path.isdir(path):
+            pages += sorted(os.path.join(folder, f) for f in os.listdir(path) if f.endswith('.html'))
+    return pages
+
+def main():
+    """Compute placeholders for new/changed images and rewrite pages
+
+    Usage: placeholders.py [--site DIR] [--jobs N]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    jobs = None
+    if '--jobs' in sys.argv:
+        jobs = int(sys.argv[sys.argv.index('--jobs') + 1])
+    if Image is None:
+        print("⚠️  Pillow isn't installed (pip install Pillow); skipping image placeholders")
+        return
+
+    pages = {}
+    refs = set()
+    for page in site_pages(site_dir):
+        with open(os.path.join(site_dir, page), 'r', encoding='utf-8') as f:
+            pages[page] = f.read()
+        refs.update(image_refs(pages[page], page))
+
+    # Content hash per image, re-reading only files whose size/mtime changed
+    cache = load_cache()
+    hashes = {}
+    for ref in sorted(refs):
+        path = os.path.join(site_dir, ref)
+        if not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        known = cache['files'].get(ref)
+        if known and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime_ns:
+            hashes[ref] = known['hash']
+        else:
+            hashes[ref] = file_hash(path)
+            cache['files'][ref] = {'hash': hashes[ref], 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    todo = {}
+    for ref, digest in hashes.items():
+        if digest in cache['placeholders'] or digest in todo:
+            continue
+        # Another machine may have made it already
+        shared = build_cache.get('lqip', shared_key(digest))
+        if shared is not None:
+            cache['placeholders'][digest] = shared.decode('ascii')
+        else:
+            todo[digest] = os.path.join(site_dir, ref)
+    if todo:
+        print(f"🖼️  Making {len(todo)} placeholder(s)...")
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            digests = list(todo)
+            for digest, (uri, seconds) in zip(digests, pool.map(timed_placeholder, [todo[d] for d in digests])):
+                cache['placeholders'][digest] = uri
+                build_cache.put('lqip', shared_key(digest), uri.encode('ascii'), seconds)
+    save_cache(cache)
+
+    placeholders = {ref: (cache['placeholders'][digest], digest) for ref, digest in hashes.items()}
+    with open(os.path.join(site_dir, SWAP_SCRIPT), 'w', encoding='utf-8') as f:
+        f.write(SWAP_JS)
+    changed = 0
+    for page, html in pages.items():
+        updated = apply_placeholders(html, page, placeholders)
+        if updated != html:
+            with open(os.path.join(site_dir, page), 'w', encoding='utf-8') as f:
+                f.write(updated)
+            changed += 1
+
+    sizes = [len(uri) for uri, _ in placeholders.values()]
+    average = sum(sizes) // len(sizes) if sizes else 0
+    print(f"✅ {len(placeholders)} image(s) with placeholders ({len(todo)} new, ~{average} bytes inline each); "
+          f"updated {changed} page(s)")
+    build_cache.report()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Per-page post-processing stages that run after pages are (re)generated.
+
+sync_from_airtable.sh runs them as steps 6-15 after a full build, and
+rebuild_daemon.py runs the same list after every webhook rebuild, so pages
+the daemon regenerates get the same script chunks, sprite, resource hints,
+speculation rules, placeholders and so on as the rest of the site instead of
+waiting for the next full sync.
+
+Every stage works on the whole site and only rewrites what changed, so a
+run after a small rebuild is cheap. A failing stage is reported and the
+next one still runs, as in the shell script.
+"""
+
+import os
+import subprocess
+import sys
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Step number in sync_from_airtable.sh of the first stage
+FIRST_STEP = 6
+
+# (script, emoji, what it does), in order. vendor_scripts.py is left out until
+# every js/vendor/manifest.json entry has its published hash pinned and its copy
+# committed: it refuses to run before that, which would fail every build.
+STAGES = [
+    ('split_webflow_js.py', '✂️  ', 'Splitting webflow.js into per-page chunks'),
+    ('font_usage.py', '🔤 ', 'Trimming web fonts to the faces in use'),
+    ('svg_sprite.py', '🧩 ', 'Building the SVG icon sprite'),
+    ('image_store.py', '🗃️  ', 'Deduplicating images into the content-addressed store'),
+    ('video_loading.py', '🎬 ', 'Loading background videos only when in view'),
+    ('resource_hints.py', '🚀 ', 'Adding resource hints and Early Hints headers'),
+    ('speculation_rules.py', '🔮 ', 'Adding prefetch/prerender rules from the link graph'),
+    ('placeholders.py', '🖼️  ', 'Adding blurred image placeholders'),
+    ('service_worker.py', '🗂️  ', 'Generating service worker and precache manifest'),
+    ('check_links.py', '🔗 ', 'Checking links and assets'),
+]
+
+def run(site_dir=None):
+    """Run every stage in order; returns the scripts that failed"""
+    args = ['--site', site_dir] if site_dir else []
+    failed = []
+    for step, (script, emoji, label) in enumerate(STAGES, FIRST_STEP):
+        print(f"\n{emoji}Step {step}: {label}...", flush=True)
+        result = subprocess.run([sys.executable, os.path.join(BASE_DIR, script)] + args, cwd=BASE_DIR)
+        if result.returncode != 0:
+            print(f"⚠️  {script} failed (exit {result.returncode})")
+            failed.append(script)
+    return failed
+
+def main():
+    """Run the post-processing stages
+
+    Usage: post_build.py [--site DIR]
+    """
+    site_dir = None
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    if run(site_dir):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
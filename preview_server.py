@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Local preview server for the generated site.
+
+Serves the build output roughly the way Cloudflare Pages does, so it can be
+load-tested (load_test.py) before pushing:
+
+- pretty URLs (/products/roadhouse-rub -> products/roadhouse-rub.html) and
+  404.html for anything missing
+- precompressed siblings (page.html.br, page.html.gz) picked by
+  Accept-Encoding; --precompress writes them for text assets first (.br only
+  if the brotli module is installed)
+- strong ETags from a content hash of the bytes sent, and 304 Not Modified
+  for matching If-None-Match
+- the rules in the site's _headers file (URL patterns with * and :name
+  placeholders, `! Header` to detach a header)
+- HTTP/1.1 keep-alive
+
+File hashes and bodies are cached by path, size and mtime, so a rebuild
+shows up on the next request.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import build_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HEADERS_FILE = '_headers'
+NOT_FOUND_PAGE = '404.html'
+
+DEFAULT_PORT = 8080
+
+# Text assets worth precompressing
+COMPRESSIBLE = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml', '.webmanifest'}
+# Compressor settings, part of the build cache key
+COMPRESSION_LEVELS = {'.gz': 'gzip-9', '.br': 'brotli-11'}
+# Served as file.br / file.gz when the client accepts them, best first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Not part of the site when previewing the repository itself
+HIDDEN_DIRS = {'.git', 'airtable_exports', '__pycache__', 'node_modules'}
+
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+mimetypes.add_type('text/javascript', '.js')
+
+def parse_headers_file(path):
+    """Cloudflare Pages `_headers` rules as [(regex, [(name, value), ...], [detached names])]"""
+    rules = []
+    if not os.path.exists(path):
+        return rules
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped or stripped.startswith('#'):
+                continue
+            if not line[0].isspace():
+                pattern = re.escape(stripped).replace(r'\*', '.*')
+                pattern = re.sub(r'\\?:(\w+)', r'[^/]+', pattern)
+                rules.append((re.compile(f'^{pattern}$'), [], []))
+            elif rules and stripped.startswith('!'):
+                rules[-1][2].append(stripped[1:].strip().lower())
+            elif rules and ':' in stripped:
+                name, _, value = stripped.partition(':')
+                rules[-1][1].append((name.strip(), value.strip()))
+    return rules
+
+def rule_headers(rules, paths):
+    """Headers the rules add for a request; a header set by several rules is comma-joined"""
+    merged = {}
+    detached = set()
+    for pattern, headers, removed in rules:
+        if not any(pattern.match(path) for path in paths):
+            continue
+        for name, value in headers:
+            key = name.lower()
+            if key in merged:
+                merged[key] = (merged[key][0], merged[key][1] + ', ' + value)
+            else:
+                merged[key] = (name, value)
+        detached.update(removed)
+    return [header for key, header in merged.items() if key not in detached]
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0)"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        q = re.search(r'q=([\d.]+)', params)
+        if coding and (not q or float(q.group(1)) > 0):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+def pretty_url(rel):
+    """URL Cloudflare Pages serves an .html file at"""
+    path = '/' + rel
+    if path.endswith('/index.html'):
+        return path[:-len('index.html')]
+    if path.endswith('.html'):
+        return path[:-len('.html')]
+    return path
+
+class SiteFiles:
+    """Path resolution plus a (size, mtime)-validated cache of bodies and ETags"""
+
+    def __init__(self, site_dir):
+        self.site_dir = site_dir
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.headers_stat = None
+        self.rules = []
+
+    def resolve(self, url_path):
+        """Site-relative file for a request path, trying pretty URLs; None if missing"""
+        path = posixpath.normpath(unquote(url_path))
+        parts = [p for p in path.split('/') if p]
+        if any(p.startswith('.') or p in HIDDEN_DIRS for p in parts):
+            return None
+        rel = '/'.join(parts)
+        if url_path.endswith('/'):
+            candidates = [posixpath.join(rel, 'index.html')]
+        else:
+            candidates = [rel, rel + '.html', posixpath.join(rel, 'index.html')]
+        for candidate in candidates:
+            if candidate and os.path.isfile(os.path.join(self.site_dir, candidate)):
+                return candidate
+        return None
+
+    def load(self, rel):
+        """(body, etag) for a site-relative file"""
+        full = os.path.join(self.site_dir, rel)
+        stat = os.stat(full)
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            cached = self.cache.get(rel)
+        if cached and cached[0] == key:
+            return cached[1], cached[2]
+        with open(full, 'rb') as f:
+            body = f.read()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        with self.lock:
+            self.cache[rel] = (key, body, etag)
+        return body, etag
+
+    def header_rules(self):
+        """_headers rules, re-read whenever the file changes"""
+        path = os.path.join(self.site_dir, HEADERS_FILE)
+        stat = os.stat(path) if os.path.exists(path) else None
+        current = (stat.st_size, stat.st_mtime_ns) if stat else None
+        if current != self.headers_stat:
+            self.rules = parse_headers_file(path)
+            self.headers_stat = current
+        return self.rules
+
+def make_handler(files):
+    """Request handler class bound to a SiteFiles instance"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        server_version = 'OutlawPreview'
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; don't let Nagle hold the body back
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, format, *args):
+            if '--verbose' in sys.argv:
+                super().log_message(format, *args)
+
+        def do_GET(self):
+            self.respond(send_body=True)
+
+        def do_HEAD(self):
+            self.respond(send_body=False)
+
+        def respond(self, send_body):
+            url_path = urlsplit(self.path).path
+            rel = files.resolve(url_path)
+            status = 200
+            if rel is None:
+                status = 404
+                rel = NOT_FOUND_PAGE if os.path.isfile(os.path.join(files.site_dir, NOT_FOUND_PAGE)) else None
+            if rel is None:
+                self.send_bytes(404, b'Not Found', [('Content-Type', 'text/plain; charset=utf-8')], send_body)
+                return
+
+            content_type = mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type in ('application/json', 'image/svg+xml'):
+                content_type += '; charset=utf-8'
+            headers = [('Content-Type', content_type)]
+
+            # Pick the best precompressed sibling the client accepts
+            served = rel
+            has_siblings = False
+            accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+            for coding, suffix in ENCODINGS:
+                if os.path.isfile(os.path.join(files.site_dir, rel + suffix)):
+                    has_siblings = True
+                    if coding in accepted and served == rel:
+                        served = rel + suffix
+                        headers.append(('Content-Encoding', coding))
+            if has_siblings:
+                headers.append(('Vary', 'Accept-Encoding'))
+
+            body, etag = files.load(served)
+            headers.append(('ETag', etag))
+            headers += rule_headers(files.header_rules(), {url_path, pretty_url(rel)})
+
+            if status == 200 and etag_matches(self.headers.get('If-None-Match'), etag):
+                self.send_bytes(304, b'', headers, False)
+                return
+            self.send_bytes(status, body, headers, send_body)
+
+        def send_bytes(self, status, body, headers, send_body):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            if status != 304:
+                self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if send_body and body:
+                self.wfile.write(body)
+
+    return Handler
+
+def etag_matches(header, etag):
+    """If-None-Match comparison (weak, as RFC 9110 specifies for it)"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+def precompress(site_dir):
+    """Write .gz (and .br with the brotli module) next to text assets that changed"""
+    written = 0
+    for root, dirs, names in os.walk(site_dir):
+        dirs[:] = [d for d in dirs if d not in HIDDEN_DIRS and not d.startswith('.')]
+        for name in names:
+            if os.path.splitext(name)[1] not in COMPRESSIBLE:
+                continue
+            full = os.path.join(root, name)
+            mtime = os.path.getmtime(full)
+            codecs = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+            if brotli is not None:
+                codecs.append(('.br', lambda data: brotli.compress(data, quality=11)))
+            data = None
+            for suffix, compress in codecs:
+                target = full + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                    continue
+                if data is None:
+                    with open(full, 'rb') as f:
+                        data = f.read()
+                    content = hashlib.sha256(data).hexdigest()
+                # Keyed by content, so an unchanged file compressed anywhere is reused
+                digest = build_cache.key('compressed', suffix, content, COMPRESSION_LEVELS[suffix])
+                compressed = build_cache.get('compressed', digest)
+                if compressed is None:
+                    started = time.perf_counter()
+                    compressed = compress(data)
+                    build_cache.put('compressed', digest, compressed, time.perf_counter() - started)
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+def serve(site_dir, host='127.0.0.1', port=DEFAULT_PORT):
+    """Start the server in a background thread and return it"""
+    server = ThreadingHTTPServer((host, port), make_handler(SiteFiles(site_dir)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    """Serve the site until interrupted
+
+    Usage: preview_server.py [--site DIR] [--port N] [--precompress] [--verbose]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    port = DEFAULT_PORT
+    if '--port' in sys.argv:
+        port = int(sys.argv[sys.argv.index('--port') + 1])
+    if '--precompress' in sys.argv:
+        if brotli is None:
+            print("⚠️  brotli isn't installed (pip install brotli); writing .gz siblings only")
+        print(f"🗜️  Precompressed {precompress(site_dir)} file(s)")
+        build_cache.report()
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(SiteFiles(site_dir)))
+    server.daemon_threads = True
+    print(f"🌐 Previewing {site_dir} on http://127.0.0.1:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
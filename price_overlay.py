@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Runtime price and inventory overlay.
+
+Price and stock change more often than anything else, but with them baked
+into the HTML every price edit changes product pages and forces a redeploy
+and cache purge. With `"price_overlay": true` in airtable_config.json:
+
+- create_product_page (and the grid cards) write stable placeholders,
+  `<div data-price="<handle>">` and `<div data-stock="<handle>">`, instead of
+  the price, and variant JSON leaves the price columns out
+- this script writes prices.json from the catalog/CSV snapshot:
+  {"prices": {handle: [[price, compare-at, inventory], ...one per variant]}}
+  (inventory is null when not tracked)
+- js/price-overlay.js fetches it and fills the placeholders, follows the
+  variant selector, and marks products with no stock left as sold out
+
+Catalogs over SHARD_THRESHOLD products are split by handle prefix into
+prices/<prefix>.json; prices.json then only says how, and a page fetches
+just the shards for the handles on it. Both get a short Cache-Control in
+_headers.
+
+A price-only change in Airtable then rewrites prices.json (or one shard) and
+leaves all HTML byte-identical. Files are only rewritten when their content
+changes.
+"""
+
+import json
+import os
+import re
+import sys
+from html import escape
+
+import resource_hints
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BASE_DIR, 'airtable_config.json')
+PRICES_FILE = 'prices.json'
+SHARD_DIR = 'prices'
+OVERLAY_SCRIPT = os.path.join('js', 'price-overlay.js')
+HEADERS_FILE = '_headers'
+HEADERS_BEGIN = '# BEGIN price overlay (generated by price_overlay.py)'
+HEADERS_END = '# END price overlay'
+
+# Columns served from prices.json instead of the HTML
+OVERLAY_FIELDS = ['Variant Price', 'Variant Compare-at Price', 'Variant Inventory']
+
+# Shard when the catalog has more products than this, by this many handle characters
+SHARD_THRESHOLD = 1000
+SHARD_CHARS = 1
+
+# Browsers and the CDN may reuse prices for this long (revalidating in the background after)
+PRICES_MAX_AGE = 60
+
+OVERLAY_JS = """(function () {
+  var script = document.currentScript;
+  var url = script && script.getAttribute('data-prices');
+  var nodes = document.querySelectorAll('[data-price], [data-stock]');
+  if (!url || !nodes.length) return;
+  var base = url.replace(/[^\\/]*$/, '');
+  var prices = null;
+  function getJson(href) {
+    return fetch(href).then(function (response) { return response.ok ? response.json() : null; });
+  }
+  function handleOf(node) {
+    return node.getAttribute('data-price') || node.getAttribute('data-stock');
+  }
+  function variantIndex(node) {
+    var form = node.closest('form');
+    return form && form.hasAttribute('data-variant-index') ? +form.getAttribute('data-variant-index') : 0;
+  }
+  function apply() {
+    if (!prices) return;
+    nodes.forEach(function (node) {
+      var variants = prices[handleOf(node)];
+      if (!variants) return;
+      var variant = variants[variantIndex(node)] || variants[0];
+      if (node.hasAttribute('data-price')) {
+        node.textContent = variant[0];
+      } else {
+        var soldOut = variant[2] !== null && variant[2] <= 0;
+        node.textContent = soldOut ? 'Sold out' : '';
+        var form = node.closest('form');
+        if (form) {
+          form.querySelectorAll('.is-add-to-cart-button, .is-buy-now-button').forEach(function (button) {
+            button.classList.toggle('is-sold-out', soldOut);
+            button.setAttribute('aria-disabled', soldOut ? 'true' : 'false');
+          });
+        }
+      }
+    });
+  }
+  getJson(url).then(function (index) {
+    if (!index || !index.shard) return index && index.prices;
+    var shards = {};
+    nodes.forEach(function (node) {
+      shards[handleOf(node).slice(0, index.shard).toLowerCase().replace(/[^a-z0-9]/g, '_')] = true;
+    });
+    return Promise.all(Object.keys(shards).map(function (key) {
+      return getJson(base + index.dir + '/' + key + '.json');
+    })).then(function (parts) {
+      return parts.reduce(function (all, part) {
+        Object.keys(part || {}).forEach(function (handle) { all[handle] = part[handle]; });
+        return all;
+      }, {});
+    });
+  }).then(function (loaded) {
+    prices = loaded;
+    apply();
+  }).catch(function () {});
+  document.addEventListener('variantchange', apply);
+})();
+"""
+
+def enabled(path=CONFIG_FILE):
+    """True when airtable_config.json turns the overlay on"""
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return bool(json.load(f).get('price_overlay'))
+    except (OSError, ValueError):
+        return False
+
+def shard_key(handle):
+    return re.sub(r'[^a-z0-9]', '_', handle[:SHARD_CHARS].lower()) or '_'
+
+def inventory(value):
+    """Stock level as an int, or None when the variant doesn't track it"""
+    value = (value or '').strip()
+    try:
+        return int(float(value)) if value else None
+    except ValueError:
+        return None
+
+def price_entry(product):
+    """[[price, compare-at, inventory], ...] in variant order"""
+    return [[variant.get('Variant Price', '') or '', variant.get('Variant Compare-at Price', '') or '',
+             inventory(variant.get('Variant Inventory'))]
+            for variant in product.get('variants', [product])]
+
+def without_prices(product):
+    """A merged product less the overlay columns, for change detection"""
+    strip = lambda row: {k: v for k, v in row.items() if k not in OVERLAY_FIELDS and k != 'variants'}
+    return dict(strip(product), variants=[strip(v) for v in product.get('variants', [])])
+
+def placeholder(handle, cls='text-weight-semibold', attrs=''):
+    """Price placeholder markup filled in by js/price-overlay.js"""
+    return f'<div class="{cls}"{attrs} data-price="{escape(handle)}"></div>'
+
+def stock_placeholder(handle):
+    return f'<div class="text-size-tiny" data-stock="{escape(handle)}"></div>'
+
+def script_tag(prefix):
+    return (f'<script src="{prefix}{OVERLAY_SCRIPT}" data-prices="{prefix}{PRICES_FILE}" '
+            f'type="text/javascript" defer></script>')
+
+def write_if_changed(path, data):
+    """Write `data` unless the file already holds it; True if written"""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == data:
+                return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def dump(value):
+    return json.dumps(value, separators=(',', ':'), sort_keys=True, ensure_ascii=False)
+
+def write_prices(site_dir, products):
+    """Write prices.json (and shards); returns (products, files written, shards)"""
+    prices = {handle: price_entry(product) for handle, product in products}
+    written = 0
+    shard_dir = os.path.join(site_dir, SHARD_DIR)
+    shards = {}
+    if len(prices) > SHARD_THRESHOLD:
+        for handle, entry in prices.items():
+            shards.setdefault(shard_key(handle), {})[handle] = entry
+        for key, part in shards.items():
+            written += write_if_changed(os.path.join(shard_dir, f'{key}.json'), dump(part))
+        written += write_if_changed(os.path.join(site_dir, PRICES_FILE),
+                                    dump({'shard': SHARD_CHARS, 'dir': SHARD_DIR}))
+    else:
+        written += write_if_changed(os.path.join(site_dir, PRICES_FILE), dump({'prices': prices}))
+    # Shards of prefixes that no longer exist (or all of them, once unsharded)
+    if os.path.isdir(shard_dir):
+        for name in os.listdir(shard_dir):
+            if name.endswith('.json') and name[:-len('.json')] not in shards:
+                os.remove(os.path.join(shard_dir, name))
+    return len(prices), written, len(shards)
+
+def write_headers(site_dir):
+    """Add (or refresh) the short caching rule for the price files in _headers"""
+    rule = f'  Cache-Control: public, max-age={PRICES_MAX_AGE}, stale-while-revalidate={PRICES_MAX_AGE * 5}'
+    resource_hints.write_managed_block(os.path.join(site_dir, HEADERS_FILE), HEADERS_BEGIN, HEADERS_END,
+                                       '\n'.join(['/' + PRICES_FILE, rule, '/' + SHARD_DIR + '/*', rule]))
+
+def main():
+    """Write prices.json from the current snapshot
+
+    Usage: price_overlay.py [--site DIR]
+    """
+    import generate_cms_pages
+
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    if not enabled():
+        print("ℹ️  Price overlay is off (set \"price_overlay\": true in airtable_config.json)")
+        return
+
+    write_if_changed(os.path.join(site_dir, OVERLAY_SCRIPT), OVERLAY_JS)
+    count, written, shards = write_prices(site_dir, generate_cms_pages.iter_products())
+    write_headers(site_dir)
+    layout = f"{shards} shard(s) in {SHARD_DIR}/" if shards else PRICES_FILE
+    print(f"✅ Prices for {count} product(s) in {layout}; {written} file(s) changed")
+
+if __name__ == '__main__':
+    main()
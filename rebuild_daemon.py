@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Webhook-driven rebuild daemon for Outlaw Spice.
+Listens for Airtable webhook notifications, pulls the changed records through
+the webhook payload cursor, batches bursts of edits, and regenerates only the
+pages that depend on the changed records.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import airtable_schema
+import airtable_sync
+import catalog_db
+import cross_reference
+import post_build
+import price_overlay
+import variant_matrix
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+STATE_FILE = os.path.join(AIRTABLE_EXPORTS, "webhook_state.json")
+
+config = airtable_sync.config or {}
+WEBHOOK_ID = config.get('webhook_id', '')
+WEBHOOK_MAC_SECRET = config.get('webhook_mac_secret', '')
+# Loopback only by default: the endpoint has no auth beyond the optional MAC,
+# so expose it through a reverse proxy or set daemon_host deliberately
+DAEMON_HOST = config.get('daemon_host', '127.0.0.1')
+DAEMON_PORT = config.get('daemon_port', 8787)
+# Wait for this many quiet seconds before rebuilding, but never longer than the max
+DEBOUNCE_SECONDS = config.get('debounce_seconds', 5)
+MAX_BATCH_SECONDS = config.get('max_batch_seconds', 30)
+
+# Product fields shown on shared pages; edits to other fields only touch the product page
+GRID_FIELDS = {'Product Handle', 'Product Name', 'Main Variant Image', 'Variant Price', 'Product Description'}
+SLIDER_FIELDS = {'Product Handle', 'Product Name', 'Transparent Product Image', 'Main Variant Image',
+                 'Product Description'}
+# Recipe fields shown on the recipes grid
+RECIPE_GRID_FIELDS = {'Name', 'Slug', 'Thumbnail Image', 'Color', 'Number of Servings', 'Total Time'}
+
+def load_state():
+    """Webhook cursor and last build info"""
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'cursor': 1, 'last_build': None, 'pending': None}
+
+def save_state(state):
+    """Persist the webhook cursor (only after the batch was rebuilt)"""
+    tmp_path = STATE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+def verify_mac(body, header):
+    """Check X-Airtable-Content-MAC when a MAC secret is configured"""
+    if not WEBHOOK_MAC_SECRET:
+        return True
+    expected = hmac.new(base64.b64decode(WEBHOOK_MAC_SECRET), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f'hmac-sha256={expected}', header or '')
+
+class ChangeBatcher:
+    """Collects notification pings and releases them as debounced batches"""
+
+    def __init__(self, debounce, max_wait):
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.first_ping = None
+        self.last_ping = None
+        self.pings = 0
+        self.condition = threading.Condition()
+
+    def ping(self):
+        """Record one webhook notification"""
+        with self.condition:
+            now = time.monotonic()
+            if self.first_ping is None:
+                self.first_ping = now
+            self.last_ping = now
+            self.pings += 1
+            self.condition.notify()
+
+    def wait_for_batch(self):
+        """Block until pings have gone quiet (or the max wait passed); return the ping count"""
+        with self.condition:
+            while self.first_ping is None:
+                self.condition.wait()
+            while True:
+                now = time.monotonic()
+                quiet_until = self.last_ping + self.debounce
+                hard_until = self.first_ping + self.max_wait
+                deadline = min(quiet_until, hard_until)
+                if now >= deadline:
+                    break
+                self.condition.wait(deadline - now)
+            pings = self.pings
+            self.first_ping = self.last_ping = None
+            self.pings = 0
+            return pings
+
+def collect_changes(payloads, schema):
+    """Fold webhook payloads into per-table change sets.
+
+    Returns {table_name: {'upserts': set, 'deleted': set, 'fields': set, 'structural': bool}}.
+    'structural' means records were created or destroyed, so listings change.
+    """
+    table_names = {t.get('id'): t.get('name') for t in (schema or {}).get('tables', [])}
+    changes = {}
+    for payload in payloads:
+        for table_id, change in payload.get('changedTablesById', {}).items():
+            table_name = table_names.get(table_id, table_id)
+            id_map = airtable_schema.field_map(schema, table_name) or {}
+            entry = changes.setdefault(table_name, {
+                'upserts': set(), 'deleted': set(), 'fields': set(), 'structural': False
+            })
+            for record_id, record in change.get('changedRecordsById', {}).items():
+                entry['upserts'].add(record_id)
+                for field_id in record.get('current', {}).get('cellValuesByFieldId', {}):
+                    entry['fields'].add(id_map.get(field_id, field_id))
+            for record_id in change.get('createdRecordsById', {}):
+                entry['upserts'].add(record_id)
+                entry['structural'] = True
+            for record_id in change.get('destroyedRecordIds', []):
+                entry['deleted'].add(record_id)
+                entry['upserts'].discard(record_id)
+                entry['structural'] = True
+    return changes
+
+def merge_plans(plan, other):
+    """Union of two rebuild plans (the first may be None)"""
+    if not plan:
+        return dict(other)
+    merged = {key: plan[key] or other[key] for key in plan if key not in ('products', 'recipes')}
+    merged['products'] = sorted(set(plan['products']) | set(other['products']))
+    merged['recipes'] = sorted(set(plan['recipes']) | set(other['recipes']))
+    return merged
+
+def plan_rebuild(changed_handles, changed_slugs, product_change, recipe_change):
+    """Decide which pages depend on the changed records"""
+    plan = {
+        'products': sorted(changed_handles),
+        'recipes': sorted(changed_slugs),
+        'products_grid': False,
+        'recipes_grid': False,
+        'slider': False,
+        'prices': False,
+    }
+    if changed_handles and product_change:
+        fields = product_change['fields']
+        structural = product_change['structural']
+        if price_overlay.enabled():
+            plan['prices'] = True
+            # Prices and stock live in prices.json; an edit to only those leaves every page as is
+            fields = fields - set(price_overlay.OVERLAY_FIELDS)
+            if not fields and not structural:
+                plan['products'] = []
+        plan['products_grid'] = structural or bool(fields & GRID_FIELDS)
+        plan['slider'] = structural or bool(fields & SLIDER_FIELDS)
+    if changed_slugs and recipe_change:
+        plan['recipes_grid'] = recipe_change['structural'] or bool(recipe_change['fields'] & RECIPE_GRID_FIELDS)
+    return plan
+
+def rebuild(plan):
+    """Regenerate the pages in the plan"""
+    # Imported here: these read USE_CATALOG at import, after the initial sync
+    import create_grid_pages
+    import fix_slider_single_product
+    import generate_cms_pages
+
+    conn = catalog_db.connect()
+    try:
+        products = {handle: generate_cms_pages.merge_variants(variants)
+                    for handle, variants in catalog_db.grouped_variants(conn).items()}
+        recipe_rows = catalog_db.load_recipes(conn)
+        xref = cross_reference.update_index(products, recipe_rows, catalog_db.load_ingredients(conn))
+    finally:
+        conn.close()
+
+    # A renamed product or edited recipe can change "used in"/"featured" blocks elsewhere
+    plan['products'] = sorted(set(plan['products']) | xref['stale_products'])
+    plan['recipes'] = sorted(set(plan['recipes']) | xref['stale_recipes'])
+
+    for handle in plan['products']:
+        if handle in products:
+            generate_cms_pages.create_product_page(handle, products[handle], generate_cms_pages.OUTPUT_DIR,
+                                                   xref['used_in'].get(handle, ''))
+        else:
+            remove_page(os.path.join(generate_cms_pages.OUTPUT_DIR, 'products', f'{handle}.html'))
+    if plan['recipes']:
+        recipes = {cross_reference.recipe_slug(r): r for r in recipe_rows}
+        for slug in plan['recipes']:
+            if slug in recipes:
+                generate_cms_pages.create_recipe_page(recipes[slug], generate_cms_pages.OUTPUT_DIR,
+                                                      xref['featured'].get(slug, ''))
+            else:
+                remove_page(os.path.join(generate_cms_pages.OUTPUT_DIR, 'recipes', f'{slug}.html'))
+    cross_reference.save_index(xref['index'])
+    hashes = variant_matrix.load_hashes()
+    variant_matrix.update(generate_cms_pages.OUTPUT_DIR, products.items(), hashes)
+    variant_matrix.save_hashes(hashes)
+    if plan.get('prices'):
+        price_overlay.write_prices(generate_cms_pages.OUTPUT_DIR, products.items())
+
+    if plan['products_grid']:
+        create_grid_pages.create_products_grid_page(create_grid_pages.load_products(), create_grid_pages.OUTPUT_DIR)
+    if plan['recipes_grid']:
+        create_grid_pages.create_recipes_grid_page(create_grid_pages.load_recipes(), create_grid_pages.OUTPUT_DIR)
+    if plan['slider']:
+        fix_slider_single_product.update_homepage()
+
+def remove_page(path):
+    """Delete a page whose record was destroyed"""
+    if os.path.exists(path):
+        os.remove(path)
+        print(f"Removed page: {os.path.relpath(path, BASE_DIR)}")
+
+def process_batch(state, schema):
+    """Pull payloads after the cursor, update the catalog, rebuild affected pages
+    and run the post-processing stages of a full sync on the site"""
+    payloads, cursor = airtable_sync.fetch_webhook_payloads(airtable_sync.AIRTABLE_BASE_ID, WEBHOOK_ID,
+                                                            state['cursor'])
+    if payloads is None:
+        return False
+    # Pages of catalog changes committed by an earlier batch that failed before rebuilding
+    pending = state.get('pending')
+    if not payloads and not pending:
+        state['cursor'] = cursor
+        save_state(state)
+        return True
+
+    changes = collect_changes(payloads, schema)
+    conn = catalog_db.connect()
+    try:
+        for table_name, apply in ((airtable_sync.PRODUCTS_TABLE, catalog_db.apply_product_changes),
+                                  (airtable_sync.RECIPES_TABLE, catalog_db.apply_recipe_changes)):
+            change = changes.get(table_name)
+            if not change:
+                continue
+            records = airtable_sync.get_records_by_id(airtable_sync.AIRTABLE_BASE_ID, table_name,
+                                                      change['upserts'], schema)
+            if records is None:
+                return False
+            upserts = [(r['id'], r.get('fields', {})) for r in records]
+            # Records reported as changed but no longer listed were deleted since
+            gone = change['upserts'] - {r['id'] for r in records}
+            changed = apply(conn, upserts, change['deleted'] | gone)
+            if table_name == airtable_sync.PRODUCTS_TABLE:
+                table_plan = plan_rebuild(changed, set(), change, None)
+            else:
+                table_plan = plan_rebuild(set(), changed, None, change)
+            # The catalog has these now, so a retry would see no change: keep them
+            # in the state until their pages are rebuilt
+            pending = merge_plans(pending, table_plan)
+            state['pending'] = pending
+            save_state(state)
+    finally:
+        conn.close()
+
+    plan = pending or plan_rebuild(set(), set(), None, None)
+    print(f"\n🔧 {len(payloads)} payload(s): {len(plan['products'])} product page(s), "
+          f"{len(plan['recipes'])} recipe page(s), products grid: {plan['products_grid']}, "
+          f"recipes grid: {plan['recipes_grid']}, slider: {plan['slider']}, prices: {plan['prices']}")
+    started = time.time()
+    rebuild(dict(plan))
+    # Hints, sprite, speculation rules, placeholders, ... for the regenerated pages
+    failed = post_build.run()
+    if failed:
+        print(f"⚠️  Post-processing stage(s) failed: {', '.join(failed)}")
+
+    state['cursor'] = cursor
+    state['pending'] = None
+    state['last_build'] = {'at': started, 'seconds': round(time.time() - started, 3), 'plan': plan}
+    save_state(state)
+    print(f"✅ Rebuilt in {time.time() - started:.2f}s (cursor {cursor})")
+    return True
+
+def make_handler(batcher, state):
+    """Request handler class bound to the batcher"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/webhook':
+                self.send_json(404, {'error': 'not found'})
+                return
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if not verify_mac(body, self.headers.get('X-Airtable-Content-MAC')):
+                self.send_json(401, {'error': 'bad MAC'})
+                return
+            # Answer right away; Airtable only wants an acknowledgement
+            self.send_json(200, {'ok': True})
+            batcher.ping()
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/health':
+                self.send_json(200, {'cursor': state['cursor'], 'last_build': state['last_build']})
+            else:
+                self.send_json(404, {'error': 'not found'})
+
+    return Handler
+
+def initial_sync(schema):
+    """Full sync so the catalog is keyed by Airtable record ids before applying deltas"""
+    conn = catalog_db.connect()
+    try:
+        airtable_sync.sync_products(airtable_sync.AIRTABLE_BASE_ID, conn, schema)
+        airtable_sync.sync_recipes(airtable_sync.AIRTABLE_BASE_ID, conn, schema)
+    finally:
+        conn.close()
+
+def main():
+    """Run the listener and the rebuild loop"""
+    print("=" * 60)
+    print("OUTLAW SPICE - REBUILD DAEMON")
+    print("=" * 60)
+
+    if not airtable_sync.AIRTABLE_BASE_ID or not WEBHOOK_ID:
+        print("\n⚠️  SETUP REQUIRED: set base_id and webhook_id in airtable_config.json")
+        return
+
+    schema = airtable_sync.test_connection(airtable_sync.AIRTABLE_BASE_ID)
+    if not schema:
+        return
+    if '--no-initial-sync' not in sys.argv:
+        initial_sync(schema)
+
+    state = load_state()
+    batcher = ChangeBatcher(DEBOUNCE_SECONDS, MAX_BATCH_SECONDS)
+    server = ThreadingHTTPServer((DAEMON_HOST, DAEMON_PORT), make_handler(batcher, state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"\n👂 Listening for Airtable webhooks on {DAEMON_HOST}:{DAEMON_PORT}/webhook "
+          f"(debounce {DEBOUNCE_SECONDS}s, max {MAX_BATCH_SECONDS}s)")
+
+    # Catch up on anything that changed while the daemon was down
+    batcher.ping()
+    try:
+        while True:
+            pings = batcher.wait_for_batch()
+            try:
+                ok = process_batch(state, schema)
+            except Exception as e:
+                # A failed render mustn't stop the daemon; the pending pages are retried
+                print(f"❌ Batch failed: {type(e).__name__}: {e}")
+                ok = False
+            if not ok:
+                print(f"⚠️  Batch of {pings} notification(s) failed; will retry on the next one")
+                # Retry later even if no further notification arrives
+                threading.Timer(MAX_BATCH_SECONDS, batcher.ping).start()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
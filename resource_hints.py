@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Tell the browser what each page needs first.
+
+For every page type this finds the LCP element (the product hero image, the
+recipe header background, the big header image on the Webflow pages) and:
+
+- gives the hero <img> fetchpriority="high" and loading="eager", and adds a
+  <link rel="preload" as="image"> for it in <head> (with imagesrcset when
+  the image has a srcset)
+- marks every <img>/<iframe> below the fold loading="lazy" decoding="async";
+  the fold is the end of the <header>/<section> that holds the hero
+- adds <link rel="preconnect"> for third-party origins the first screen
+  still loads from (product photos, icons, fonts)
+- writes the same preload/preconnect hints as Link headers into the
+  Cloudflare `_headers` file, which Cloudflare turns into 103 Early Hints
+
+Re-running replaces the hints it added before.
+"""
+
+import os
+import posixpath
+import re
+import sys
+from urllib.parse import urlsplit
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HEADERS_FILE = '_headers'
+SITE_CSS = os.path.join('css', 'outlaw-spice.webflow.css')
+
+# Marks the tags this script adds so re-runs replace them
+HINT_MARKER = 'data-hint'
+HEADERS_BEGIN = '# BEGIN resource hints (generated by resource_hints.py)'
+HEADERS_END = '# END resource hints'
+
+# How each page type's hero is found: an <img> class, or an element whose
+# CSS background image is the LCP. Other pages use their first eager <img>.
+PAGE_TYPES = {
+    'product': {'img_class': 'product-header8_main-image'},
+    'recipe': {'background_class': 'recipe-header'},
+}
+TEMPLATES = {'detail_product.html': 'product', 'detail_recipe.html': 'recipe'}
+
+# More preconnects than this compete with the hero for bandwidth
+MAX_PRECONNECTS = 4
+
+IMG_TAG = re.compile(r'<(img|iframe)\b[^>]*>')
+
+def page_type(page):
+    """product, recipe or page"""
+    folder = os.path.dirname(page)
+    if folder == 'products':
+        return 'product'
+    if folder == 'recipes':
+        return 'recipe'
+    return TEMPLATES.get(os.path.basename(page), 'page')
+
+def get_attr(tag, name):
+    match = re.search(r'\s' + name + r'="([^"]*)"', tag)
+    return match.group(1) if match else None
+
+def set_attr(tag, name, value):
+    """Set or replace an attribute on an opening tag"""
+    if get_attr(tag, name) is not None:
+        return re.sub(r'(\s' + name + r'=")[^"]*"', lambda m: m.group(1) + value + '"', tag, count=1)
+    end = -2 if tag.endswith('/>') else -1
+    return tag[:end] + f' {name}="{value}"' + tag[end:]
+
+def remove_attr(tag, name):
+    return re.sub(r'\s' + name + r'="[^"]*"', '', tag)
+
+def element_end(html, start):
+    """Index just past the element that opens at `start` (same-name nesting counted)"""
+    name = re.match(r'<(\w+)', html[start:]).group(1)
+    depth = 0
+    for match in re.compile(r'<(/?)' + name + r'\b[^>]*>').finditer(html, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.end()
+    return len(html)
+
+def enclosing_section(html, position):
+    """Start of the innermost <header>/<section> containing position"""
+    stack = []
+    for match in re.finditer(r'<(/?)(header|section)\b[^>]*>', html[:position]):
+        if match.group(1):
+            if stack:
+                stack.pop()
+        else:
+            stack.append(match.start())
+    return stack[-1] if stack else None
+
+def css_background(site_dir, class_name):
+    """Site-root path of the background image a class sets in the site CSS"""
+    with open(os.path.join(site_dir, SITE_CSS), 'r', encoding='utf-8') as f:
+        css = f.read()
+    match = re.search(r'(?:^|\})\s*\.' + re.escape(class_name) + r'\s*\{([^}]*)\}', css)
+    url = match and re.search(r'background-image:\s*url\([\'"]?([^\'")]+)', match.group(1))
+    if not url:
+        return None
+    if urlsplit(url.group(1)).scheme:
+        return url.group(1)
+    return posixpath.normpath(posixpath.join(posixpath.dirname(SITE_CSS.replace(os.sep, '/')), url.group(1)))
+
+def find_hero(html, kind, site_dir, prefix):
+    """(position, img tag or None, preload attrs) for the page's LCP element, or None"""
+    spec = PAGE_TYPES.get(kind, {})
+    if 'background_class' in spec:
+        match = re.search(r'<\w+\b[^>]*class="' + re.escape(spec['background_class']) + r'"[^>]*>', html)
+        url = match and css_background(site_dir, spec['background_class'])
+        if not url:
+            return None
+        href = url if urlsplit(url).scheme else prefix + url
+        return match.start(), None, {'href': href}
+    for match in IMG_TAG.finditer(html):
+        tag = match.group(0)
+        classes = (get_attr(tag, 'class') or '').split()
+        if 'img_class' in spec:
+            found = spec['img_class'] in classes
+        else:
+            found = get_attr(tag, 'loading') == 'eager'
+        if found and match.group(1) == 'img':
+            attrs = {'href': get_attr(tag, 'src') or ''}
+            if get_attr(tag, 'srcset'):
+                attrs['imagesrcset'] = get_attr(tag, 'srcset')
+                attrs['imagesizes'] = get_attr(tag, 'sizes') or '100vw'
+            return match.start(), tag, attrs
+    return None
+
+def origin(url):
+    parts = urlsplit(url)
+    if parts.scheme in ('http', 'https') and parts.netloc:
+        return f'{parts.scheme}://{parts.netloc}'
+    return None
+
+def critical_origins(html, fold):
+    """Third-party origins of head scripts/styles and above-the-fold images, most used first"""
+    head_end = html.find('</head>')
+    counts = {}
+    for match in re.finditer(r'<(script|link|img|source|iframe)\b[^>]*>', html):
+        tag = match.group(0)
+        if match.start() > fold or (match.group(1) in ('script', 'link') and match.start() > head_end):
+            continue
+        if match.group(1) == 'link' and get_attr(tag, 'rel') != 'stylesheet':
+            continue
+        if match.group(1) == 'img' and get_attr(tag, 'loading') == 'lazy':
+            continue
+        found = origin(get_attr(tag, 'src') or get_attr(tag, 'href') or '')
+        if found:
+            counts[found] = counts.get(found, 0) + 1
+    return sorted(counts, key=lambda o: -counts[o])
+
+def rewrite_page(html, page, site_dir):
+    """Returns (html, hints) where hints are the head links for Early Hints"""
+    prefix = '../' * page.count('/')
+    kind = page_type(page)
+    html = re.sub(r'\n\s*<link [^>]*' + HINT_MARKER + r'[^>]*>', '', html)
+
+    hero = find_hero(html, kind, site_dir, prefix)
+    head_tags = []
+    if hero:
+        position, tag, attrs = hero
+        if tag:
+            new_tag = set_attr(set_attr(remove_attr(tag, 'decoding'), 'loading', 'eager'), 'fetchpriority', 'high')
+            html = html[:position] + new_tag + html[position + len(tag):]
+        section = enclosing_section(html, position)
+        if tag is None and section is None:
+            section = position  # the background element is itself the header
+        fold = element_end(html, section) if section is not None else len(html)
+        if attrs['href']:
+            extra = ''.join(f' {name}="{value}"' for name, value in attrs.items() if name != 'href')
+            head_tags.append(f'<link rel="preload" href="{attrs["href"]}" as="image"{extra} '
+                             f'fetchpriority="high" {HINT_MARKER}>')
+
+        # Below the fold: lazy + async decoding
+        out = [html[:fold]]
+        last = fold
+        for match in IMG_TAG.finditer(html, fold):
+            out.append(html[last:match.start()])
+            out.append(set_attr(set_attr(match.group(0), 'loading', 'lazy'), 'decoding', 'async')
+                       if match.group(1) == 'img' else set_attr(match.group(0), 'loading', 'lazy'))
+            last = match.end()
+        out.append(html[last:])
+        html = ''.join(out)
+    else:
+        fold = len(html)
+
+    # Preconnect to third-party origins the first screen needs
+    existing = {get_attr(m.group(0), 'href') for m in re.finditer(r'<link [^>]*rel="preconnect"[^>]*>', html)}
+    preloaded = {origin(hero[2]['href'])} if hero else set()
+    origins = [o for o in critical_origins(html, fold) if o not in existing and o not in preloaded]
+    for found in origins[:max(MAX_PRECONNECTS - len(existing), 0)]:
+        head_tags.append(f'<link href="{found}" rel="preconnect" crossorigin="anonymous" {HINT_MARKER}>')
+
+    anchor = re.search(r'\n(\s*)<link href="[^"]*\.css" rel="stylesheet"', html)
+    if anchor and head_tags:
+        indent = '\n' + anchor.group(1)
+        html = html[:anchor.start()] + indent + indent.join(head_tags) + html[anchor.start():]
+
+    # Everything the head now asks for early (ours, the font preload, existing preconnects)
+    head = html[:html.find('</head>')]
+    hints = [m.group(0) for m in re.finditer(r'<link [^>]*rel="(?:preload|preconnect)"[^>]*>', head)]
+    return html, hints
+
+def page_url(page):
+    """Pretty URL Cloudflare Pages serves a page at"""
+    path = '/' + page.replace(os.sep, '/')
+    if path.endswith('/index.html'):
+        return path[:-len('index.html')]
+    return path[:-len('.html')]
+
+def link_header(tag, page):
+    """`Link:` header value for a <link rel=preload|preconnect> tag"""
+    href = get_attr(tag, 'href')
+    if not origin(href):
+        href = posixpath.normpath(posixpath.join('/', posixpath.dirname(page.replace(os.sep, '/')), href))
+    parts = [f'<{href}>', f'rel={get_attr(tag, "rel")}']
+    for name in ('as', 'type', 'fetchpriority'):
+        if get_attr(tag, name):
+            parts.append(f'{name}={get_attr(tag, name)}')
+    for name in ('imagesrcset', 'imagesizes'):
+        if get_attr(tag, name):
+            value = get_attr(tag, name)
+            if name == 'imagesrcset':
+                value = ', '.join(link_header_src(entry, page) for entry in value.split(','))
+            parts.append(f'{name}="{value}"')
+    if get_attr(tag, 'crossorigin') is not None or ' crossorigin' in tag:
+        parts.append('crossorigin')
+    return '; '.join(parts)
+
+def link_header_src(entry, page):
+    """One `url 500w` srcset entry with the URL made site-absolute"""
+    url, _, descriptor = entry.strip().partition(' ')
+    if not origin(url):
+        url = posixpath.normpath(posixpath.join('/', posixpath.dirname(page.replace(os.sep, '/')), url))
+    return f'{url} {descriptor}'.strip()
+
+def write_managed_block(path, begin, end, body):
+    """Add or refresh a generated block in a text file (_headers, a stylesheet)
+
+    The block between the `begin` and `end` lines is replaced where it is, or
+    appended if the file doesn't have it yet; everything else in the file is
+    left alone. Blocks are separated by exactly one blank line however often
+    the stages re-run. Returns True if the file changed.
+    """
+    original = ''
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            original = f.read()
+    block = '\n'.join([begin] + ([body] if body else []) + [end])
+    pattern = re.compile(r'\n*' + re.escape(begin) + r'.*?' + re.escape(end) + r'\n*', re.DOTALL)
+    parts = [part.strip('\n') for part in pattern.split(original, maxsplit=1)]
+    if len(parts) == 2:
+        parts.insert(1, block)
+    else:
+        parts.append(block)
+    updated = '\n\n'.join(part for part in parts if part) + '\n'
+    if updated == original:
+        return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(updated)
+    return True
+
+def write_headers(site_dir, page_hints):
+    """Replace our block in _headers, keeping anything written by hand"""
+    lines = []
+    for page, hints in sorted(page_hints.items()):
+        if hints:
+            lines.append(page_url(page))
+            lines += [f'  Link: {link_header(tag, page)}' for tag in hints]
+    write_managed_block(os.path.join(site_dir, HEADERS_FILE), HEADERS_BEGIN, HEADERS_END, '\n'.join(lines))
+
+def site_pages(site_dir):
+    """HTML pages at the site root and in products/ and recipes/"""
+    pages = []
+    for folder in ['', 'products', 'recipes']:
+        path = os.path.join(site_dir, folder)
+        if os.path.isdir(path):
+            pages += sorted(os.path.join(folder, f) for f in os.listdir(path) if f.endswith('.html'))
+    return pages
+
+def main():
+    """Add hints to every page and write _headers
+
+    Usage: resource_hints.py [--site DIR]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+
+    page_hints = {}
+    changed = 0
+    heroes = 0
+    for page in site_pages(site_dir):
+        path = os.path.join(site_dir, page)
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        updated, hints = rewrite_page(html, page, site_dir)
+        page_hints[page] = hints
+        heroes += any('as="image"' in tag for tag in hints)
+        if updated != html:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(updated)
+            changed += 1
+    write_headers(site_dir, page_hints)
+
+    print(f"🚀 Hero image preloaded on {heroes}/{len(page_hints)} page(s)")
+    print(f"✅ Updated {changed} page(s) and {HEADERS_FILE} ({sum(len(h) for h in page_hints.values())} Link headers)")
+
+if __name__ == '__main__':
+    main()
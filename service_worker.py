@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Generate the service worker and its precache manifest.
+
+precache-manifest.json lists what a first visit caches up front, each entry
+with a content hash (its revision):
+
+- the CSS and JS shared between pages (stylesheets, webflow.js chunks, the
+  vendor bundle, ...)
+- the homepage and the products/recipes grid pages
+- the hero images of the top N products (the homepage slider first, then the
+  products grid order)
+
+sw.js has the manifest inlined, so any deploy that changes a revision changes
+sw.js and the browser installs the new worker. It only downloads entries
+whose revision changed and, once active, deletes just the entries that are no
+longer in the manifest; everything else stays cached.
+
+At runtime product and recipe pages are stale-while-revalidate, assets with a
+content hash in their name are cache-first and the rest goes to the network.
+
+Hashing is incremental: airtable_exports/service_worker.json (not deployed)
+keeps each file's size and mtime, and a file whose stat hasn't changed keeps
+its revision without being read again. The deployed manifest only maps URLs
+to revisions, so it and sw.js are byte-identical when no content changed.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+
+import resource_hints
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_FILE = 'precache-manifest.json'
+STATE_FILE = os.path.join(BASE_DIR, 'airtable_exports', 'service_worker.json')
+SW_FILE = 'sw.js'
+REGISTER_FILE = os.path.join('js', 'sw-register.js')
+
+HOME_PAGE = 'index.html'
+GRID_PAGES = ['products.html', 'recipes.html']
+DEFAULT_TOP_PRODUCTS = 8
+
+ASSET_REF = re.compile(r'<(?:link|script)\b[^>]*?(?:href|src)="([^"]+\.(?:css|js))"')
+PRODUCT_LINK = re.compile(r'href="(?:\.\./)?products/([^"/]+)\.html"')
+
+# Names that change whenever their content does, e.g. bundle-1a2b3c4d5e.js
+HASHED_NAME = r'(?:^|[-./])[0-9a-f]{10,}\.\w+$'
+
+REGISTER_JS = """if ('serviceWorker' in navigator) {
+  window.addEventListener('load', function () {
+    navigator.serviceWorker.register('/sw.js');
+  });
+}
+"""
+
+SW_TEMPLATE = """// Generated by service_worker.py from precache-manifest.json - do not edit.
+const PRECACHE = 'outlaw-precache';
+const RUNTIME = 'outlaw-runtime';
+const MANIFEST = __MANIFEST__;
+const HASHED_NAME = new RegExp(__HASHED_NAME__);
+const REVALIDATE_PAGES = /^\\/(products|recipes)\\//;
+
+// Cache key for a manifest entry: the URL plus its revision
+function precacheKey(url) {
+  const key = new URL(url, self.location);
+  key.searchParams.set('__rev', MANIFEST[url]);
+  return key.href;
+}
+
+// Request URL -> manifest URL (same-origin pages drop .html like Cloudflare Pages does)
+function manifestUrl(request) {
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) {
+    return url.href in MANIFEST ? url.href : null;
+  }
+  const path = url.pathname.replace(/\\/index\\.html$/, '/').replace(/\\.html$/, '');
+  return path in MANIFEST ? path : null;
+}
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(PRECACHE);
+    const cached = new Set((await cache.keys()).map((request) => request.url));
+    const missing = Object.keys(MANIFEST).filter((url) => !cached.has(precacheKey(url)));
+    await Promise.all(missing.map(async (url) => {
+      const remote = new URL(url, self.location).origin !== self.location.origin;
+      try {
+        const response = await fetch(url, {cache: 'no-cache', mode: remote ? 'cors' : 'same-origin'});
+        if (response.ok) {
+          await cache.put(precacheKey(url), response);
+        } else if (!remote) {
+          throw new Error(`${url}: ${response.status}`);
+        }
+      } catch (error) {
+        if (!remote) throw error;  // hero images on other origins are best-effort
+      }
+    }));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(PRECACHE);
+    const wanted = new Set(Object.keys(MANIFEST).map(precacheKey));
+    for (const request of await cache.keys()) {
+      if (!wanted.has(request.url)) await cache.delete(request);
+    }
+    await self.clients.claim();
+  })());
+});
+
+async function staleWhileRevalidate(request) {
+  const cache = await caches.open(RUNTIME);
+  const cached = await cache.match(request);
+  const network = fetch(request).then((response) => {
+    if (response.ok) cache.put(request, response.clone());
+    return response;
+  }).catch((error) => {
+    if (cached) return cached;  // offline: the cached copy is already being served
+    throw error;
+  });
+  return cached || network;
+}
+
+async function cacheFirst(request) {
+  const cache = await caches.open(RUNTIME);
+  const cached = await cache.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) cache.put(request, response.clone());
+  return response;
+}
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+  const precached = manifestUrl(request);
+  if (precached) {
+    event.respondWith(caches.open(PRECACHE)
+      .then((cache) => cache.match(precacheKey(precached)))
+      .then((response) => response || fetch(request)));
+  } else if (url.origin === self.location.origin && REVALIDATE_PAGES.test(url.pathname)) {
+    event.respondWith(staleWhileRevalidate(request));
+  } else if (url.origin === self.location.origin && HASHED_NAME.test(url.pathname)) {
+    event.respondWith(cacheFirst(request));
+  }
+});
+"""
+
+def file_revision(path, previous):
+    """(revision, size, mtime, rehashed), reusing the previous revision if the file is unchanged"""
+    stat = os.stat(path)
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime') == stat.st_mtime_ns:
+        return previous['revision'], stat.st_size, stat.st_mtime_ns, False
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16], stat.st_size, stat.st_mtime_ns, True
+
+def write_if_changed(path, data):
+    """Write `data` unless the file already holds it; True if written"""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == data:
+                return False
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def site_path(page, ref):
+    """Site-relative path of a page-relative reference, or None if it's remote"""
+    if re.match(r'^[a-z]+:|^//', ref):
+        return None
+    ref = ref.split('?', 1)[0].split('#', 1)[0]
+    if ref.startswith('/'):
+        return ref.lstrip('/')
+    return os.path.normpath(os.path.join(os.path.dirname(page), ref)).replace(os.sep, '/')
+
+def read_page(site_dir, page):
+    with open(os.path.join(site_dir, page), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def shared_assets(site_dir, pages):
+    """Local CSS/JS referenced by the precached pages or by more than one page"""
+    users = {}
+    for page in pages:
+        for ref in ASSET_REF.findall(read_page(site_dir, page)):
+            path = site_path(page, ref)
+            if path and os.path.exists(os.path.join(site_dir, path)):
+                users.setdefault(path, set()).add(page)
+    entry_pages = {HOME_PAGE} | set(GRID_PAGES)
+    return sorted(p for p, used_by in users.items() if len(used_by) > 1 or used_by & entry_pages)
+
+def top_product_heroes(site_dir, count):
+    """Hero image URLs of the first `count` products (homepage order, then the grid)"""
+    handles = []
+    for page in [HOME_PAGE] + GRID_PAGES:
+        if os.path.exists(os.path.join(site_dir, page)):
+            handles += [h for h in PRODUCT_LINK.findall(read_page(site_dir, page)) if h not in handles]
+    heroes = []
+    for handle in handles:
+        page = f'products/{handle}.html'
+        if not os.path.exists(os.path.join(site_dir, page)):
+            continue
+        hero = resource_hints.find_hero(read_page(site_dir, page), 'product', site_dir, '../')
+        if hero and hero[2]['href']:
+            src = hero[2]['href']
+            path = site_path(page, src)
+            heroes.append(path if path else src)
+        if len(heroes) == count:
+            break
+    return heroes
+
+def add_registration(html, page):
+    """Load js/sw-register.js at the end of <body> (once)"""
+    if 'sw-register.js' in html:
+        return html
+    prefix = '../' * page.count('/')
+    tag = f'<script src="{prefix}{REGISTER_FILE}" type="text/javascript" defer></script>\n'
+    at = html.rfind('</body>')
+    if at == -1:
+        return html
+    return html[:at] + tag + html[at:]
+
+def main():
+    """Build the precache manifest and sw.js
+
+    Usage: service_worker.py [--site DIR] [--top N]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    top = DEFAULT_TOP_PRODUCTS
+    if '--top' in sys.argv:
+        top = int(sys.argv[sys.argv.index('--top') + 1])
+
+    manifest_path = os.path.join(site_dir, MANIFEST_FILE)
+    previous = {}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except ValueError:
+            pass
+    state = load_state()
+    site_key = os.path.relpath(site_dir, BASE_DIR)
+    stats = state.get(site_key, {})
+
+    write_if_changed(os.path.join(site_dir, REGISTER_FILE), REGISTER_JS)
+    pages = resource_hints.site_pages(site_dir)
+    changed_pages = 0
+    for page in pages:
+        html = read_page(site_dir, page)
+        updated = add_registration(html, page)
+        if updated != html:
+            with open(os.path.join(site_dir, page), 'w', encoding='utf-8') as f:
+                f.write(updated)
+            changed_pages += 1
+
+    # What to precache: url -> local file (None for remote hero images)
+    entries = {}
+    for page in [HOME_PAGE] + GRID_PAGES:
+        if os.path.exists(os.path.join(site_dir, page)):
+            entries[resource_hints.page_url(page)] = page
+    for path in shared_assets(site_dir, pages):
+        entries['/' + path] = path
+    for hero in top_product_heroes(site_dir, top):
+        if re.match(r'^[a-z]+:', hero):
+            entries[hero] = None
+        elif os.path.exists(os.path.join(site_dir, hero)):
+            entries['/' + hero] = hero
+
+    # Served manifest: url -> revision; the stat cache stays out of the deploy
+    manifest = {}
+    new_stats = {}
+    hashed = 0
+    for url, path in sorted(entries.items()):
+        if path is None:
+            # Webflow CDN URLs embed an asset id, so the URL is the revision
+            manifest[url] = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+            continue
+        cached = stats.get(url)
+        if cached and cached.get('file') != path:
+            cached = None
+        revision, size, mtime, rehashed = file_revision(os.path.join(site_dir, path), cached)
+        hashed += rehashed
+        manifest[url] = revision
+        new_stats[url] = {'file': path, 'revision': revision, 'size': size, 'mtime': mtime}
+
+    # Manifests from before the stat cache moved out kept {revision, ...} per URL
+    previous = {url: entry['revision'] if isinstance(entry, dict) else entry for url, entry in previous.items()}
+    changed = sorted(url for url in manifest if previous.get(url) != manifest[url])
+    removed = sorted(url for url in previous if url not in manifest)
+    write_if_changed(manifest_path, json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+    if stats != new_stats:
+        state[site_key] = new_stats
+        os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+        write_if_changed(STATE_FILE, json.dumps(state, indent=1, sort_keys=True))
+
+    sw = (SW_TEMPLATE.replace('__MANIFEST__', json.dumps(manifest, indent=2, sort_keys=True))
+          .replace('__HASHED_NAME__', json.dumps(HASHED_NAME)))
+    write_if_changed(os.path.join(site_dir, SW_FILE), sw)
+
+    print(f"🗂️  Precache manifest: {len(manifest)} entries ({hashed} hashed, {len(manifest) - hashed} unchanged)")
+    for url in changed:
+        print(f"   ~ {url}")
+    for url in removed:
+        print(f"   - {url}")
+    if not changed and not removed:
+        print("   No revisions changed; returning visitors keep their cache")
+    print(f"✅ Wrote {SW_FILE} and {MANIFEST_FILE}; registration added to {changed_pages} page(s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Prefetch and prerender each page's most likely next navigations.
+
+Going from the homepage slider or a grid to a product or recipe page is a
+full cold load. This reads the internal link graph of the built site and
+gives every page a ranked list of where visitors most likely go next:
+
+1. product <-> recipe cross-links ("Used In These Recipes", "Featured Spices")
+2. homepage slider cards, in slider order
+3. grid cards (products.html, recipes.html, the homepage recipes), in grid order
+4. on detail pages, the next and previous cards of each slider or grid
+   listing them
+
+The first MAX_PRERENDER targets are prerendered when the visitor shows intent
+(hover or pointer down), the next ones up to MAX_SPECULATIONS are prefetched
+right away, so each page speculates on a bounded number of documents. Rules go
+into <head> as <script type="speculationrules">, followed by a small script
+that adds <link rel="prefetch"> for the same URLs in browsers without
+speculation rules (only there, so nothing is fetched twice).
+
+The graph and the rules are kept in airtable_exports/speculation_rules.json.
+When the graph hasn't changed the stored rules are reused, and only pages that
+lost theirs (because they were regenerated) are rewritten. Re-running replaces
+the rules it added before.
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+from html import unescape
+
+import resource_hints
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(BASE_DIR, 'airtable_exports', 'speculation_rules.json')
+
+# Bump when the ranking or the markup changes, so stored rules are rebuilt
+STATE_VERSION = 1
+
+# Marks the tags this script adds so re-runs replace them
+MARKER = 'data-speculation'
+
+# Card classes that make a link a likely next navigation, and their rank
+LINK_KINDS = {
+    'side-blog': 0,       # cross-reference cards
+    'product-base': 1,    # homepage slider
+    'cms-item-link': 2,   # products.html / recipes.html grids
+    'grid_link': 2,       # homepage recipes grid
+}
+NEIGHBOUR_RANK = 3
+
+# Per page: documents prerendered on intent, and speculated on in total
+MAX_PRERENDER = 1
+MAX_SPECULATIONS = 4
+PRERENDER_EAGERNESS = 'moderate'
+PREFETCH_EAGERNESS = 'immediate'
+
+ANCHOR = re.compile(r'<a\b([^>]*)>')
+ATTR = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+BLOCK = re.compile(r'\n  <script type="speculationrules" ' + MARKER + r'>.*?</script>'
+                   r'\n  <script ' + MARKER + r'>.*?</script>', re.DOTALL)
+
+FALLBACK_JS = ("(function(){var s=document.currentScript.previousElementSibling;"
+               "if(HTMLScriptElement.supports&&HTMLScriptElement.supports('speculationrules'))return;"
+               "var r=JSON.parse(s.textContent);"
+               "[].concat(r.prerender||[],r.prefetch||[]).forEach(function(rule){"
+               "rule.urls.forEach(function(u){var l=document.createElement('link');"
+               "l.rel='prefetch';l.href=u;document.head.appendChild(l);});});})();")
+
+def page_links(html, page, pages):
+    """[(target page, rank)] for the card links on a page, in document order"""
+    links = []
+    for match in ANCHOR.finditer(html):
+        attrs = dict(ATTR.findall(match.group(1)))
+        ranks = [LINK_KINDS[c] for c in attrs.get('class', '').split() if c in LINK_KINDS]
+        href = unescape(attrs.get('href', '')).split('#')[0].split('?')[0]
+        if not ranks or not href or resource_hints.origin(href):
+            continue
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(page), href))
+        if target in pages and target != page:
+            links.append((target, min(ranks)))
+    return links
+
+def link_graph(site_dir, pages):
+    """{page: [[target, rank], ...]} over the site's pages"""
+    known = {page.replace(os.sep, '/') for page in pages}
+    graph = {}
+    for page in pages:
+        with open(os.path.join(site_dir, page), 'r', encoding='utf-8') as f:
+            html = f.read()
+        page = page.replace(os.sep, '/')
+        graph[page] = [list(link) for link in page_links(html, page, known)]
+    return graph
+
+def graph_hash(graph):
+    data = json.dumps([STATE_VERSION, MAX_PRERENDER, MAX_SPECULATIONS, PRERENDER_EAGERNESS,
+                       PREFETCH_EAGERNESS, graph], sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def rank_targets(graph):
+    """{page: [target, ...]} most likely first, capped at MAX_SPECULATIONS"""
+    # Neighbours: the cards either side of a page in each slider or grid listing it
+    neighbours = {}
+    for page, links in graph.items():
+        for kind in sorted(set(LINK_KINDS.values()) - {LINK_KINDS['side-blog']}):
+            cards = [target for target, rank in links if rank == kind]
+            for i, target in enumerate(cards):
+                around = cards[i + 1:i + 2] + cards[max(i - 1, 0):i]
+                neighbours.setdefault(target, []).extend(around)
+
+    ranked = {}
+    for page, links in graph.items():
+        candidates = sorted(((rank, i), target) for i, (target, rank) in enumerate(links))
+        candidates += [((NEIGHBOUR_RANK, i), target) for i, target in enumerate(neighbours.get(page, []))]
+        targets = []
+        for _, target in candidates:
+            if target not in targets and target != page:
+                targets.append(target)
+        ranked[page] = targets[:MAX_SPECULATIONS]
+    return ranked
+
+def rules_for(page, targets):
+    """Speculation rules JSON for a page ({} when there is nothing to speculate on)"""
+    urls = [posixpath.relpath(target, posixpath.dirname(page) or '.') for target in targets]
+    rules = {}
+    if urls[:MAX_PRERENDER]:
+        rules['prerender'] = [{'source': 'list', 'urls': urls[:MAX_PRERENDER], 'eagerness': PRERENDER_EAGERNESS}]
+    if urls[MAX_PRERENDER:]:
+        rules['prefetch'] = [{'source': 'list', 'urls': urls[MAX_PRERENDER:], 'eagerness': PREFETCH_EAGERNESS}]
+    return rules
+
+def rewrite_page(html, rules):
+    """Replace the page's rules block with `rules` (or drop it)"""
+    html = BLOCK.sub('', html)
+    head_end = html.find('</head>')
+    if not rules or head_end == -1:
+        return html
+    data = json.dumps(rules, separators=(',', ':'), sort_keys=True)
+    block = (f'\n  <script type="speculationrules" {MARKER}>{data}</script>'
+             f'\n  <script {MARKER}>{FALLBACK_JS}</script>')
+    # Last in <head>, on lines of their own
+    insert = html.rfind('\n', 0, head_end)
+    if insert == -1 or html[insert:head_end].strip():
+        insert = head_end
+    return html[:insert] + block + html[insert:]
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def main():
+    """Add speculation rules to every page
+
+    Usage: speculation_rules.py [--site DIR] [--force]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+
+    pages = resource_hints.site_pages(site_dir)
+    graph = link_graph(site_dir, pages)
+    digest = graph_hash(graph)
+    state = load_state()
+    site_key = os.path.relpath(site_dir, BASE_DIR)
+    stored = state.get(site_key, {})
+    graph_changed = '--force' in sys.argv or stored.get('graph') != digest
+    if graph_changed:
+        ranked = rank_targets(graph)
+        rules = {page: rules_for(page, targets) for page, targets in ranked.items()}
+    else:
+        rules = stored['rules']
+
+    changed = 0
+    for page in pages:
+        path = os.path.join(site_dir, page)
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        updated = rewrite_page(html, rules.get(page.replace(os.sep, '/')))
+        if updated != html:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(updated)
+            changed += 1
+    state[site_key] = {'graph': digest, 'rules': rules}
+    save_state(state)
+
+    edges = sum(len(links) for links in graph.values())
+    speculating = sum(1 for page_rules in rules.values() if page_rules)
+    status = 'changed, rules rebuilt' if graph_changed else 'unchanged, stored rules reused'
+    print(f"🔮 Link graph of {len(graph)} page(s) and {edges} card link(s) {status}")
+    print(f"✅ {speculating} page(s) speculate on at most {MAX_SPECULATIONS} next page(s); {changed} page(s) updated")
+
+if __name__ == '__main__':
+    main()
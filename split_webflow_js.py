@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Split the exported js/webflow.js into a shared core chunk plus per-feature
+chunks, and point every page at only the chunks it needs.
+
+The Webflow export is one rspack bundle with every module (slider, ix2
+interactions, commerce, forms, lottie, ...) and every page loads all 1.6 MB
+of it. This reads the bundle's module map, works out which modules each
+Webflow feature pulls in, and writes:
+
+    js/webflow/core.js        runtime + modules every page runs
+    js/webflow/<feature>.js   modules only that feature uses
+    js/webflow/<a>-<b>.js     modules shared by exactly those features
+
+Feature chunks register their modules on self.webflowChunks; core.js is
+loaded last, merges them and runs the bundle's entry modules in their
+original order, skipping features that aren't on the page. Features are
+detected from markers in each page's HTML (w-slider, data-w-id, w-commerce-*,
+w-form, ...). js/webflow.js itself is left untouched and is always the input.
+"""
+
+import gzip
+import os
+import re
+import sys
+from collections import defaultdict
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_PATH = os.path.join('js', 'webflow.js')
+CHUNK_DIR = os.path.join('js', 'webflow')
+
+# Webflow modules every page runs
+CORE_FEATURES = {'brand', 'links', 'scroll', 'focus', 'focus-visible', 'touch'}
+
+# HTML markers that mean a page needs a feature (ix2 is also needed when the
+# interaction data targets the page itself, see page_features)
+FEATURE_MARKERS = {
+    'ix2': re.compile(r'data-w-id="'),
+    'slider': re.compile(r'\bw-slider\b'),
+    'commerce': re.compile(r'\bw-commerce-|data-node-type="commerce-'),
+    'forms': re.compile(r'\bw-form\b'),
+    'lightbox': re.compile(r'\bw-lightbox\b'),
+    'tabs': re.compile(r'\bw-tabs\b'),
+    'dropdown': re.compile(r'\bw-dropdown\b'),
+    'navbar': re.compile(r'\bw-nav\b'),
+    'lottie': re.compile(r'data-animation-type="lottie"|\bw-lottie\b'),
+    'spline': re.compile(r'data-animation-type="spline"|\bw-spline\b'),
+}
+
+# Any way the pages reference the bundle or its chunks
+SCRIPT_TAGS = re.compile(
+    r'<script src="((?:\.\./)*)js/webflow(?:/[\w-]+)?\.js" type="text/javascript"( defer)?></script>'
+    r'(?:\s*<script src="(?:\.\./)*js/webflow(?:/[\w-]+)?\.js" type="text/javascript"(?: defer)?></script>)*'
+)
+
+# --- Minimal JS scanner -----------------------------------------------------
+# Just enough to find where each module in the bundle's module map ends:
+# skips strings, template literals, comments and regex literals while
+# tracking bracket depth.
+
+SPECIAL = re.compile(r'[\'"`/(){}\[\],]')
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                  'void', 'throw', 'instanceof', 'yield', 'await'}
+REGEX_PREV = set('(,=:[!&|?{};+-*%<>~^')
+MODULE_KEY = re.compile(r'\s*([0-9][0-9a-fA-Fe.x]*)\s*:')
+MODULES_START = 'var __webpack_modules__={'
+EXPORTS_START = 'var __webpack_exports__={};'
+
+def _regex_allowed(src, i):
+    """True if a '/' at i starts a regex literal rather than a division"""
+    j = i - 1
+    while j >= 0 and src[j] in ' \t\r\n':
+        j -= 1
+    if j < 0:
+        return True
+    if src[j].isalnum() or src[j] in '_$':
+        k = j
+        while k >= 0 and (src[k].isalnum() or src[k] in '_$'):
+            k -= 1
+        return src[k + 1:j + 1] in REGEX_KEYWORDS
+    return src[j] in REGEX_PREV
+
+def _skip_string(src, i, quote):
+    i += 1
+    while src[i] != quote:
+        i += 2 if src[i] == '\\' else 1
+    return i + 1
+
+def _skip_regex(src, i):
+    i += 1
+    in_class = False
+    while in_class or src[i] != '/':
+        if src[i] == '\\':
+            i += 1
+        elif src[i] == '[':
+            in_class = True
+        elif src[i] == ']':
+            in_class = False
+        elif src[i] == '\n':
+            raise ValueError(f"Unterminated regex literal at offset {i}")
+        i += 1
+    i += 1
+    while i < len(src) and src[i].isalnum():
+        i += 1
+    return i
+
+def _skip_template(src, i, stack):
+    """Skip template text from just after ` (or a closing }); stops at ` or ${"""
+    while True:
+        if src[i] == '\\':
+            i += 2
+        elif src[i] == '`':
+            return i + 1
+        elif src[i] == '$' and src[i + 1] == '{':
+            stack.append('${')
+            return i + 2
+        else:
+            i += 1
+
+def skip_expression(src, i):
+    """Index of the ',' or '}' that ends the expression starting at i"""
+    stack = []
+    while True:
+        i = SPECIAL.search(src, i).start()
+        char = src[i]
+        if char in '\'"':
+            i = _skip_string(src, i, char)
+        elif char == '`':
+            i = _skip_template(src, i + 1, stack)
+        elif char == '/':
+            if src[i + 1] == '/':
+                i = src.index('\n', i)
+            elif src[i + 1] == '*':
+                i = src.index('*/', i) + 2
+            elif _regex_allowed(src, i):
+                i = _skip_regex(src, i)
+            else:
+                i += 1
+        elif char in '([{':
+            stack.append(char)
+            i += 1
+        elif char in ')]}':
+            if not stack:
+                return i
+            if stack.pop() == '${':
+                i = _skip_template(src, i + 1, stack)
+            else:
+                i += 1
+        else:  # ','
+            if not stack:
+                return i
+            i += 1
+
+def module_id(literal):
+    """Normalize a minified numeric module id (84e3, 0x1f, 123) to a string"""
+    return str(int(literal, 16) if literal.startswith('0x') else int(float(literal)))
+
+def parse_bundle(src):
+    """Split the bundle into (module map, runtime source, entry module ids)"""
+    if MODULES_START not in src or EXPORTS_START not in src:
+        raise ValueError("js/webflow.js doesn't look like a webpack/rspack bundle")
+    i = src.index(MODULES_START) + len(MODULES_START)
+    modules = {}
+    while True:
+        match = MODULE_KEY.match(src, i)
+        if not match:
+            raise ValueError(f"Unexpected module map syntax at offset {i}")
+        end = skip_expression(src, match.end())
+        modules[module_id(match.group(1))] = src[match.end():end]
+        i = end + 1
+        if src[end] == '}':
+            break
+    # Everything between the module map and the entry calls: require() and helpers
+    exports_at = src.index(EXPORTS_START)
+    runtime = src[i:exports_at + len(EXPORTS_START)]
+    entries = [module_id(m) for m in re.findall(r'__webpack_require__\(([0-9][0-9a-fA-Fe.x]*)\)',
+                                                src[exports_at:])]
+    return modules, runtime, entries
+
+# --- Dependency graph -------------------------------------------------------
+
+MODULE_PARAMS = re.compile(r'\s*(?:function\s*\(([^)]*)\)|\(([^)]*)\)\s*=>)')
+
+def module_deps(modules):
+    """Map module id -> ids it requires (via its third parameter, webpack's require)"""
+    deps = {}
+    for mid, source in modules.items():
+        match = MODULE_PARAMS.match(source)
+        params = (match.group(1) if match.group(1) is not None else match.group(2)).split(',') if match else []
+        if len(params) < 3:
+            deps[mid] = set()
+            continue
+        require = re.escape(params[2].strip())
+        ids = re.findall(r'(?<![\w$.])' + require + r'(?:\.t)?\(\s*([0-9][0-9a-fA-Fe.x]*)', source)
+        if 'webpackContext' in source:
+            # require.context map: {"./file": "id", ...}
+            ids += re.findall(r':"(\d+)"', source)
+        deps[mid] = {module_id(d) for d in ids if module_id(d) in modules}
+    return deps
+
+def closure(roots, deps):
+    """All modules reachable from roots"""
+    seen = set()
+    stack = list(roots)
+    while stack:
+        mid = stack.pop()
+        if mid not in seen:
+            seen.add(mid)
+            stack.extend(deps[mid])
+    return seen
+
+def entry_features(modules, entries):
+    """Map each entry module to the Webflow feature it defines (None for core)"""
+    features = {}
+    for mid in entries:
+        source = modules[mid]
+        names = re.findall(r'\.define\("([a-z0-9-]+)"', source)
+        names += re.findall(r'Webflow\.require\("([a-z0-9-]+)"\)\.init\(', source)
+        name = names[0] if names else None
+        features[mid] = None if name in CORE_FEATURES else name
+    return features
+
+def plan_chunks(modules, entries):
+    """Assign every reachable module to core or a feature-set chunk.
+
+    Returns (chunks {name: set(module ids)}, chunk_features {name: set(features)},
+    entry_features {entry id: feature or None}).
+    """
+    deps = module_deps(modules)
+    features = entry_features(modules, entries)
+    core = closure([mid for mid in entries if features[mid] is None], deps)
+    users = defaultdict(set)
+    for mid in entries:
+        if features[mid] is not None:
+            for dep in closure([mid], deps) - core:
+                users[dep].add(features[mid])
+    chunks = {'core': core}
+    chunk_features = {'core': set()}
+    for mid, feature_set in users.items():
+        name = '-'.join(sorted(feature_set))
+        chunks.setdefault(name, set()).add(mid)
+        chunk_features[name] = feature_set
+    return chunks, chunk_features, features
+
+# --- Output -----------------------------------------------------------------
+
+def render_chunk(name, modules, ids, runtime, entries):
+    """Source of one chunk; core also carries the runtime and runs the entries"""
+    module_map = ','.join(f'{mid}:{source}' for mid, source in modules.items() if mid in ids)
+    if name != 'core':
+        return f'(self.webflowChunks=self.webflowChunks||[]).push({{{module_map}}});'
+    return (
+        f'(()=>{{{MODULES_START}{module_map}}}{runtime}'
+        '(self.webflowChunks||[]).forEach(function(c){for(var i in c)__webpack_modules__[i]=c[i]});'
+        f'[{",".join(entries)}].forEach(function(i){{__webpack_modules__[i]&&__webpack_require__(i)}})}})();'
+    )
+
+def write_if_changed(path, data):
+    """Write `data` unless the file already holds it, so unchanged chunks keep their mtime"""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+def build_chunks(site_dir, modules, runtime, entries, chunks, write=True):
+    """Render (and write changed ones to js/webflow/) every chunk; returns {name: (bytes, gzip bytes)}"""
+    out_dir = os.path.join(site_dir, CHUNK_DIR)
+    if write:
+        os.makedirs(out_dir, exist_ok=True)
+    sizes = {}
+    for name, ids in chunks.items():
+        data = render_chunk(name, modules, ids, runtime, entries).encode('utf-8')
+        sizes[name] = (len(data), len(gzip.compress(data)))
+        if write:
+            write_if_changed(os.path.join(out_dir, f'{name}.js'), data)
+    if write:
+        # Chunks from a previous export that no longer exist
+        for filename in os.listdir(out_dir):
+            if filename.endswith('.js') and filename[:-3] not in chunks:
+                os.remove(os.path.join(out_dir, filename))
+    return sizes
+
+def page_features(html, ix2_data):
+    """Webflow features a page uses"""
+    found = {name for name, marker in FEATURE_MARKERS.items() if marker.search(html)}
+    page_id = re.search(r'data-wf-page="([^"]+)"', html)
+    if page_id and page_id.group(1) in ix2_data:
+        # Page-level interactions (page load, scroll) have no data-w-id element
+        found.add('ix2')
+    return found
+
+def chunks_for(features, chunk_features):
+    """Chunk names a page loads: matching feature chunks, then core last"""
+    names = sorted(name for name, needs in chunk_features.items() if needs & features)
+    return names + ['core']
+
+def rewrite_page(html, names):
+    """Replace the page's webflow script tag(s) with the given chunks"""
+    match = SCRIPT_TAGS.search(html)
+    if not match:
+        return html
+    prefix = match.group(1)
+    defer = match.group(2) or ''  # vendor_scripts.py defers everything after the vendor bundle
+    line_start = html.rfind('\n', 0, match.start()) + 1
+    indent = html[line_start:match.start()]
+    tags = [f'<script src="{prefix}js/webflow/{name}.js" type="text/javascript"{defer}></script>' for name in names]
+    return html[:match.start()] + ('\n' + indent).join(tags) + html[match.end():]
+
+def site_pages(site_dir):
+    """HTML pages at the site root and in products/ and recipes/"""
+    pages = []
+    for folder in ['', 'products', 'recipes']:
+        path = os.path.join(site_dir, folder)
+        if os.path.isdir(path):
+            pages += sorted(os.path.join(folder, f) for f in os.listdir(path) if f.endswith('.html'))
+    return pages
+
+def main():
+    """Split the bundle and rewrite pages
+
+    Usage: split_webflow_js.py [--site DIR] [--report]
+    --report prints the per-page sizes without writing anything.
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    report_only = '--report' in sys.argv
+
+    bundle_file = os.path.join(site_dir, BUNDLE_PATH)
+    with open(bundle_file, 'r', encoding='utf-8') as f:
+        src = f.read()
+    modules, runtime, entries = parse_bundle(src)
+    chunks, chunk_features, features = plan_chunks(modules, entries)
+    ix2_data = ''.join(modules[mid] for mid in entries if features[mid] == 'ix2')
+
+    bundle_bytes = len(src.encode('utf-8'))
+    bundle_gzip = len(gzip.compress(src.encode('utf-8')))
+    print(f"📦 {BUNDLE_PATH}: {len(modules)} modules, {len(entries)} entries, {bundle_bytes:,} bytes")
+
+    sizes = build_chunks(site_dir, modules, runtime, entries, chunks, write=not report_only)
+    for name in sorted(sizes, key=lambda n: (n != 'core', n)):
+        print(f"   - {name}.js: {sizes[name][0]:,} bytes ({sizes[name][1]:,} gzip)")
+
+    print(f"\n{'Page':<48} {'Before':>11} {'After':>11} {'Gzip after':>11}  Chunks")
+    total_before = total_after = 0
+    for page in site_pages(site_dir):
+        path = os.path.join(site_dir, page)
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        if not SCRIPT_TAGS.search(html):
+            continue
+        names = chunks_for(page_features(html, ix2_data), chunk_features)
+        after = sum(sizes[name][0] for name in names)
+        after_gzip = sum(sizes[name][1] for name in names)
+        total_before += bundle_bytes
+        total_after += after
+        print(f"{page:<48} {bundle_bytes:>11,} {after:>11,} {after_gzip:>11,}  {', '.join(names)}")
+        if not report_only:
+            updated = rewrite_page(html, names)
+            if updated != html:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(updated)
+
+    if total_before:
+        print(f"\n✅ Webflow JS per page: {total_before:,} -> {total_after:,} bytes total "
+              f"({100 * (1 - total_after / total_before):.0f}% less; bundle is {bundle_gzip:,} bytes gzip)")
+    if report_only:
+        print("   (report only, nothing written)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+SVG icon sprite.
+
+The small SVGs under images/ (recipe details, checkout badges, back arrows)
+are each a request of their own, and the homepage slider arrows (from
+create_product_slides) and the Webflow modal/star icons are loaded from
+uploads-ssl.webflow.com. This stage replaces every local or localized icon
+<img> with
+
+    <svg class="arrow-3" width="48" data-icon="arrow-left" aria-hidden="true">
+      <use href="icons/sprite-<hash>.svg#arrow-left"></use></svg>
+
+pointing into one sprite file holding an optimized <symbol> per icon. The
+sprite's name changes with its content, so _headers caches it forever, and
+every page shares it.
+
+- Icons are SVG <img>s up to ICON_MAX_BYTES, without raster images, scripts
+  or styles. CMS placeholders (w-dyn-bind-empty), responsive images (srcset)
+  and elements Webflow interactions target (data-w-id) are left alone.
+- Remote icons are only used once localized: icons/remote/manifest.json lists
+  each URL with its local copy and pinned hash, and the copies are committed,
+  like js/vendor/. `--fetch` adds the remote icons found on the pages and
+  downloads the missing copies (it needs network). A new copy is not trusted
+  on first download: it stays unused until it has been reviewed and its hash
+  pinned with `--pin`. No remote icon has been localized yet, so those still
+  load from the Webflow CDNs.
+- Optimizing strips editor metadata, comments and whitespace, rounds long
+  decimals to 3 places and prefixes ids with the icon name so symbols can't
+  clash. Icons with the same content share one symbol.
+- The <svg> keeps the <img>'s class, id and style, and its width (the
+  <img>'s, else the icon's own) unless the stylesheets size that class by
+  height only. It carries the icon's viewBox, so the other dimension follows
+  from the icon's aspect ratio, like an <img> (without one an inline <svg>
+  falls back to 150px tall). Re-runs add it to <svg>s written without. A
+  zero-specificity rule in the site stylesheet gives icons the img defaults
+  (inline-block, max-width: 100%, vertical-align: middle).
+- Re-runs point existing <use> references at the current sprite. Sprites no
+  page uses any more are removed.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import urllib.request
+from html import escape
+
+import font_usage
+import page_weight
+import resource_hints
+import vendor_scripts
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ICONS_DIR = 'icons'
+REMOTE_DIR = os.path.join('icons', 'remote')
+MANIFEST_NAME = 'manifest.json'
+CSS_FILE = os.path.join('css', 'outlaw-spice.webflow.css')
+CSS_BEGIN = '/* BEGIN icon sprite (generated by svg_sprite.py) */'
+CSS_END = '/* END icon sprite */'
+HEADERS_FILE = '_headers'
+HEADERS_BEGIN = '# BEGIN icon sprite (generated by svg_sprite.py)'
+HEADERS_END = '# END icon sprite'
+
+# Larger SVGs are illustrations rather than icons
+ICON_MAX_BYTES = 8 * 1024
+HASH_LENGTH = 12
+
+# Same defaults webflow.css gives img, at zero specificity so any class wins
+ICON_CSS = ':where(svg[data-icon]) {\n  max-width: 100%;\n  vertical-align: middle;\n  display: inline-block;\n}'
+
+IMG_TAG = re.compile(r'<img\b([^>]*?)\s*/?>')
+ATTR = re.compile(r'([\w:-]+)="([^"]*)"')
+USE_REF = re.compile(r'(<use href=")[^"]*?' + ICONS_DIR + r'/sprite-[0-9a-f]+\.svg#([\w-]+)(")')
+SPRITE_FILE = re.compile(r'^sprite-[0-9a-f]+\.svg$')
+SYMBOL = re.compile(r'<symbol id="([\w-]+)".*?</symbol>', re.DOTALL)
+SYMBOL_VIEW_BOX = re.compile(r'^<symbol id="[\w-]+" viewBox="([^"]+)"')
+ICON_SVG = re.compile(r'<svg\b([^>]*?) data-icon="([\w-]+)"')
+
+# <img> attributes that don't carry over to the <svg>
+IMG_ONLY = {'src', 'alt', 'loading', 'decoding', 'width', 'height', 'fetchpriority', 'crossorigin',
+            'referrerpolicy'}
+# <img>s that aren't icons even when they are small SVGs
+SKIP_ATTRS = {'srcset', 'sizes', 'data-w-id'}
+SKIP_CLASSES = {'w-dyn-bind-empty'}
+
+# Stripped from icon sources
+JUNK = re.compile(r'<\?xml.*?\?>|<!DOCTYPE[^>]*>|<!--.*?-->|<(metadata|title|desc)\b.*?</\1>'
+                  r'|<sodipodi:namedview\b[^>]*?(?:/>|>.*?</sodipodi:namedview>)', re.DOTALL)
+EDITOR_ATTR = re.compile(r'\s(?:(?:inkscape|sodipodi):[\w-]+|xmlns(?::\w+)?|data-name|version)="[^"]*"')
+UNSAFE = re.compile(r'<(?:image|script|style|foreignObject)\b|\son\w+=', re.IGNORECASE)
+ROOT = re.compile(r'<svg\b([^>]*)>(.*)</svg>', re.DOTALL)
+BARE_GROUP = re.compile(r'<g>((?:(?!</?g[\s>]).)*)</g>', re.DOTALL)
+LONG_DECIMAL = re.compile(r'\d*\.\d{4,}')
+LENGTH = re.compile(r'^\s*([\d.]+)\s*(px|pt)?\s*$')
+# Root attributes that style the icon's content, moved to a wrapping <g>
+PRESENTATION = {'fill', 'fill-opacity', 'fill-rule', 'clip-rule', 'stroke', 'stroke-width', 'stroke-linecap',
+                'stroke-linejoin', 'stroke-miterlimit', 'stroke-opacity', 'opacity', 'color'}
+
+def icon_name(path):
+    """Symbol id for an icon file: its name less any Webflow asset id prefix"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    stem = re.sub(r'^[0-9a-f]{24}_', '', stem).lower()
+    return re.sub(r'[^a-z0-9]+', '-', stem).strip('-') or 'icon'
+
+def length(value):
+    """A width/height attribute in CSS px, or None for percentages and the like"""
+    match = LENGTH.match(value or '')
+    if not match:
+        return None
+    return float(match.group(1)) * (4 / 3 if match.group(2) == 'pt' else 1)
+
+def short_number(match):
+    return f'{float(match.group(0)):.3f}'.rstrip('0').rstrip('.')
+
+def optimize(svg, name):
+    """(symbol body, viewBox, natural width) for an icon source, or None if it isn't one"""
+    if UNSAFE.search(svg):
+        return None
+    svg = JUNK.sub('', svg)
+    root = ROOT.search(svg)
+    if not root:
+        return None
+    attrs = dict(ATTR.findall(root.group(1)))
+    view_box = attrs.get('viewBox')
+    width, height = length(attrs.get('width')), length(attrs.get('height'))
+    if not view_box:
+        if not (width and height):
+            return None
+        view_box = f'0 0 {width:g} {height:g}'
+    box = view_box.replace(',', ' ').split()
+    if len(box) != 4:
+        return None
+    natural = width or float(box[2])
+
+    inner = EDITOR_ATTR.sub('', root.group(2)).replace('xlink:href=', 'href=')
+    inner = re.sub(r'="([^"]*)"', lambda m: '="' + ' '.join(LONG_DECIMAL.sub(short_number, m.group(1)).split()) + '"',
+                   inner)
+    inner = re.sub(r'>\s+<', '><', inner).strip()
+    # Groups without attributes do nothing
+    unwrapped = None
+    while unwrapped != inner:
+        unwrapped, inner = inner, BARE_GROUP.sub(r'\1', inner)
+    for old in re.findall(r'\bid="([^"]+)"', inner):
+        inner = re.sub(r'(\bid="|url\(#|href="#)' + re.escape(old) + r'(?=[")])',
+                       lambda m: m.group(1) + f'{name}-{old}', inner)
+    styles = ''.join(f' {k}="{v}"' for k, v in attrs.items() if k in PRESENTATION)
+    if styles:
+        inner = f'<g{styles}>{inner}</g>'
+    aspect = f' preserveAspectRatio="{attrs["preserveAspectRatio"]}"' if 'preserveAspectRatio' in attrs else ''
+    return f' viewBox="{" ".join(box)}"{aspect}>{inner}', ' '.join(box), natural
+
+def load_manifest(site_dir):
+    """Remote icon URL -> {file, integrity}"""
+    path = os.path.join(site_dir, REMOTE_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def fetch(site_dir, manifest, urls):
+    """Add new remote icons to the manifest and download missing copies
+
+    Copies of pinned entries must match their hash. Entries without one are
+    downloaded but left unpinned (so still unused) until they are reviewed and
+    pinned with --pin: nothing is trusted just because the CDN served it.
+    """
+    ok = True
+    files = {entry['file'] for entry in manifest.values()}
+    for url in sorted(urls):
+        if url not in manifest:
+            name, number = icon_name(url.split('?', 1)[0]), 1
+            while f'{name}.svg' in files:
+                number += 1
+                name = f'{icon_name(url.split("?", 1)[0])}-{number}'
+            manifest[url] = {'file': f'{name}.svg', 'integrity': None}
+            files.add(f'{name}.svg')
+    os.makedirs(os.path.join(site_dir, REMOTE_DIR), exist_ok=True)
+    unpinned = []
+    for url, entry in sorted(manifest.items()):
+        path = os.path.join(site_dir, REMOTE_DIR, entry['file'])
+        if os.path.exists(path):
+            if not entry.get('integrity'):
+                unpinned.append(entry['file'])
+                continue
+            with open(path, 'rb') as f:
+                if vendor_scripts.sri_hash(f.read()) == entry['integrity']:
+                    continue
+        print(f"⬇️  {url}")
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                data = response.read()
+        except OSError as e:
+            print(f"   ❌ {e}")
+            ok = False
+            continue
+        digest = vendor_scripts.sri_hash(data)
+        if entry.get('integrity') and entry['integrity'] != digest:
+            print(f"   ❌ Integrity mismatch: pinned {entry['integrity']}, got {digest}")
+            ok = False
+            continue
+        with open(path, 'wb') as f:
+            f.write(data)
+        print(f"   ✅ {entry['file']}, {len(data):,} bytes")
+        if not entry.get('integrity'):
+            unpinned.append(entry['file'])
+    vendor_scripts.save_json(os.path.join(site_dir, REMOTE_DIR, MANIFEST_NAME), manifest)
+    if unpinned:
+        print(f"❌ {len(unpinned)} icon(s) in {REMOTE_DIR}/ have no pinned hash; review them, "
+              f"then run `python3 svg_sprite.py --pin` and commit {REMOTE_DIR}/")
+        ok = False
+    return ok
+
+def pin(site_dir, manifest):
+    """Pin the hash of each reviewed local copy that has none yet; returns how many"""
+    pinned = 0
+    for url, entry in sorted(manifest.items()):
+        path = os.path.join(site_dir, REMOTE_DIR, entry['file'])
+        if entry.get('integrity') or not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            entry['integrity'] = vendor_scripts.sri_hash(f.read())
+        print(f"📌 {entry['file']}: {entry['integrity']}")
+        pinned += 1
+    if pinned:
+        vendor_scripts.save_json(os.path.join(site_dir, REMOTE_DIR, MANIFEST_NAME), manifest)
+    return pinned
+
+class Icons:
+    """Icon sources resolved, optimized and named once per run"""
+
+    def __init__(self, site_dir, manifest, known):
+        self.site_dir = site_dir
+        self.manifest = manifest
+        self.by_path = {}
+        # Symbols of the previous sprite keep serving pages converted by earlier runs
+        self.symbols = dict(known)
+        self.by_body = {re.sub(r'^<symbol id="[\w-]+"', '', markup)[:-len('</symbol>')]: name
+                        for name, markup in known.items()}
+        self.source_bytes = {}
+        self.unlocalized = set()
+
+    def source(self, page, src):
+        """Site-relative path of an <img> src's SVG, or None"""
+        if page_weight.is_remote(src):
+            entry = self.manifest.get(src)
+            if not entry:
+                self.unlocalized.add(src)
+                return None
+            path = os.path.join(REMOTE_DIR, entry['file'])
+            full = os.path.join(self.site_dir, path)
+            if not os.path.exists(full) or not entry.get('integrity'):
+                self.unlocalized.add(src)
+                return None
+            with open(full, 'rb') as f:
+                if vendor_scripts.sri_hash(f.read()) != entry.get('integrity'):
+                    print(f"⚠️  {path} doesn't match its pinned hash; run `python3 svg_sprite.py --fetch`")
+                    return None
+            return path
+        path = page_weight.resolve(page, src)
+        return path if path and os.path.exists(os.path.join(self.site_dir, path)) else None
+
+    def get(self, page, src):
+        """(symbol name, natural width, viewBox) for an icon <img> src, or None"""
+        if not src.split('?', 1)[0].lower().endswith('.svg'):
+            return None
+        path = self.source(page, src)
+        if not path:
+            return None
+        if path not in self.by_path:
+            self.by_path[path] = self.load(path)
+        return self.by_path[path]
+
+    def load(self, path):
+        full = os.path.join(self.site_dir, path)
+        if os.path.getsize(full) > ICON_MAX_BYTES:
+            return None
+        with open(full, 'r', encoding='utf-8', errors='replace') as f:
+            svg = f.read()
+        base = icon_name(path)
+        optimized = optimize(svg, base)
+        if not optimized:
+            return None
+        body, view_box, natural = optimized
+        name = self.by_body.get(body)
+        if not name:
+            name, number = base, 1
+            while name in self.symbols:
+                number += 1
+                name = f'{base}-{number}'
+                body = optimize(svg, name)[0]
+            self.symbols[name] = f'<symbol id="{name}"{body}</symbol>'
+            self.by_body[body] = name
+        self.source_bytes[name] = os.path.getsize(full)
+        return name, natural, view_box
+
+def sized_classes(css, sizes):
+    """Add {class: {'width', 'height'}} for the classes whose rules set a width or height"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    for prelude, body in font_usage.iter_blocks(css):
+        if prelude.lower().startswith('@media'):
+            sized_classes(body, sizes)
+        elif not prelude.startswith('@'):
+            props = set(re.findall(r'(?:^|;)\s*(width|height)\s*:', body))
+            if not props:
+                continue
+            for selector in font_usage.split_selectors(prelude):
+                compound = re.split(r'[\s>+~]+', selector.strip())[-1]
+                for cls in re.findall(r'\.([\w-]+)', compound):
+                    sizes.setdefault(cls, set()).update(props)
+    return sizes
+
+def page_sizes(site_dir, page, html, cache):
+    """Sized classes from the stylesheets a page links"""
+    sizes = {}
+    for href in font_usage.STYLESHEET_LINK.findall(html):
+        path = page_weight.resolve(page, href)
+        if path not in cache:
+            cache[path] = {}
+            if path and os.path.exists(os.path.join(site_dir, path)):
+                with open(os.path.join(site_dir, path), 'r', encoding='utf-8') as f:
+                    sized_classes(f.read(), cache[path])
+        for cls, props in cache[path].items():
+            sizes.setdefault(cls, set()).update(props)
+    return sizes
+
+def icon_svg(attrs, name, natural, view_box, href, sizes):
+    """The <svg><use></svg> standing in for an icon <img>"""
+    kept = ''.join(f' {k}="{v}"' for k, v in attrs if k not in IMG_ONLY)
+    values = dict(attrs)
+    classes = values.get('class', '').split()
+    by_css = set().union(*(sizes.get(cls, set()) for cls in classes)) if classes else set()
+    if values.get('width'):
+        size = f' width="{values["width"]}"'
+    elif values.get('height'):
+        size = f' height="{values["height"]}"'
+    elif 'height' in by_css and 'width' not in by_css:
+        size = ''
+    else:
+        size = f' width="{round(natural, 2):g}"'
+    label = (f' role="img" aria-label="{values["alt"]}"' if values.get('alt', '').strip()
+             else ' aria-hidden="true"')
+    return (f'<svg{kept}{size} viewBox="{view_box}" data-icon="{name}"{label}>'
+            f'<use href="{href}#{name}"></use></svg>')
+
+def rewrite_page(html, page, icons, sprite, sizes, used):
+    """Swap icon <img>s for sprite references; returns (html, icon <img>s replaced, distinct icons)"""
+    href = escape(vendor_scripts.page_prefix(page) + sprite) if sprite else ''
+    replaced = 0
+    distinct = set()
+    def replace(match):
+        nonlocal replaced
+        attrs = ATTR.findall(match.group(1))
+        values = dict(attrs)
+        if (SKIP_ATTRS & set(values) or SKIP_CLASSES & set(values.get('class', '').split())
+                or 'src' not in values):
+            return match.group(0)
+        icon = icons.get(page, values['src'])
+        if not icon:
+            return match.group(0)
+        name, natural, view_box = icon
+        used.add(name)
+        distinct.add(values['src'])
+        replaced += 1
+        return icon_svg(attrs, name, natural, view_box, href, sizes)
+    html = IMG_TAG.sub(replace, html)
+    def add_view_box(match):
+        view_box = SYMBOL_VIEW_BOX.match(icons.symbols.get(match.group(2), ''))
+        if 'viewBox=' in match.group(1) or not view_box:
+            return match.group(0)
+        return f'<svg{match.group(1)} viewBox="{view_box.group(1)}" data-icon="{match.group(2)}"'
+    html = ICON_SVG.sub(add_view_box, html)
+    def repoint(match):
+        used.add(match.group(2))
+        return match.group(1) + href + '#' + match.group(2) + match.group(3)
+    return USE_REF.sub(repoint, html), replaced, distinct
+
+def previous_symbols(site_dir):
+    """{name: <symbol>} from the sprites already in icons/"""
+    symbols = {}
+    folder = os.path.join(site_dir, ICONS_DIR)
+    if os.path.isdir(folder):
+        for name in sorted(os.listdir(folder)):
+            if SPRITE_FILE.match(name):
+                with open(os.path.join(folder, name), 'r', encoding='utf-8') as f:
+                    for match in SYMBOL.finditer(f.read()):
+                        symbols.setdefault(match.group(1), match.group(0))
+    return symbols
+
+def write_sprite(site_dir, symbols, used):
+    """Write the sprite for the used symbols; returns (site-relative path, bytes), or (None, 0)"""
+    folder = os.path.join(site_dir, ICONS_DIR)
+    sprite = None
+    data = ''
+    if used:
+        data = ('<svg xmlns="http://www.w3.org/2000/svg">'
+                + ''.join(symbols[name] for name in sorted(used) if name in symbols) + '</svg>\n')
+        digest = hashlib.sha256(data.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+        sprite = f'{ICONS_DIR}/sprite-{digest}.svg'
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(site_dir, sprite)
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(data)
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            if SPRITE_FILE.match(name) and f'{ICONS_DIR}/{name}' != sprite:
+                os.remove(os.path.join(folder, name))
+    return sprite, len(data.encode('utf-8'))
+
+def main():
+    """Build the icon sprite and point the pages at it
+
+    Usage: svg_sprite.py [--site DIR] [--fetch] [--pin]
+    --fetch localizes the remote icons on the pages first (needs network).
+    --pin pins the hashes of reviewed copies in icons/remote/ that have none.
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+
+    pages = resource_hints.site_pages(site_dir)
+    manifest = load_manifest(site_dir)
+    if '--pin' in sys.argv:
+        print(f"📌 Pinned {pin(site_dir, manifest)} icon hash(es) in {REMOTE_DIR}/{MANIFEST_NAME}")
+    fetching = '--fetch' in sys.argv
+    while True:
+        # First pass: which symbols the pages need
+        icons = Icons(site_dir, manifest, previous_symbols(site_dir))
+        used = set()
+        for page in pages:
+            with open(os.path.join(site_dir, page), 'r', encoding='utf-8') as f:
+                rewrite_page(f.read(), page, icons, None, {}, used)
+        if not (fetching and icons.unlocalized):
+            break
+        fetching = False
+        if not fetch(site_dir, manifest, icons.unlocalized):
+            print("⚠️  Some remote icons couldn't be fetched or aren't pinned; they stay remote")
+
+    sprite, sprite_bytes = write_sprite(site_dir, icons.symbols, used)
+    css_cache = {}
+    replaced = 0
+    saved = 0
+    changed = 0
+    for page in pages:
+        path = os.path.join(site_dir, page)
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        sizes = page_sizes(site_dir, page, html, css_cache)
+        updated, count, distinct = rewrite_page(html, page, icons, sprite, sizes, set())
+        replaced += count
+        # One sprite request instead of one per icon (none extra if the page already had it)
+        saved += len(distinct) - (0 if 'data-icon=' in html or not distinct else 1)
+        if updated != html:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(updated)
+            changed += 1
+    if os.path.exists(os.path.join(site_dir, CSS_FILE)):
+        resource_hints.write_managed_block(os.path.join(site_dir, CSS_FILE), CSS_BEGIN, CSS_END, ICON_CSS)
+    resource_hints.write_managed_block(os.path.join(site_dir, HEADERS_FILE), HEADERS_BEGIN, HEADERS_END,
+                                       f'/{ICONS_DIR}/sprite-*\n  Cache-Control: public, max-age=31536000, immutable')
+
+    sources = f" (the separate files were {sum(icons.source_bytes.values()):,} bytes)" if icons.source_bytes else ''
+    print(f"✅ Icon sprite {sprite or '(none)'}: {len(used)} symbol(s), {sprite_bytes:,} bytes{sources}")
+    print(f"   Replaced {replaced} icon <img>(s) on {changed} page(s); {saved} icon request(s) saved across pages")
+    if icons.unlocalized:
+        hosts = sorted({url.split('/')[2] for url in icons.unlocalized if '//' in url})
+        print(f"⚠️  {len(icons.unlocalized)} remote icon(s) not localized yet ({', '.join(hosts)}); "
+              f"run `python3 svg_sprite.py --fetch`, review and `--pin` them, and commit {REMOTE_DIR}/")
+
+if __name__ == '__main__':
+    main()
@@ -7,98 +7,68 @@ echo "===================================="
 BASE_DIR="/Users/elombe.kisala/Library/Mobile Documents/com~apple~CloudDocs/Work - Core Home/CORE HOME/Brands : Projects/SPICES/Outlaw Spice/outlaw-spice-website"
 cd "$BASE_DIR"
 
-# Airtable credentials from config
-TOKEN=$(cat airtable_config.json | python3 -c "import sys, json; print(json.load(sys.stdin)['airtable_token'])")
-BASE_ID=$(cat airtable_config.json | python3 -c "import sys, json; print(json.load(sys.stdin)['base_id'])")
-
-# Create CSV export directory
-mkdir -p airtable_exports
-
-echo ""
-echo "📥 Step 1: Fetching Products from Airtable..."
-curl -s -H "Authorization: Bearer $TOKEN" \
-  "https://api.airtable.com/v0/$BASE_ID/Products" | \
-  python3 -c "
-import sys, json, csv
-
-data = json.load(sys.stdin)
-records = data.get('records', [])
-
-# Define CSV columns (matching your existing CSV structure + new image fields)
-columns = [
-    'Products Collection ID', 'Product ID', 'Variants Collection ID', 'Variant ID',
-    'Product Handle', 'Product Name', 'Product Type', 'Product Description',
-    'Product Ingredients', 'Product Categories', 
-    'Main Variant Image', 'Transparent Product Image', 'Main Product Image',
-    'More Images 1', 'More Images 2', 'More Images 3',
-    'More Variant Images',
-    'Variant Price', 'Variant Compare-at Price', 'Product Tax Class',
-    'Variant Sku', 'Variant Inventory', 'Requires Shipping', 'Variant Weight',
-    'Variant Width', 'Variant Height', 'Variant Length', 'Variant Download Name',
-    'Variant Download URL', 'Option1 Name', 'Option1 Value', 'Option2 Name',
-    'Option2 Value', 'Option3 Name', 'Option3 Value', 'Created On',
-    'Updated On', 'Published On'
-]
-
-with open('airtable_exports/products.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.DictWriter(f, fieldnames=columns)
-    writer.writeheader()
-    
-    for record in records:
-        fields = record.get('fields', {})
-        row = {col: fields.get(col, '') for col in columns}
-        writer.writerow(row)
-
-print(f'✓ Exported {len(records)} product records')
-"
+if [ "$1" = "--pipelined" ]; then
+    echo ""
+    echo "📥 Steps 1-2: Syncing from Airtable and rendering pages as products arrive..."
+    # Same catalog, CSV exports and pages, with fetching and rendering overlapped
+    python3 pipeline_build.py
+else
+    echo ""
+    echo "📥 Step 1: Syncing Products, Recipes and Ingredients from Airtable..."
+    # Writes the local SQLite catalog (airtable_exports/catalog.db) and the CSV exports
+    if ! python3 airtable_sync.py; then
+        echo "❌ Airtable sync failed; pages were not regenerated"
+        exit 1
+    fi
+
+    echo ""
+    echo "🔧 Step 2: Regenerating Product Pages..."
+    if [ -f locales.json ]; then
+        # Every storefront locale in one run; only locales whose records changed re-render
+        python3 locale_build.py
+    else
+        python3 generate_cms_pages.py
+    fi
+fi
 
 echo ""
-echo "📥 Step 2: Fetching Recipes from Airtable..."
-curl -s -H "Authorization: Bearer $TOKEN" \
-  "https://api.airtable.com/v0/$BASE_ID/Recipes" | \
-  python3 -c "
-import sys, json, csv
-
-data = json.load(sys.stdin)
-records = data.get('records', [])
-
-# Define CSV columns for recipes
-columns = [
-    'Name', 'Slug', 'Collection ID', 'Locale ID', 'Item ID',
-    'Created On', 'Updated On', 'Published On', 'Archived', 'Draft',
-    'Description', 'Thumbnail Image', 'Main Image', 'Prep Time', 'Cook Time',
-    'Servings', 'Difficulty', 'Ingredients', 'Instructions', 'Tags'
-]
-
-with open('airtable_exports/recipes.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.DictWriter(f, fieldnames=columns)
-    writer.writeheader()
-    
-    for record in records:
-        fields = record.get('fields', {})
-        row = {col: fields.get(col, '') for col in columns}
-        writer.writerow(row)
-
-print(f'✓ Exported {len(records)} recipe records')
-"
+echo "🎚️  Step 3: Writing variant JSON for changed products..."
+python3 variant_matrix.py
 
 echo ""
-echo "🔧 Step 3: Regenerating Product Pages..."
-python3 generate_cms_pages.py
+echo "💲 Step 4: Writing prices.json for the price overlay..."
+# Does nothing unless "price_overlay": true is set in airtable_config.json
+python3 price_overlay.py
 
 echo ""
-echo "🔧 Step 4: Updating Homepage Slider..."
+echo "🔧 Step 5: Updating Homepage Slider..."
 python3 fix_slider_single_product.py
 
+# Steps 6-15: per-page post-processing (shared with rebuild_daemon.py)
+python3 post_build.py
+
 echo ""
 echo "✅ SYNC COMPLETE!"
 echo ""
 echo "📋 Summary:"
+echo "   - Local catalog updated: airtable_exports/catalog.db"
 echo "   - Products exported to: airtable_exports/products.csv"
 echo "   - Recipes exported to: airtable_exports/recipes.csv"
 echo "   - Product pages regenerated in: products/"
 echo "   - Recipe pages regenerated in: recipes/"
+echo "   - Variant options fetched on demand from: variants/"
+echo "   - Prices and stock served from prices.json when the price overlay is on"
 echo "   - Homepage updated with latest data"
+echo "   - Pages load only the webflow.js chunks they use: js/webflow/"
+echo "   - Third-party scripts served from js/vendor/ (deferred bundle)"
+echo "   - Pages request only the font faces they render"
+echo "   - Icons served from one cached sprite: icons/sprite-<hash>.svg"
+echo "   - Images served once per unique content from images/store/"
+echo "   - Background videos wait for the viewport, posters shown first: js/lazy-video.js"
+echo "   - Hero images preloaded, below-the-fold images lazy, _headers updated"
+echo "   - Likely next pages prefetched/prerendered (speculation rules)"
+echo "   - Grid and slider images show blurred placeholders while loading"
+echo "   - Service worker precaches shared assets: sw.js, precache-manifest.json"
 echo ""
 echo "💡 Next: Review changes and commit to git"
 
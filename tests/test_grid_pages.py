@@ -0,0 +1,53 @@
+"""
+Pages built with the price overlay off: the grid pages list their cards and
+product pages show the price in the product header, not the nav cart dropdown.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import golden_check  # noqa: E402
+
+NUM_PRODUCTS = 6
+
+class GridPagesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.root = os.path.join(cls.tmp.name, 'site')
+        golden_check.make_tree(cls.root, golden_check.working_python(), 'synthetic', NUM_PRODUCTS)
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1', OUTLAW_BUILD_CACHE='off')
+        for script in ('generate_cms_pages.py', 'create_grid_pages.py'):
+            subprocess.run([sys.executable, script, '--skip-schema-check'], cwd=cls.root, env=env,
+                           check=True, capture_output=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def read(self, page):
+        with open(os.path.join(self.root, page), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_products_grid_lists_every_product(self):
+        html = self.read('products.html')
+        self.assertEqual(html.count('class="product-card w-dyn-item"'), NUM_PRODUCTS)
+        self.assertEqual(len(re.findall(r'<div class="product-price">\$[\d.]+</div>', html)), NUM_PRODUCTS)
+        self.assertNotIn('price-overlay.js', html)
+
+    def test_product_price_in_header(self):
+        page = sorted(os.listdir(os.path.join(self.root, 'products')))[0]
+        html = self.read(os.path.join('products', page))
+        self.assertRegex(html, r'<div class="heading-style-h5-2"[^>]*>\$[\d.]+</div>')
+        # The nav cart dropdown's price slot stays a CMS placeholder
+        self.assertIn('<div class="text-weight-semibold w-dyn-bind-empty"></div>', html)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Price overlay mode end to end in a scratch tree: the grid and product pages
+carry price placeholders and the overlay script, and prices.json has an entry
+for every placeholder js/price-overlay.js fills.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import golden_check  # noqa: E402
+
+SCRIPT_TAG = '<script src="js/price-overlay.js" data-prices="prices.json"'
+
+class PriceOverlayTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.root = os.path.join(cls.tmp.name, 'site')
+        golden_check.make_tree(cls.root, golden_check.working_python(), 'synthetic', 12)
+        with open(os.path.join(cls.root, 'airtable_config.json'), 'w', encoding='utf-8') as f:
+            json.dump({'price_overlay': True}, f)
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1', OUTLAW_BUILD_CACHE='off')
+        for script in ('generate_cms_pages.py', 'create_grid_pages.py', 'price_overlay.py'):
+            subprocess.run([sys.executable, script, '--skip-schema-check'], cwd=cls.root, env=env,
+                           check=True, capture_output=True)
+        with open(os.path.join(cls.root, 'prices.json'), 'r', encoding='utf-8') as f:
+            cls.prices = json.load(f)['prices']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def read(self, page):
+        with open(os.path.join(self.root, page), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_grid_page_is_filled(self):
+        html = self.read('products.html')
+        handles = re.findall(r'data-price="([^"]+)"', html)
+        self.assertEqual(sorted(handles), sorted(self.prices))
+        self.assertIn(SCRIPT_TAG, html)
+
+    def test_recipes_grid_lists_recipes(self):
+        html = self.read('recipes.html')
+        self.assertIn('class="recipe-card w-dyn-item"', html)
+        self.assertNotIn('section_header34', html)
+
+    def test_product_page_price_in_header(self):
+        handle = sorted(self.prices)[0]
+        html = self.read(os.path.join('products', f'{handle}.html'))
+        self.assertRegex(html, r'<div class="heading-style-h5-2"[^>]* data-price="' + re.escape(handle) + '"')
+        self.assertEqual(html.count('data-price='), 1)
+
+if __name__ == '__main__':
+    unittest.main()
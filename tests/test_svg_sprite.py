@@ -0,0 +1,68 @@
+"""
+Icon <img>s swapped for sprite references keep their rendered size: the
+<svg> carries the icon's viewBox, so a width alone gives the <img>'s height.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 20x10 icon, shown 40px wide: 20px tall as an <img>
+ICON = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 20 10"><path d="M0 0h20v10z"/></svg>'
+PAGE = ('<html><head></head><body>\n'
+        '<img src="images/wide.svg" loading="lazy" width="40" alt="" class="image-4">\n'
+        '<img src="images/wide.svg" alt="" class="no-width">\n'
+        '</body></html>\n')
+OLD_SVG = ('<svg class="old" width="40" data-icon="wide" aria-hidden="true">'
+           '<use href="icons/sprite-0123456789ab.svg#wide"></use></svg>')
+
+class SvgSpriteTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.site = self.tmp.name
+        os.makedirs(os.path.join(self.site, 'images'))
+        with open(os.path.join(self.site, 'images', 'wide.svg'), 'w', encoding='utf-8') as f:
+            f.write(ICON)
+        with open(os.path.join(self.site, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(PAGE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_sprite(self):
+        subprocess.run([sys.executable, os.path.join(BASE_DIR, 'svg_sprite.py'), '--site', self.site],
+                       check=True, capture_output=True)
+        with open(os.path.join(self.site, 'index.html'), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def rendered_size(self, svg):
+        """(width, height) a browser gives an inline <svg> with a width or height attribute"""
+        box = [float(n) for n in re.search(r'viewBox="([^"]+)"', svg).group(1).split()]
+        width = re.search(r' width="([\d.]+)"', svg)
+        height = re.search(r' height="([\d.]+)"', svg)
+        if width and not height:
+            return float(width.group(1)), float(width.group(1)) * box[3] / box[2]
+        return float(width.group(1)), float(height.group(1))
+
+    def test_icons_keep_their_aspect_ratio(self):
+        svgs = re.findall(r'<svg\b[^>]*>', self.run_sprite())
+        self.assertEqual(len(svgs), 2)
+        self.assertEqual(self.rendered_size(svgs[0]), (40, 20))
+        self.assertEqual(self.rendered_size(svgs[1]), (20, 10))
+
+    def test_rerun_adds_missing_view_box(self):
+        html = self.run_sprite()
+        html = html.replace('</body>', OLD_SVG + '\n</body>')
+        with open(os.path.join(self.site, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+        old = re.search(r'<svg class="old"[^>]*>', self.run_sprite()).group(0)
+        self.assertIn('viewBox="0 0 20 10"', old)
+        self.assertEqual(self.rendered_size(old), (40, 20))
+
+if __name__ == '__main__':
+    unittest.main()
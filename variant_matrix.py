@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Per-product variant matrix JSON, loaded on demand.
+
+Product pages only show the first variant's price. Inlining every variant's
+data would make the ~117 KB product pages bigger still, so each product gets
+one compact JSON file instead, variants/<handle>.json:
+
+    {"axes": [["Size", ["2 oz", "4 oz"]], ...],
+     "fields": ["options", "price", "compare_at", "sku", "weight", "image"],
+     "variants": [[[0, 1], "$11.16", "$22.22", "OS-RR-2", "35", "https://..."], ...]}
+
+`options` holds one index into each axis' values. Products with more than one
+variant get an option selector (render_selector, called from
+create_product_page) and js/variant-loader.js, which fetches the JSON the
+first time the shopper touches the selector and then updates the price, main
+image and selected variant as options change.
+
+A file is only rewritten when that product's variant rows change: the rows'
+hash per handle is kept in airtable_exports/variant_hashes.json. Files of
+products that are gone are removed.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from html import escape
+
+import price_overlay
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AIRTABLE_EXPORTS = os.path.join(BASE_DIR, "airtable_exports")
+HASHES_FILE = os.path.join(AIRTABLE_EXPORTS, "variant_hashes.json")
+VARIANTS_DIR = 'variants'
+LOADER_SCRIPT = os.path.join('js', 'variant-loader.js')
+
+# Option axes Webflow exports per variant
+OPTION_SLOTS = [1, 2, 3]
+
+# Per-variant columns, in the order they appear in the JSON rows
+VARIANT_FIELDS = [
+    ('price', 'Variant Price'),
+    ('compare_at', 'Variant Compare-at Price'),
+    ('sku', 'Variant Sku'),
+    ('weight', 'Variant Weight'),
+    ('image', 'Main Variant Image'),
+]
+
+LOADER_JS = """(function () {
+  document.querySelectorAll('[data-variants]').forEach(function (selector) {
+    var matrix = null;
+    var loading = null;
+    var form = selector.closest('form');
+    var price = form && form.querySelector('[data-variant-price]');
+    var image = document.querySelector('.product-header8_main-image');
+    var selects = selector.querySelectorAll('select[data-axis]');
+    function load() {
+      if (!loading) {
+        loading = fetch(selector.getAttribute('data-variants'))
+          .then(function (response) { return response.ok ? response.json() : null; })
+          .then(function (data) { matrix = data; return data; })
+          .catch(function () { loading = null; });
+      }
+      return loading;
+    }
+    function field(row, name) {
+      return row[matrix.fields.indexOf(name)];
+    }
+    function update() {
+      if (!matrix) return;
+      var chosen = Array.prototype.map.call(selects, function (select) { return select.selectedIndex; });
+      var row = matrix.variants.filter(function (variant) {
+        return field(variant, 'options').every(function (value, axis) { return value === chosen[axis]; });
+      })[0];
+      if (!row) return;
+      if (price && field(row, 'price')) price.textContent = field(row, 'price');
+      if (image && field(row, 'image')) image.src = field(row, 'image');
+      if (form) {
+        form.setAttribute('data-variant-sku', field(row, 'sku') || '');
+        form.setAttribute('data-variant-index', matrix.variants.indexOf(row));
+      }
+      // Lets js/price-overlay.js show this variant's price and stock
+      selector.dispatchEvent(new CustomEvent('variantchange', {bubbles: true}));
+    }
+    // Only fetched once the shopper reaches for the selector
+    ['pointerdown', 'focusin', 'touchstart'].forEach(function (type) {
+      selector.addEventListener(type, load, {once: true, passive: true});
+    });
+    selector.addEventListener('change', function () {
+      var pending = load();
+      if (pending) pending.then(update);
+    });
+  });
+})();
+"""
+
+def option_axes(variants):
+    """[(name, [values in first-seen order], slot)] for the option slots in use"""
+    axes = []
+    for slot in OPTION_SLOTS:
+        values = list(dict.fromkeys(v.get(f'Option{slot} Value', '') for v in variants
+                                    if v.get(f'Option{slot} Value')))
+        if values:
+            name = next((v.get(f'Option{slot} Name') for v in variants if v.get(f'Option{slot} Name')),
+                        f'Option {slot}')
+            axes.append((name, values, slot))
+    return axes
+
+def variant_fields():
+    """VARIANT_FIELDS less the ones prices.json serves in price overlay mode"""
+    if not price_overlay.enabled():
+        return VARIANT_FIELDS
+    return [(name, column) for name, column in VARIANT_FIELDS if column not in price_overlay.OVERLAY_FIELDS]
+
+def variant_matrix(variants, fields=None):
+    """The compact matrix for one product's variant rows"""
+    fields = fields or variant_fields()
+    axes = option_axes(variants)
+    rows = []
+    for variant in variants:
+        options = [values.index(variant[f'Option{slot} Value']) if variant.get(f'Option{slot} Value') else -1
+                   for _, values, slot in axes]
+        rows.append([options] + [variant.get(column, '') or '' for _, column in fields])
+    return {
+        'axes': [[name, values] for name, values, _ in axes],
+        'fields': ['options'] + [name for name, _ in fields],
+        'variants': rows,
+    }
+
+def render_selector(handle, variants, prefix='../'):
+    """Option selector markup for a product page ('' for a single-variant product)"""
+    axes = option_axes(variants)
+    if len(variants) < 2 or not axes:
+        return ''
+    fields = []
+    for axis, (name, values, _) in enumerate(axes):
+        options = ''.join(f'<option>{escape(value)}</option>' for value in values)
+        fields.append(f'<label class="text-size-small">{escape(name)}'
+                      f'<select class="w-select" data-axis="{axis}">{options}</select></label>')
+    return (f'<div class="variant-options" data-variants="{prefix}{VARIANTS_DIR}/{escape(handle)}.json">'
+            + ''.join(fields) + '</div>')
+
+def rows_hash(variants, skip=()):
+    """Hash of the variant rows, ignoring `skip` columns"""
+    rows = [{k: v for k, v in variant.items() if k not in skip} for variant in variants]
+    data = json.dumps(rows, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def load_hashes(path=HASHES_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_hashes(hashes, path=HASHES_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def write_matrix(site_dir, handle, variants, fields=None):
+    path = os.path.join(site_dir, VARIANTS_DIR, f'{handle}.json')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(variant_matrix(variants, fields), f, separators=(',', ':'), ensure_ascii=False)
+
+def update(site_dir, products, hashes, complete=True):
+    """Write the JSON of products whose variant rows changed
+
+    `products` yields (handle, merged product) pairs; with complete=True they
+    are the whole catalog and files of other handles are removed. Returns
+    (written, removed) and updates `hashes` in place.
+    """
+    written = 0
+    seen = set()
+    fields = variant_fields()
+    # Price edits don't touch the files when prices.json serves them
+    skip = price_overlay.OVERLAY_FIELDS if fields is not VARIANT_FIELDS else ()
+    for handle, product in products:
+        seen.add(handle)
+        variants = product.get('variants', [product])
+        digest = rows_hash(variants, skip)
+        if hashes.get(handle) == digest and os.path.exists(os.path.join(site_dir, VARIANTS_DIR, f'{handle}.json')):
+            continue
+        write_matrix(site_dir, handle, variants, fields)
+        hashes[handle] = digest
+        written += 1
+    removed = 0
+    if complete:
+        for handle in [h for h in hashes if h not in seen]:
+            path = os.path.join(site_dir, VARIANTS_DIR, f'{handle}.json')
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+            del hashes[handle]
+    return written, removed
+
+def main():
+    """Write variants/<handle>.json for changed products and the loader script
+
+    Usage: variant_matrix.py [--site DIR]
+    """
+    import generate_cms_pages
+
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+
+    os.makedirs(os.path.join(site_dir, 'js'), exist_ok=True)
+    with open(os.path.join(site_dir, LOADER_SCRIPT), 'w', encoding='utf-8') as f:
+        f.write(LOADER_JS)
+    hashes = load_hashes()
+    written, removed = update(site_dir, generate_cms_pages.iter_products(), hashes)
+    save_hashes(hashes)
+    total = sum(os.path.getsize(os.path.join(site_dir, VARIANTS_DIR, f'{h}.json')) for h in hashes)
+    print(f"✅ Variant JSON: {written} written, {removed} removed, "
+          f"{len(hashes)} product(s), {total / 1024:.1f} KB total")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Self-host the third-party scripts the pages load from CDNs.
+
+js/vendor/manifest.json lists every external script we use (webfont.js,
+jQuery, GSAP, js-cookie, Barba, Slick) with its CDN URL, the local copy under
+js/vendor/ and its pinned SRI hash. The local copies are committed, so the
+build never touches the network. `--fetch` is only for adding or upgrading
+a library: it downloads the copy and refuses it unless it matches the
+published hash pinned in the manifest (an unpinned entry is an error).
+
+On each page the scripts at the end of <body> are combined into one
+fingerprinted js/vendor/bundle-<hash>.js loaded with `defer`. Everything after
+it (the Webflow chunks and the inline custom code) is deferred as well so it
+still runs after the libraries, in the same order: inline scripts are moved to
+js/inline/<hash>.js. webfont.js stays a plain script in <head> (pointed at the
+local copy) because the inline WebFont.load() call right after it needs it.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+import urllib.request
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VENDOR_DIR = os.path.join('js', 'vendor')
+INLINE_DIR = os.path.join('js', 'inline')
+MANIFEST_NAME = 'manifest.json'
+BUNDLES_NAME = 'bundles.json'
+
+SCRIPT_TAG = re.compile(r'<script\b([^>]*)>(.*?)</script>', re.DOTALL)
+SRC_ATTR = re.compile(r'\bsrc="([^"]*)"')
+TYPE_ATTR = re.compile(r'\btype="([^"]*)"')
+
+def sri_hash(data):
+    """Subresource Integrity value (sha256) for some bytes"""
+    return 'sha256-' + base64.b64encode(hashlib.sha256(data).digest()).decode('ascii')
+
+def load_manifest(site_dir):
+    """Library name -> {url, file, integrity}"""
+    with open(os.path.join(site_dir, VENDOR_DIR, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+def url_key(url):
+    """CDN URL without query string (Webflow appends ?site=<id> to jQuery)"""
+    return url.split('?', 1)[0]
+
+def fetch(site_dir, manifest):
+    """Download missing copies, each checked against the hash pinned in the manifest
+
+    An entry without a pinned hash is an error: the hash has to come from the
+    library's published SRI value, never from whatever the CDN serves today.
+    """
+    ok = True
+    for name, entry in sorted(manifest.items()):
+        path = os.path.join(site_dir, VENDOR_DIR, entry['file'])
+        if not entry.get('integrity'):
+            print(f"❌ {name}: no pinned integrity hash; add its published SRI hash to {VENDOR_DIR}/{MANIFEST_NAME}")
+            ok = False
+            continue
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                if sri_hash(f.read()) == entry['integrity']:
+                    continue
+        print(f"⬇️  {name}: {entry['url']}")
+        try:
+            with urllib.request.urlopen(entry['url'], timeout=30) as response:
+                data = response.read()
+        except OSError as e:
+            print(f"   ❌ {e}")
+            ok = False
+            continue
+        digest = sri_hash(data)
+        if digest != entry['integrity']:
+            print(f"   ❌ Integrity mismatch: pinned {entry['integrity']}, got {digest}")
+            ok = False
+            continue
+        with open(path, 'wb') as f:
+            f.write(data)
+        print(f"   ✅ {len(data):,} bytes, {digest}")
+    return ok
+
+def verify(site_dir, manifest, names):
+    """Read and integrity-check the local copies; returns {name: bytes} or None"""
+    copies = {}
+    problems = []
+    for name in sorted(names):
+        entry = manifest[name]
+        path = os.path.join(site_dir, VENDOR_DIR, entry['file'])
+        if not os.path.exists(path):
+            problems.append(f"{name}: {VENDOR_DIR}/{entry['file']} is missing")
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not entry.get('integrity'):
+            problems.append(f"{name}: no pinned integrity hash")
+        elif sri_hash(data) != entry['integrity']:
+            problems.append(f"{name}: {entry['file']} doesn't match {entry['integrity']}")
+        else:
+            copies[name] = data
+    if problems:
+        print("❌ Vendored scripts failed verification:")
+        for problem in problems:
+            print(f"   - {problem}")
+        print(f"   Pin each library's published SRI hash in {VENDOR_DIR}/{MANIFEST_NAME}, run "
+              "`python3 vendor_scripts.py --fetch` (needs network) and commit js/vendor/")
+        return None
+    return copies
+
+def classify(attrs, by_url, bundles):
+    """What a script tag is: ('vendor', [names]), ('src', url), ('inline', None) or ('other', None)"""
+    src = SRC_ATTR.search(attrs)
+    if src:
+        url = src.group(1)
+        if url_key(url) in by_url:
+            return 'vendor', [by_url[url_key(url)]]
+        if '/js/vendor/' in '/' + url:
+            # Already rewritten by a previous run
+            filename = os.path.basename(url)
+            if filename in bundles:
+                return 'vendor', bundles[filename]
+            if filename in by_url:
+                return 'vendor', [by_url[filename]]
+        return 'src', url
+    script_type = TYPE_ATTR.search(attrs)
+    if script_type and script_type.group(1) not in ('text/javascript', 'application/javascript'):
+        return 'other', None  # JSON-LD and friends
+    return 'inline', None
+
+def page_prefix(page):
+    """Relative path from a page back to the site root"""
+    return '../' * page.count('/')
+
+def rewrite_page(html, page, manifest, copies, by_url, bundles, inline_files, site_dir):
+    """Point vendored scripts at local copies and bundle/defer the end of <body>"""
+    prefix = page_prefix(page)
+    body_at = html.find('<body')
+    tags = list(SCRIPT_TAG.finditer(html))
+
+    # <head> (and anything before the first vendored body script) keeps its
+    # order; only the URLs change
+    tail_start = None
+    for match in tags:
+        kind, value = classify(match.group(1), by_url, bundles)
+        if kind == 'vendor' and match.start() > body_at:
+            tail_start = match
+            break
+    out = []
+    last = 0
+    for match in tags:
+        if tail_start is not None and match.start() >= tail_start.start():
+            break
+        kind, value = classify(match.group(1), by_url, bundles)
+        if kind == 'vendor' and len(value) == 1:
+            entry = manifest[value[0]]
+            tag = (f'<script src="{prefix}js/vendor/{entry["file"]}" type="text/javascript" '
+                   f'integrity="{entry["integrity"]}"></script>')
+            out.append(html[last:match.start()] + tag)
+            last = match.end()
+    if tail_start is None:
+        return ''.join(out) + html[last:], None
+
+    # End of <body>: one deferred vendor bundle, then everything else deferred in order
+    tail_end = html.rfind('</body>')
+    vendored = []
+    rest = []
+    previous_end = tail_start.start()
+    for match in tags:
+        if match.start() < tail_start.start() or match.start() > tail_end:
+            continue
+        gap = html[previous_end:match.start()].strip()
+        if gap:
+            rest.append(gap)  # markup between scripts stays where it was
+        previous_end = match.end()
+        kind, value = classify(match.group(1), by_url, bundles)
+        if kind == 'vendor':
+            vendored += [n for n in value if n not in vendored]
+        elif kind == 'src':
+            if '/js/inline/' in '/' + value:
+                inline_files.add(os.path.basename(value))
+            rest.append(f'<script src="{value}" type="text/javascript" defer></script>')
+        elif kind == 'inline':
+            code = match.group(2)
+            name = hashlib.sha256(code.encode('utf-8')).hexdigest()[:12] + '.js'
+            path = os.path.join(site_dir, INLINE_DIR, name)
+            if not os.path.exists(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(code)
+            inline_files.add(name)
+            rest.append(f'<script src="{prefix}js/inline/{name}" type="text/javascript" defer></script>')
+        else:
+            rest.append(match.group(0))
+    data = b';\n'.join(copies[name] for name in vendored)
+    bundle_name = f'bundle-{hashlib.sha256(data).hexdigest()[:10]}.js'
+    bundle_path = os.path.join(site_dir, VENDOR_DIR, bundle_name)
+    if not os.path.exists(bundle_path):
+        with open(bundle_path, 'wb') as f:
+            f.write(data)
+    bundles[bundle_name] = vendored
+    tags_html = [f'<script src="{prefix}js/vendor/{bundle_name}" type="text/javascript" '
+                 f'integrity="{sri_hash(data)}" defer></script>'] + rest
+    line_start = html.rfind('\n', 0, tail_start.start()) + 1
+    indent = html[line_start:tail_start.start()]
+    gap = html[previous_end:tail_end].strip()
+    if gap:
+        tags_html.append(gap)
+    out.append(html[last:tail_start.start()] + ('\n' + indent).join(tags_html) + '\n' + html[tail_end:])
+    return ''.join(out), bundle_name
+
+def site_pages(site_dir):
+    """HTML pages at the site root and in products/ and recipes/"""
+    pages = []
+    for folder in ['', 'products', 'recipes']:
+        path = os.path.join(site_dir, folder)
+        if os.path.isdir(path):
+            pages += sorted(os.path.join(folder, f) for f in os.listdir(path) if f.endswith('.html'))
+    return pages
+
+def main():
+    """Vendor, verify, bundle and rewrite
+
+    Usage: vendor_scripts.py [--site DIR] [--fetch]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+    manifest = load_manifest(site_dir)
+
+    if '--fetch' in sys.argv:
+        if not fetch(site_dir, manifest):
+            sys.exit(1)
+        return
+
+    # CDN URLs and local file names both map back to the library
+    by_url = {url_key(entry['url']): name for name, entry in manifest.items()}
+    by_url.update({entry['file']: name for name, entry in manifest.items()})
+    bundles_path = os.path.join(site_dir, VENDOR_DIR, BUNDLES_NAME)
+    old_bundles = {}
+    if os.path.exists(bundles_path):
+        with open(bundles_path, 'r', encoding='utf-8') as f:
+            old_bundles = json.load(f)
+
+    # Which libraries the pages use, so missing unused copies don't fail the build
+    pages = {}
+    used = set()
+    for page in site_pages(site_dir):
+        with open(os.path.join(site_dir, page), 'r', encoding='utf-8') as f:
+            pages[page] = f.read()
+        for match in SCRIPT_TAG.finditer(pages[page]):
+            kind, value = classify(match.group(1), by_url, old_bundles)
+            if kind == 'vendor':
+                used.update(value)
+    copies = verify(site_dir, manifest, used)
+    if copies is None:
+        sys.exit(1)
+
+    os.makedirs(os.path.join(site_dir, INLINE_DIR), exist_ok=True)
+    bundles = dict(old_bundles)
+    used_bundles = set()
+    inline_files = set()
+    changed = 0
+    for page, html in pages.items():
+        updated, bundle_name = rewrite_page(html, page, manifest, copies, by_url, bundles, inline_files, site_dir)
+        if bundle_name:
+            used_bundles.add(bundle_name)
+        if updated != html:
+            with open(os.path.join(site_dir, page), 'w', encoding='utf-8') as f:
+                f.write(updated)
+            changed += 1
+
+    # Drop bundles no page references any more
+    for name in list(bundles):
+        if name not in used_bundles:
+            del bundles[name]
+            path = os.path.join(site_dir, VENDOR_DIR, name)
+            if os.path.exists(path):
+                os.remove(path)
+    save_json(bundles_path, bundles)
+    for name in os.listdir(os.path.join(site_dir, INLINE_DIR)):
+        if name not in inline_files:
+            os.remove(os.path.join(site_dir, INLINE_DIR, name))
+
+    for name in sorted(bundles):
+        size = os.path.getsize(os.path.join(site_dir, VENDOR_DIR, name))
+        print(f"📦 {name}: {', '.join(bundles[name])} ({size:,} bytes)")
+    print(f"✅ Rewrote {changed} page(s); third-party scripts now load from this origin")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Viewport-conditional loading for Webflow background videos.
+
+The homepage (and the grid/about pages that share its blocks) embeds the
+desktop and mobile logo-reveal videos plus the 1080p grill loop as
+autoplaying Webflow background videos. Browsers start downloading every
+autoplay video, including the ones CSS hides at the current width. This
+stage rewrites each `w-background-video` block so that:
+
+- the <video> loses autoplay and gets preload="none" and a poster attribute
+  (the existing -poster-00001.jpg, still shown first)
+- <source src> becomes <source data-src>, so nothing is fetched up front
+- js/lazy-video.js starts a video when it intersects the viewport. A video
+  that CSS media queries hide at the current width never intersects, so only
+  the variant for the visitor's screen is downloaded; resizing into another
+  breakpoint loads that variant. Videos pause off screen and stay on their
+  poster when prefers-reduced-motion is set.
+
+--report prints the video bytes each device class downloads before and
+after, using the stylesheets' display rules at each breakpoint. The figures
+are for a first visit that scrolls the whole page: returning visitors skip
+the intro overlay and its video entirely.
+"""
+
+import os
+import re
+import sys
+
+import font_usage
+import resource_hints
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LAZY_SCRIPT = os.path.join('js', 'lazy-video.js')
+
+# Viewport widths the report is computed for (Webflow's breakpoints)
+DEVICES = [('desktop', 1440), ('tablet', 800), ('mobile', 375)]
+
+BACKGROUND_VIDEO = re.compile(r'(<div\b[^>]*\bdata-poster-url="([^"]*)"[^>]*\bw-background-video\b[^>]*>\s*)'
+                              r'(<video\b[^>]*>)(.*?</video>)', re.DOTALL)
+MEDIA_WIDTH = re.compile(r'\((min|max)-width:\s*(\d+)px\)')
+
+LAZY_JS = """(function () {
+  var reduceMotion = window.matchMedia('(prefers-reduced-motion: reduce)');
+  function start(video) {
+    if (!video.hasAttribute('data-loaded')) {
+      video.querySelectorAll('source[data-src]').forEach(function (source) {
+        source.src = source.getAttribute('data-src');
+      });
+      video.setAttribute('data-loaded', '');
+      video.load();
+    }
+    if (!reduceMotion.matches) {
+      var playing = video.play();
+      if (playing && playing.catch) playing.catch(function () {});
+    }
+  }
+  var videos = document.querySelectorAll('video[data-lazy-video]');
+  if (!('IntersectionObserver' in window)) {
+    videos.forEach(function (video) {
+      if (video.getClientRects().length) start(video);
+    });
+    return;
+  }
+  // Hidden (display: none) videos never intersect, so only the variant the
+  // current media queries show is ever fetched
+  var observer = new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+      if (entry.isIntersecting) {
+        start(entry.target);
+      } else if (entry.target.hasAttribute('data-loaded')) {
+        entry.target.pause();
+      }
+    });
+  }, {rootMargin: '200px 0px'});
+  videos.forEach(function (video) { observer.observe(video); });
+})();
+"""
+
+def rewrite_videos(html):
+    """Make every background video lazy; returns (html, videos rewritten)"""
+    count = 0
+    def replace(match):
+        nonlocal count
+        opening, poster, video, rest = match.groups()
+        if 'data-lazy-video' in video:
+            return match.group(0)
+        count += 1
+        video = re.sub(r'\s(?:autoplay|preload|poster)(?:="[^"]*")?(?=[\s>])', '', video)
+        video = video[:-1] + f' preload="none" poster="{poster}" data-lazy-video="">'
+        rest = re.sub(r'(<source\b[^>]*?\s)src=', r'\1data-src=', rest)
+        return opening + video + rest
+    return BACKGROUND_VIDEO.sub(replace, html), count
+
+def add_script(html, page):
+    """Load js/lazy-video.js at the end of <body> when the page has lazy videos"""
+    has_script = 'js/lazy-video.js' in html
+    if 'data-lazy-video' in html and not has_script:
+        prefix = '../' * page.count('/')
+        at = html.rfind('</body>')
+        html = html[:at] + f'<script src="{prefix}{LAZY_SCRIPT}" type="text/javascript" defer></script>\n' + html[at:]
+    elif 'data-lazy-video' not in html and has_script:
+        html = re.sub(r'<script src="[^"]*js/lazy-video\.js"[^>]*></script>\n?', '', html)
+    return html
+
+# --- Report -----------------------------------------------------------------
+
+def display_rules(css, rules, low=0, high=10 ** 6):
+    """Append (min width, max width, class, display) for single-class `display` rules"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    for prelude, body in font_usage.iter_blocks(css):
+        if prelude.lower().startswith('@media'):
+            if 'print' in prelude.lower():
+                continue
+            inner_low, inner_high = low, high
+            for kind, width in MEDIA_WIDTH.findall(prelude):
+                if kind == 'min':
+                    inner_low = max(inner_low, int(width))
+                else:
+                    inner_high = min(inner_high, int(width))
+            display_rules(body, rules, inner_low, inner_high)
+        elif not prelude.startswith('@'):
+            display = re.search(r'(?:^|;)\s*display\s*:\s*([\w-]+)', body)
+            if not display:
+                continue
+            for selector in font_usage.split_selectors(prelude):
+                if re.fullmatch(r'\.[\w-]+', selector):
+                    rules.append((low, high, selector[1:], display.group(1)))
+    return rules
+
+def rendered(element, rules, width):
+    """Whether an element and all its ancestors are displayed at a viewport width"""
+    while element is not None and element.tag != '#document':
+        display = None
+        for low, high, cls, value in rules:
+            if low <= width <= high and cls in element.classes:
+                display = value
+        inline = re.search(r'display\s*:\s*([\w-]+)', element.attrs.get('style') or '')
+        if inline:
+            display = inline.group(1)
+        if display == 'none':
+            return False
+        element = element.parent
+    return True
+
+def iter_videos(element):
+    if element.tag == 'video':
+        yield element
+    for child in element.children:
+        yield from iter_videos(child)
+
+def page_video_bytes(site_dir, page, html, rules, lazy):
+    """{device: bytes} of video data a first visit downloads"""
+    builder = font_usage.TreeBuilder()
+    builder.feed(html)
+    base = os.path.dirname(page)
+    def size(url):
+        path = os.path.normpath(os.path.join(base, url))
+        full = os.path.join(site_dir, path)
+        return os.path.getsize(full) if os.path.exists(full) else 0
+    totals = {}
+    for device, width in DEVICES:
+        total = 0
+        for video in iter_videos(builder.root):
+            sources = [c.attrs.get('src') or c.attrs.get('data-src') for c in video.children if c.tag == 'source']
+            poster = video.attrs.get('poster') or (video.parent.attrs.get('data-poster-url') if video.parent else None)
+            shown = rendered(video, rules, width)
+            if shown and poster:
+                total += size(poster)
+            elif lazy and poster:
+                total += size(poster)  # a poster attribute may be fetched even while hidden
+            if sources and sources[0] and (shown or not lazy):
+                total += size(sources[0])  # mp4 is listed first and playable everywhere
+        totals[device] = total
+    return totals
+
+def main():
+    """Rewrite background videos on every page
+
+    Usage: video_loading.py [--site DIR] [--report]
+    """
+    site_dir = BASE_DIR
+    if '--site' in sys.argv:
+        site_dir = os.path.abspath(sys.argv[sys.argv.index('--site') + 1])
+
+    # Left alone when unchanged, so its mtime (and the service worker revision) stays put
+    script_path = os.path.join(site_dir, LAZY_SCRIPT)
+    current = None
+    if os.path.exists(script_path):
+        with open(script_path, 'r', encoding='utf-8') as f:
+            current = f.read()
+    if current != LAZY_JS:
+        with open(script_path, 'w', encoding='utf-8') as f:
+            f.write(LAZY_JS)
+    changed = 0
+    rewritten = 0
+    report = []
+    for page in resource_hints.site_pages(site_dir):
+        path = os.path.join(site_dir, page)
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        updated, count = rewrite_videos(html)
+        updated = add_script(updated, page)
+        if 'data-lazy-video' in updated and '--report' in sys.argv:
+            rules = []
+            for href in font_usage.STYLESHEET_LINK.findall(html):
+                css_path = os.path.join(site_dir, os.path.normpath(os.path.join(os.path.dirname(page), href)))
+                if os.path.exists(css_path):
+                    with open(css_path, 'r', encoding='utf-8') as f:
+                        display_rules(f.read(), rules)
+            before = page_video_bytes(site_dir, page, html, rules, lazy=False)
+            after = page_video_bytes(site_dir, page, updated, rules, lazy=True)
+            report.append((page, updated.count('data-lazy-video='), before, after))
+        if updated != html:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(updated)
+            changed += 1
+        rewritten += count
+
+    if report:
+        print(f"🎬 Video bytes on a first visit (scrolling the whole page), before → after:")
+        print(f"   {'page':<16} {'videos':>6}  " + '  '.join(f"{device:>20}" for device, _ in DEVICES))
+        for page, count, before, after in report:
+            cells = [f"{before[d] / 1e6:>7.1f} → {after[d] / 1e6:>4.1f} MB" for d, _ in DEVICES]
+            print(f"   {page:<16} {count:>6}  " + '  '.join(f"{cell:>20}" for cell in cells))
+    print(f"✅ {rewritten} background video(s) made lazy; updated {changed} page(s)")
+
+if __name__ == '__main__':
+    main()